@@ -19,6 +19,18 @@ alert_threshold = 100           # if the number of drw entries surpasses this nu
 ping = False                    # send redcap messenger ping
 production_mode = False         # True to submit drw entries to redcap server
 routine_hours = 9               # Sends an email if the last routine was more than this many hours ago
+qc_worker_count = 4             # number of QC jobs that run at the same time
+qc_queue_size = 500             # number of QC jobs that can wait for a worker before new triggers are dropped
+qc_quiet_seconds = 5            # triggers for the same record, event and instance within this many seconds run one QC job (0 to run every trigger)
+qc_journal = True               # records accepted triggers on disk so they are replayed after a restart
+capture_mode = 'http'           # 'http' (triggers post each save) or 'outbox' (triggers insert into an outbox table that is polled). Update triggers after changing
+outbox_poll_seconds = 2         # seconds between polls of an empty outbox table
+admission_control = True        # defers (with qc_journal) or sheds new triggers with 429/503 while the app is overloaded. Only the batch route and outbox mode resend a shed trigger, the http_post of capture_mode 'http' never retries, so its triggers are always deferred (spilled to disk past the in-memory limit) and only shed without qc_journal
+admission_queue_ratio = 0.8     # share of qc_queue_size above which new triggers are not queued
+admission_max_memory_mb = 0     # app memory in MB above which new triggers are not queued (0 to not check, needs psutil)
+admission_max_db_ratio = 0.9    # share of the mariaDB max_connections above which new triggers are not queued
+admission_retry_after = 30      # seconds a shed trigger is asked to wait before it is sent again
+sqlite_mirror = False           # runs the DRW and provenance lookups of QC against a local SQLite copy kept in sync in the background
 # _____________________________________________
 
 ipfile = 'stored_data/ip_list.txt'
@@ -30,6 +42,17 @@ if not os.path.exists(logdir):
 with open(ipfile, 'r') as file:
     ip_list = file.read().splitlines()
 
+if sqlite_mirror:
+    start_sqlite_mirror()
+start_qc_workers(num_workers=qc_worker_count, max_queue=qc_queue_size)
+start_qc_coalescer(quiet_window=qc_quiet_seconds)
+if qc_journal and production_mode:
+    start_ingest_journal(outlier_method = outlier_method, outlier_qc = True, missing_qc = True, routine = False, production_mode = production_mode)
+if admission_control and production_mode:
+    start_qc_admission(queue_ratio = admission_queue_ratio, max_memory_mb = admission_max_memory_mb, max_db_ratio = admission_max_db_ratio, retry_after = admission_retry_after)
+start_log_capture(capture_mode, pid_list, poll_seconds = outbox_poll_seconds, 
+                  outlier_method = outlier_method, outlier_qc = True, missing_qc = True, routine = False, production_mode = production_mode)
+
 def common_troubleshooting():
     """
     Returns common troubleshooting fixes.
@@ -47,6 +70,37 @@ def logfile_tail():
         f"<h3>Recent Log Entries</h3>"
         f"<pre style='word-wrap: break-word; white-space: pre-wrap;'>{log_tail}</pre>" )
 
+def qc_queue_status():
+    """
+    Returns the depth and counters of the QC queue.
+    """
+    metrics = get_qc_queue_metrics()
+    return_status = f'<h3>QC Queue</h3>'
+    return_status += f"Queued: {metrics['depth']} / {metrics['capacity']} (max {metrics['max_depth']}) <br>"
+    return_status += f"Running: {metrics['running']} on {metrics['workers']} workers <br>"
+    return_status += f"Completed: {metrics['completed']}, failed: {metrics['failed']}, rejected: {metrics['rejected']} <br>"
+    return_status += f"Held for quiet window: {len(qc_pending_bursts)}, coalesced: {metrics['coalesced']}, retried for a full queue: {metrics['burst_retries']} <br>"
+    return_status += f"Real-time p95: {metrics['realtime_p95']}s (target {metrics['slo_seconds']}s, {metrics['slo_breaches']} over), sweep yields: {metrics['sweep_yields']} <br>"
+    return_status += f"Deferred: {metrics['deferred_backlog']} waiting ({metrics['deferred']} total), shed: {metrics['shed']}, mariaDB connections: {metrics['db_ratio']:.0%} <br>"
+    return return_status
+
+def shed_response(admission: dict):
+    """
+    Returns the response for a trigger that is shed while the app is overloaded, asking the sender to retry later.
+    """
+    return flask.Response(f"QC is overloaded, retry later: {admission['reason']} \n", status=admission['status'], 
+                          headers={'Retry-After': str(admission['retry_after'])})
+
+def job_status(status: dict):
+    """
+    Returns the state and progress of a long job.
+    """
+    if status.get('started_now'):
+        return f"{status['job']}: started \n"
+    if status.get('state') == 'running':
+        return f"{status['job']}: already running since {status.get('started')}, {status.get('progress')} \n"
+    return f"{status['job']}: {status.get('state')} \n"
+
 def routing_links():
     """
     Returns the webpage routes.
@@ -58,13 +112,15 @@ def routing_links():
     return_links += f'<a href="https://redcom.hnrc.tufts.edu/flaskApp/update-triggers/">https://redcom.hnrc.tufts.edu/flaskApp/update-triggers/</a> <br>'
     return_links += f'<a href="https://redcom.hnrc.tufts.edu/flaskApp/outliers-and-missing-routine/">https://redcom.hnrc.tufts.edu/flaskApp/outliers-and-missing-routine/</a> <br>'
     return_links += f'<a href="https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria/">https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria/</a> <br>'
+    return_links += f'<a href="https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria-batch/">https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria-batch/</a> <br>'
+    return_links += f'<a href="https://redcom.hnrc.tufts.edu/flaskApp/study-complete/">https://redcom.hnrc.tufts.edu/flaskApp/study-complete/</a> <br>'
     return return_links
 
 def default_page():
     """
     Returns the default webpage structure with routing, troubleshooting, and log file.
     """
-    return f'<h1>Redcom Flask App</h1>' + routing_links() + common_troubleshooting() + logfile_tail()
+    return f'<h1>Redcom Flask App</h1>' + routing_links() + common_troubleshooting() + qc_queue_status() + logfile_tail()
 
 @app.route('/')
 @app.route('/flaskApp/')
@@ -83,11 +139,10 @@ def update_triggers():
 
     Refreshes all stored data and triggers for all projects.
     """
-    thread_trig = threading.Thread(target=refresh_background_trigger)
-    thread_trig.start()
-    thread_store = threading.Thread(target=refresh_all_stored_data)
-    thread_store.start()
-    return 'Processing triggers in the background \n' + default_page()
+    # repeated requests report the refresh that is already running instead of starting another
+    trigger_status = run_single_flight('refresh_triggers', refresh_background_trigger)
+    store_status = run_single_flight('refresh_stored_data', refresh_all_stored_data)
+    return 'Processing triggers in the background \n' + job_status(trigger_status) + job_status(store_status) + default_page()
 
 @app.route('/flaskApp/outliers-and-missing-routine/', methods=['POST'])
 def outlier_and_missing_routine():
@@ -97,24 +152,22 @@ def outlier_and_missing_routine():
     Sends email if the last run was more than routine_hours ago.
     Sends email blast for drw entries that are more than 24 hours old.
     """
-    check_last_run(hours=routine_hours)
-    if production_mode:
-        send_periodic_email()
-    thread_check = threading.Thread(target=check_for_all_outlier_and_missing, kwargs={'pid_list': pid_list, 
-                                                                                      'outlier_method': outlier_method, 
-                                                                                      'alert_threshold': alert_threshold, 
-                                                                                      'ping': ping, 
-                                                                                      'production_mode': production_mode})
-    thread_check.start()
-    return 'Checking for outliers and missing in the background \n'
+    # a routine that is still running is reported instead of starting a second one
+    routine_status = run_single_flight('routine', check_for_all_outlier_and_missing, pid_list = pid_list, 
+                                                                                     outlier_method = outlier_method, 
+                                                                                     alert_threshold = alert_threshold, 
+                                                                                     ping = ping, 
+                                                                                     production_mode = production_mode)
+    # the emails go out once per routine, not once per request made while it runs
+    if routine_status['started_now']:
+        check_last_run(hours=routine_hours)
+        if production_mode:
+            send_periodic_email()
+    return 'Checking for outliers and missing in the background \n' + job_status(routine_status)
 
-@app.route('/flaskApp/receive-from-maria/', methods=['POST'])
-def receive_from_maria():
+def extract_redcap_data(data: dict) -> dict:
     """
-    Runs when triggered by POST request from MariaDB. 
-    Receives data from MariaDB and runs quality control if IP is authorized.
-
-    Inputs data from redcap_log_event table
+    Returns the redcap_log_event fields of a received log row.
     """
     redcap_data = {
         'log_event_id': None,
@@ -139,29 +192,171 @@ def receive_from_maria():
     #                "redcap_data_access_group": None, "instrument_complete": None, "redcap_repeat_instance": None, "redcap_repeat_instrument": None, 
     #                "redcap_url": None, "project_url": None}
 
+    for data_field in redcap_data.keys():
+        redcap_data[data_field] = data.get(data_field, None)
+    return redcap_data
+
+@app.route('/flaskApp/receive-from-maria/', methods=['POST'])
+def receive_from_maria():
+    """
+    Runs when triggered by POST request from MariaDB. 
+    Receives data from MariaDB and runs quality control if IP is authorized.
+
+    Inputs data from redcap_log_event table
+    """
     if flask.request.method == 'POST':
         if flask.request.remote_addr in ip_list:
             data = flask.request.get_json(force=True)
-            
-            for data_field in redcap_data.keys():
-                redcap_data[data_field] = data.get(data_field, None)
+            redcap_data = extract_redcap_data(data)
 
             logging.info(f"inputted redcap_data: {redcap_data}")
             if production_mode:
                 # only for projects in list. Comment out for all projects
                 if redcap_data['project_id'] in pid_list:
-                    thread_qc = threading.Thread(target=operate_quality_control_individual, kwargs={'data_entry': redcap_data, 
-                                                                                                    'outlier_method': outlier_method, 
-                                                                                                    'outlier_qc': True, 
-                                                                                                    'missing_qc': True, 
-                                                                                                    'routine': False, 
-                                                                                                    'production_mode': production_mode})
-                    thread_qc.start()
+                    # the http_post of the trigger never retries, so a trigger that is not admitted is deferred (to disk if needed) rather than shed
+                    admission = check_qc_admission(spill = True)
+                    if not admission['admitted'] and not admission['defer']:
+                        return shed_response(admission)
+                    # retried and replayed triggers are dropped before any QC work is scheduled
+                    if not accept_log_event(redcap_data):
+                        return 'Duplicate log event \n'
+                    # the entry is on disk before the trigger is acknowledged
+                    journal_id = append_journal_event(redcap_data)
+                    qc_kwargs = {'data_entry': redcap_data, 
+                                 'journal_id': journal_id, 
+                                 'outlier_method': outlier_method, 
+                                 'outlier_qc': True, 
+                                 'missing_qc': True, 
+                                 'routine': False, 
+                                 'production_mode': production_mode}
+                    if not admission['admitted']:
+                        defer_qc_submission(coalesce_qc_entry, spill = True, **qc_kwargs)
+                        return flask.Response(f"QC deferred: {admission['reason']} \n", status=202)
+                    queued = coalesce_qc_entry(**qc_kwargs)
+                    if not queued:
+                        return 'QC queue is full \n'
         else:
             logging.info(f"Unauthorized access from {flask.request.remote_addr}")
             return 'Unauthorized access \n'
 
     return 'Running QC in the background \n'
 
+@app.route('/flaskApp/receive-from-maria-batch/', methods=['POST'])
+def receive_from_maria_batch():
+    """
+    Runs when triggered by POST request from MariaDB or a bulk replay.
+    Receives many rows of the redcap_log_event table as a JSON array or NDJSON (one JSON object per line)
+    and runs one quality control job per project if IP is authorized.
+
+    Inputs data from redcap_log_event table
+    """
+    if flask.request.remote_addr not in ip_list:
+        logging.info(f"Unauthorized access from {flask.request.remote_addr}")
+        return 'Unauthorized access \n'
+
+    body = flask.request.get_data(as_text=True)
+    try:
+        rows = json.loads(body)
+        rows = rows if isinstance(rows, list) else [rows]
+    except ValueError:
+        try:
+            rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except ValueError as e:
+            logging.info(f"Invalid batch of log rows: {e}")
+            return flask.Response(f"Invalid JSON or NDJSON: {e} \n", status=400)
+    if not all(isinstance(row, dict) for row in rows):
+        return flask.Response("Every log row must be a JSON object \n", status=400)
+
+    logging.info(f"inputted batch of {len(rows)} log rows")
+    if not production_mode:
+        return f'Received {len(rows)} log rows \n'
+
+    # checked before the events are marked as seen, so a shed batch is accepted when it is sent again
+    admission = check_qc_admission()
+    if not admission['admitted'] and not admission['defer']:
+        return shed_response(admission)
+
+    project_entries = {}
+    batch_ids = set()
+    duplicates = 0
+    for row in rows:
+        redcap_data = extract_redcap_data(row)
+        # only for projects in list. Comment out for all projects
+        if redcap_data['project_id'] not in pid_list:
+            continue
+        # rows are recorded as seen only once their job is queued, so a rejected batch is accepted when it is sent again
+        if not accept_log_event(redcap_data, record = False) or (redcap_data['log_event_id'] is not None and redcap_data['log_event_id'] in batch_ids):
+            duplicates += 1
+            continue
+        batch_ids.add(redcap_data['log_event_id'])
+        project_entries.setdefault(redcap_data['project_id'], []).append(redcap_data)
+
+    # every row of the batch is journaled with one fsync
+    batch_journal_ids = iter(append_journal_events([redcap_data for entries in project_entries.values() for redcap_data in entries]))
+    queued_jobs = 0
+    rejected_rows = 0
+    for project_id, entries in project_entries.items():
+        journal_ids = [journal_id for journal_id in [next(batch_journal_ids) for _ in entries] if journal_id is not None]
+        qc_kwargs = {'target': operate_quality_control_batch, 
+                     'journal_ids': journal_ids, 
+                     'data_entries': entries, 
+                     'outlier_method': outlier_method, 
+                     'outlier_qc': True, 
+                     'missing_qc': True, 
+                     'routine': False, 
+                     'production_mode': production_mode}
+        if not admission['admitted']:
+            defer_qc_submission(enqueue_qc_job, **qc_kwargs)
+        elif enqueue_qc_job(**qc_kwargs):
+            queued_jobs += 1
+        else:
+            # the sender resends the batch, the journaled copies are closed
+            mark_journal_done(journal_ids)
+            rejected_rows += len(entries)
+            continue
+        for redcap_data in entries:
+            accept_log_event(redcap_data)
+
+    logging.info(f"batch of {len(rows)} log rows: {duplicates} duplicates, {queued_jobs} jobs queued, {rejected_rows} rows rejected, projects: {list(project_entries.keys())}")
+    if rejected_rows:
+        return shed_response({'status': 503, 'reason': f'QC queue is full, {rejected_rows} log rows were not queued', 'retry_after': admission['retry_after']})
+    if not admission['admitted']:
+        return flask.Response(f"QC deferred for {len(rows)} log rows: {admission['reason']} \n", status=202)
+    return f'Running QC in the background for {len(rows)} log rows in {queued_jobs} jobs ({duplicates} duplicates) \n'
+
+@app.route('/flaskApp/study-complete/', methods=['POST'])
+def study_complete():
+    """
+    Runs when triggered by POST request from MariaDB.
+    Adds the record to the completed users if IP is authorized and the value shows the study was completed.
+
+    Inputs data from redcap_data table
+    """
+    redcap_data = {
+        'project_id': None,
+        'event_id': None,
+        'record': None,
+        'field_name': None,
+        'value': None,
+        'instance': None
+        }
+
+    if flask.request.method == 'POST':
+        if flask.request.remote_addr in ip_list:
+            data = flask.request.get_json(force=True)
+
+            for data_field in redcap_data.keys():
+                redcap_data[data_field] = data.get(data_field, None)
+
+            logging.info(f"inputted study complete data: {redcap_data}")
+            if redcap_data['record'] is None or not str(redcap_data['project_id']).isdigit():
+                return flask.Response("project_id and record are required \n", status=400)
+            add_completed_user(redcap_data)
+        else:
+            logging.info(f"Unauthorized access from {flask.request.remote_addr}")
+            return 'Unauthorized access \n'
+
+    return 'Updated completed users \n'
+
 if __name__ == '__main__':
     waitress.serve(app, host="127.0.0.1", port=5000, connection_limit=1500, threads=50)
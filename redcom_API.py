@@ -13,6 +13,18 @@ import numpy as np      # converting numeric types for comparison
 import warnings         # suppresses deprecation warnings
 import logging          # logs events
 import smtplib          # sends email alerts
+import threading        # guards shared in-memory state across request threads
+import shutil           # removes old snapshot generations
+import contextlib       # pins a snapshot generation for the duration of a QC run
+import json             # records the fingerprints and timings of stored_data refreshes
+import sqlite3          # optional local mirror of the tables QC looks up
+import decimal          # converts mariaDB decimals for the SQLite mirror
+import queue            # bounded queue of QC jobs handed to the worker threads
+import traceback        # reports errors raised inside QC worker threads
+import collections      # ordered seen-set of received log_event_ids
+import hashlib          # compares generated trigger definitions with the installed ones
+import itertools        # orders QC jobs of the same priority by arrival
+import atexit           # writes the recent log_event_ids when the app stops
 
 from logging.config import dictConfig               # allows for logging configuration
 from email.mime.text import MIMEText                # formats email alerts
@@ -24,6 +36,22 @@ from sklearn.preprocessing import StandardScaler    # provides mathematical oper
 from statsmodels.formula.api import ols             # provides mathematical operations for outlier filtering (QQ)
 import statsmodels.api as sm                        # provides mathematical operations for outlier filtering (QQ)
 
+try:
+    import pyarrow as pa                            # stores typed columnar snapshots of stored_data (optional, CSV is used without it)
+    import pyarrow.ipc                              # reads and writes the memory-mapped Arrow snapshot files
+except ImportError:
+    pa = None
+
+try:
+    import psutil                                   # reads the memory of the app for QC admission control (optional, not checked without it)
+except ImportError:
+    psutil = None
+
+if os.name == 'nt':
+    import msvcrt                                   # locks the snapshot refresh across worker processes (Windows)
+else:
+    import fcntl                                    # locks the snapshot refresh across worker processes (POSIX)
+
 dotenv.load_dotenv()                                # loads system environment variables from .env file
 warnings.filterwarnings('ignore')                   # suppresses deprecation warnings 
 
@@ -31,6 +59,10 @@ pd.set_option('display.max_columns', None)          # sets pandas output view se
 pd.set_option('display.expand_frame_repr', False)   # sets pandas output view settings (for development)
 pd.set_option('max_colwidth', -1)                   # sets pandas output view settings (for development)
 
+# frames returned by read_snapshot share their buffers with the snapshot cache only where copy-on-write is always on (pandas 3.0),
+# older versions get deep copies, so the chained assignments of the module keep writing through
+snapshot_copy_on_write = int(pd.__version__.split('.')[0]) >= 3
+
 rootdir = f"C:\\inetpub\\flaskApp"            # sets root directory
 logdir = fr"{rootdir}\\output_logs\\{datetime.datetime.now().strftime('%Y-%m')}"                # sets log directory
 logfile = fr"{logdir}\\redcom_log_{datetime.datetime.now().strftime('%Y-%m-%d')}.log"           # sets log file
@@ -64,6 +96,129 @@ dictConfig({
     }
 })
 
+compact_category_columns = ['field_name', 'form_name', 'user', 'user_email', 'page', 'event', 'object_type']    # low-cardinality string columns stored as categoricals
+compact_integer_columns = ['log_event_id', 'project_id', 'event_id', 'pk', 'instance', 'ui_id']                                 # integer ID columns downcast to narrow types
+super_table_columns = ['log_event_id', 'project_id', 'event_id', 'pk', 'instance', 'form_name', 'field_name', 'ui_id', 'user', 'user_email']  # columns kept in the unioned super table
+shared_categories = {}                      # category dictionaries shared by the frames compacted in one snapshot generation, keyed by column name
+shared_categories_lock = threading.Lock()   # guards shared_categories across QC threads
+record_matrix_cache = {}                    # wide per-project record matrices keyed by project_id (see build_record_matrix)
+record_matrix_lock = threading.Lock()       # guards record_matrix_cache across QC threads
+record_matrix_max_age = 3600                # seconds before a cached record matrix is rebuilt from the data tables by the next QC run of its project
+completed_user_set = None                   # (project_id, record) pairs of users who have completed the study, loaded lazily from completed_users.csv
+completed_user_generation = None            # snapshot generation completed_user_set was loaded from
+completed_user_additions = set()            # completed users received from the study-complete trigger by any worker process since the app started
+completed_user_additions_path = fr"{rootdir}\\stored_data\\completed_user_additions.csv"  # append-only project_id,record lines of the completed users received from the trigger, shared by the worker processes and kept across restarts
+completed_user_additions_offset = 0         # bytes of completed_user_additions.csv already read into completed_user_additions
+completed_user_lock = threading.Lock()      # guards completed_user_set and completed_users.csv across request threads
+snapshot_cache = {}                         # parsed stored_data snapshots keyed by file path (see read_snapshot)
+snapshot_cache_lock = threading.Lock()      # guards snapshot_cache and snapshot_generation across request threads
+snapshot_generation = 0                     # bumped whenever stored_data is refreshed, invalidates every cached snapshot
+snapshot_memory_map = True                  # memory-maps Arrow snapshots so worker processes share their pages instead of copying them
+snapshot_root = fr"{rootdir}\\stored_data\\snapshots"  # generation directories of the stored_data snapshots, published through the CURRENT pointer file
+snapshot_keep_generations = 2               # newest generations kept after a refresh (older ones are removed once no QC run pins them)
+snapshot_pins = {}                          # number of QC runs pinned to each generation, keyed by generation name
+snapshot_pin_files = {}                     # locked pin file of this process in each generation it pins, so other processes do not remove the generation
+snapshot_pins_lock = threading.Lock()       # guards snapshot_pins and the removal of old generations
+snapshot_refresh_lock = threading.Lock()    # allows one stored_data refresh at a time
+snapshot_local = threading.local()          # generation pinned by the current thread (see pinned_snapshot)
+enriched_dictionary_cache = {}              # enriched data dictionary and its hash indexes, keyed by snapshot generation (see get_enriched_dictionary)
+enriched_dictionary_lock = threading.Lock() # builds the enriched data dictionary once per generation across QC threads
+messenger_metadata_cache = {}               # redcap version, project titles and users of the messenger, keyed by snapshot generation (see get_messenger_metadata)
+messenger_metadata_lock = threading.Lock()  # loads the messenger metadata once per generation across QC threads
+qc_job_queue = None                         # bounded queue of QC jobs waiting for a worker thread (see start_qc_workers)
+qc_worker_threads = []                      # worker threads running the queued QC jobs
+qc_queue_metrics = {'enqueued': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'running': 0, 'max_depth': 0, 'coalesced': 0, 'slo_breaches': 0, 'sweep_yields': 0, 'shed': 0, 'deferred': 0, 'burst_retries': 0}  # counters of the QC queue since the app started
+qc_quiet_window = 0                         # seconds without a new trigger before a burst of triggers for the same record is run as one QC job (0 runs every trigger, see start_qc_coalescer)
+qc_coalesce_max_wait = 60                   # seconds a burst is held at most, so a record saved continuously is still checked
+qc_max_pending_bursts = 1000                # bursts held at most, triggers for another record are rejected like a full QC queue beyond it
+qc_pending_bursts = {}                      # triggers waiting for their quiet window, keyed by (project_id, pk, event_id, instance)
+qc_pending_lock = threading.Lock()          # guards qc_pending_bursts across request threads and the coalescer
+ingest_seen_ids = collections.OrderedDict() # most recently received (log table, log_event_id) pairs, oldest first (see accept_log_event)
+ingest_seen_limit = 100_000                 # number of log_event_ids kept in ingest_seen_ids
+ingest_floors = {}                          # per log table, the highest log_event_id evicted from ingest_seen_ids, triggers at or below it are dropped as replays
+ingest_seen_loaded = False                  # True once the log_event_ids persisted by earlier runs were loaded into ingest_seen_ids
+ingest_seen_path = fr"{rootdir}\\stored_data\\ingest_seen.json"  # most recent log_event_ids and floor per log table, persisted so retries are still dropped after a restart
+ingest_persisted_limit = 10_000             # number of log_event_ids per log table kept in ingest_seen_path
+ingest_seen_flush_seconds = 1               # seconds between background writes of ingest_seen_path
+ingest_seen_dirty = False                   # True if log_event_ids were recorded since ingest_seen_path was last written
+ingest_flusher_started = False              # True once the background writer of ingest_seen_path runs (see run_ingest_seen_flusher)
+ingest_lock = threading.Lock()              # guards the seen-set and floors across request threads
+ingest_flush_lock = threading.Lock()        # one write of ingest_seen_path at a time per process
+journal_enabled = False                     # records accepted triggers in the on-disk journal before they are acknowledged (see start_ingest_journal)
+journal_dir = fr"{rootdir}\\stored_data\\journal"  # append-only NDJSON segment files of the ingest journal
+journal_segment_records = 5000              # records written to a journal segment before a new one is started
+journal_segment = None                      # open journal segment, formatted as `{'name': str, 'file': file, 'records': int}`
+journal_pending = {}                        # ids of journaled events not yet processed, keyed by segment name
+journal_run = f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}p{os.getpid()}"  # prefix of the journal ids and segments of this process, so ids of other runs never collide
+journal_run_lock_file = None                # lock file held by this process while it runs, so other processes do not replay its live segments
+journal_next_id = 0                         # counter of the journal ids of this process
+journal_written = 0                         # number of the last record written to the open segment
+journal_synced = 0                          # number of the last record flushed to disk (one fsync covers every record written before it)
+journal_lock = threading.Lock()             # guards writes to the journal segments
+journal_sync_lock = threading.Lock()        # one fsync at a time, writers waiting for it are covered by the next fsync
+trigger_capture_mode = 'http'               # 'http' posts each log event from the trigger, 'outbox' only inserts it into the outbox table (see drain_log_outbox)
+log_outbox_table = 'redcom_log_outbox'      # mariaDB table the log event triggers write to in outbox mode
+log_outbox_lock_path = fr"{rootdir}\\stored_data\\outbox.lock"  # lock file that lets one worker process at a time drain the outbox
+log_outbox_lock = threading.Lock()          # one outbox drain at a time per process
+log_event_fields = ['log_event_id', 'project_id', 'ts', 'user', 'ip', 'page', 'event', 'object_type', 'sql_log', 'pk', 'event_id', 'data_values', 'description', 'legacy', 'change_reason']  # redcap_log_event columns sent to QC
+qc_queue_metrics_lock = threading.Lock()    # guards qc_queue_metrics across request and worker threads
+qc_priority_realtime = 0                    # priority of QC jobs for triggered data entries (run first)
+qc_priority_sweep = 1                       # priority of QC jobs that are part of the routine sweep
+qc_job_sequence = itertools.count()         # arrival order of QC jobs, so jobs of the same priority run first in, first out
+qc_realtime_active = 0                      # real-time QC jobs queued or running, the sweep yields while there are any
+qc_realtime_running = 0                     # real-time QC jobs running in a worker thread, replayed batches yield while there are any
+qc_realtime_dir = fr"{rootdir}\\stored_data\\realtime"  # marker files of the worker processes with real-time QC in flight, so a sweep in any process yields to them
+qc_realtime_marked = False                  # True while this process has its marker file in qc_realtime_dir
+qc_realtime_marker_lock = threading.Lock()  # guards the marker file of this process
+qc_realtime_live_file = None                # lock file held by this process while it runs, so markers of stopped processes are ignored
+qc_realtime_idle = threading.Condition(qc_queue_metrics_lock)  # notified when the last real-time QC job finishes
+qc_realtime_slo_seconds = 120               # target seconds from a trigger being queued to its QC finishing, slower jobs are logged
+qc_realtime_latencies = collections.deque(maxlen=500)  # seconds from queued to finished of the latest real-time QC jobs
+single_flight_root = fr"{rootdir}\\stored_data\\jobs"  # lock files and status records of the long jobs (see run_single_flight)
+single_flight_lock = threading.Lock()       # guards the start of long jobs across request threads
+single_flight_local = threading.local()     # name of the long job run by the current thread (see report_progress)
+single_flight_progress_seconds = 5          # minimum seconds between writes of the progress of a long job
+qc_admission_enabled = False                # sheds or defers triggers while the app is overloaded (see start_qc_admission)
+qc_admission_queue_ratio = 0.8              # share of the QC queue capacity above which new triggers are not queued
+qc_admission_max_memory_mb = 0              # resident memory of the app in MB above which new triggers are not queued (0 or without psutil to not check)
+qc_admission_max_db_ratio = 0.9             # share of the mariaDB max_connections in use above which new triggers are not queued
+qc_admission_retry_after = 30               # seconds a shed trigger is asked to wait before it is sent again
+qc_admission_check_seconds = 5              # seconds between checks of the mariaDB connections and drains of the deferred triggers
+qc_admission_db_ratio = 0                   # share of the mariaDB max_connections in use at the last check
+qc_deferred_jobs = collections.deque()      # journaled triggers accepted while overloaded, queued once the app has recovered (see defer_qc_submission)
+qc_deferred_limit = 10000                   # deferred triggers kept in memory at most, triggers beyond it are spilled to disk or shed (see defer_qc_submission)
+qc_deferred_spill_path = os.path.join(journal_dir, f'deferred-{journal_run}.ndjson')  # deferred triggers beyond qc_deferred_limit, for senders that cannot retry
+qc_deferred_spilled = 0                     # number of deferred triggers waiting in the spill file
+qc_deferred_spill_lock = threading.Lock()   # guards the spill file of the deferred triggers
+qc_sweep_yield_share = 0.5                  # share of its running time the sweep may spend waiting for real-time QC, so it still finishes under constant triggers
+qc_sweep_max_yield = 60                     # seconds of waiting the sweep may save up while real-time QC is quiet (the most it waits at one field or form)
+qc_sweep_yield_local = threading.local()    # yield budget of the sweep or replayed batch run by the current thread (see yield_to_realtime_qc)
+sqlite_mirror_enabled = False               # runs DRW and provenance lookups against the local SQLite mirror instead of mariaDB (see start_sqlite_mirror)
+sqlite_mirror_sync_seconds = 30             # seconds between the background syncs of new rows into the mirror
+sqlite_mirror_full_sync_seconds = 900       # seconds between the background full syncs, which pick up rows changed in place (e.g. closed queries)
+sqlite_mirror_lock_path = fr"{rootdir}\\stored_data\\qc_mirror.lock"  # lock file that lets one worker process at a time sync the mirror
+sqlite_mirror_path = fr"{rootdir}\\stored_data\\qc_mirror.sqlite"  # location of the local SQLite mirror
+sqlite_mirror_lock = threading.Lock()       # one mirror sync at a time per process (SQLite serializes writers across processes)
+sqlite_mirror_tables = {                    # mariaDB tables kept in the SQLite mirror and the increasing key used as their high-water mark
+    'redcap_data_quality_status': 'status_id',
+    'redcap_data_quality_resolutions': 'res_id',
+}
+sqlite_mirror_indexes = [                   # indexes of the SQLite mirror used by the QC lookups
+    'CREATE INDEX IF NOT EXISTS dq_status_lookup ON redcap_data_quality_status (project_id, event_id, field_name, instance, record)',
+    'CREATE INDEX IF NOT EXISTS dq_resolutions_status ON redcap_data_quality_resolutions (status_id, response)',
+]
+enriched_dictionary_indexes = {             # hash indexes over the enriched data dictionary, keyed by index name
+    'project_form': ['project_id', 'form_name'],
+    'project_event_form': ['project_id', 'event_id', 'form_name'],
+    'project_field': ['project_id', 'field_name'],
+}
+snapshot_schemas = {                        # column dtypes kept by the stored_data snapshots, keyed by file name
+    'data_dic': {'project_id': 'int64', 'field_order': 'float64', 'field_name': 'str', 'form_name': 'str'},
+    'user_roles': {'role_id': 'int64', 'project_id': 'int64', 'permission': 'float64', 'role_name': 'str', 'form_name': 'str'},
+    'redcap_projects': {'project_id': 'int64', 'data_resolution_enabled': 'int64', 'log_event_table': 'str', 'data_table': 'str'},
+    'completed_users': {'project_id': 'int64', 'record': 'str'},
+}
+
 def read_log_file(logfile: str) -> str:
     """
     For use in the Flask app, reads the last 10 lines of the log file and returns them as HTML.
@@ -315,6 +470,378 @@ def retrieve_database_table(table_names: list) -> dict:
     conn.close()
     return tables
 
+def create_qc_context(name: str) -> dict:
+    """
+    Creates the memoization context of one QC run or sweep. Every table and derived frame requested through it is loaded once and reused for the rest of the run.
+    Frames in the context are shared, so callers must not modify them in place.
+
+    Args:
+        name (str): The name of the run, used when logging the context
+
+    Returns:
+        dict: The context, formatted as follows: `{'name': str, 'frames': dict, 'hits': int, 'misses': int}`
+    """
+    return {'name': name, 'frames': {}, 'hits': 0, 'misses': 0}
+
+def qc_context_get(qc_context: dict | None, key, loader):
+    """
+    Returns the frame stored under a key of the QC context, loading it on the first request.
+
+    Args:
+        qc_context (dict | None): The context of the run (see `create_qc_context`), or None to always load the frame
+        key: The hashable key identifying the source of the frame
+        loader (callable): The function that loads the frame
+
+    Returns:
+        The memoized frame
+    """
+    if qc_context is None:
+        return loader()
+
+    if key in qc_context['frames']:
+        qc_context['hits'] += 1
+    else:
+        qc_context['misses'] += 1
+        qc_context['frames'][key] = loader()
+    return qc_context['frames'][key]
+
+def qc_context_table(qc_context: dict | None, table_name: str) -> pd.DataFrame:
+    """
+    Returns a mariaDB table through the QC context, so each table is downloaded once per run.
+
+    Args:
+        qc_context (dict | None): The context of the run (see `create_qc_context`)
+        table_name (str): The name of the table
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the table
+    """
+    return qc_context_get(qc_context, ('table', table_name), lambda: retrieve_database_table([table_name])[table_name])
+
+def log_qc_context(qc_context: dict) -> None:
+    """
+    Logs the hit and miss counters of a QC context.
+
+    Args:
+        qc_context (dict): The context of the run (see `create_qc_context`)
+
+    Returns:
+        None
+    """
+    logging.info(f"QC context {qc_context['name']}: {qc_context['hits']} hits, {qc_context['misses']} misses ({len(qc_context['frames'])} sources loaded).")
+    return None
+
+def get_current_generation() -> str | None:
+    """
+    Retrieves the name of the published snapshot generation from the CURRENT pointer file.
+
+    Returns:
+        str | None: The name of the published generation, or None if no generation has been published yet
+    """
+    pointer_path = os.path.join(snapshot_root, 'CURRENT')
+    if not os.path.exists(pointer_path):
+        return None
+    with open(pointer_path, 'r') as file:
+        generation = file.read().strip()
+    return generation or None
+
+def get_snapshot_dir() -> str:
+    """
+    Retrieves the directory of the snapshot generation pinned by the current thread, or of the published generation if none is pinned.
+    Falls back to the stored_data folder itself until the first generation is published.
+
+    Returns:
+        str: The directory to read and write the snapshots in
+    """
+    generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
+    if generation is None:
+        return f'{rootdir}\\stored_data'
+    return os.path.join(snapshot_root, generation)
+
+@contextlib.contextmanager
+def pinned_snapshot(generation: str = None):
+    """
+    Pins a snapshot generation for the current thread, so every snapshot read inside the block comes from the same generation
+    and the generation is not removed while the block runs. Nested blocks keep the outer generation unless one is given.
+    While a process pins a generation, it holds a locked pin file in the generation directory, so a refresh in another worker process keeps it too.
+    Can also be used as a function decorator (`@pinned_snapshot()`).
+
+    Args:
+        generation (str, optional): The generation to pin (default is the pinned generation of the thread, else the published generation)
+
+    Yields:
+        str | None: The pinned generation
+    """
+    previous_generation = getattr(snapshot_local, 'generation', None)
+    with snapshot_pins_lock:
+        if generation is None:
+            generation = previous_generation or get_current_generation()
+        if generation is not None:
+            snapshot_pins[generation] = snapshot_pins.get(generation, 0) + 1
+            if snapshot_pins[generation] == 1:
+                pin_file = open(os.path.join(snapshot_root, generation, f'pin-{os.getpid()}.lock'), 'a+')
+                try_lock_file(pin_file)
+                snapshot_pin_files[generation] = pin_file
+    snapshot_local.generation = generation
+    try:
+        yield generation
+    finally:
+        snapshot_local.generation = previous_generation
+        if generation is not None:
+            with snapshot_pins_lock:
+                snapshot_pins[generation] -= 1
+                if snapshot_pins[generation] == 0:
+                    del snapshot_pins[generation]
+                    release_snapshot_pin_file(generation)
+
+def release_snapshot_pin_file(generation: str) -> None:
+    """
+    Unlocks and removes the pin file of this process in a snapshot generation. Must be called while holding `snapshot_pins_lock`.
+
+    Args:
+        generation (str): The name of the generation
+
+    Returns:
+        None
+    """
+    pin_file = snapshot_pin_files.pop(generation, None)
+    if pin_file is None:
+        return None
+    unlock_file(pin_file)
+    pin_file.close()
+    try:
+        os.remove(pin_file.name)
+    except OSError:
+        pass
+    return None
+
+def is_pinned_by_other_process(generation: str) -> bool:
+    """
+    Checks whether another worker process holds a pin file in a snapshot generation. Pin files left by stopped processes are not locked and do not count.
+
+    Args:
+        generation (str): The name of the generation
+
+    Returns:
+        bool: True if a live process pins the generation
+    """
+    generation_dir = os.path.join(snapshot_root, generation)
+    try:
+        pin_names = [name for name in os.listdir(generation_dir) if name.startswith('pin-') and name.endswith('.lock')]
+    except OSError:
+        return False
+    for pin_name in pin_names:
+        with open(os.path.join(generation_dir, pin_name), 'a+') as pin_file:
+            if not try_lock_file(pin_file):
+                return True
+            unlock_file(pin_file)
+    return False
+
+def create_snapshot_generation() -> str:
+    """
+    Creates an empty, unpublished snapshot generation directory.
+
+    Returns:
+        str: The name of the new generation
+    """
+    generation = f"gen_{datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d%H%M%S%f')}"
+    os.makedirs(os.path.join(snapshot_root, generation))
+    return generation
+
+def publish_snapshot_generation(generation: str) -> None:
+    """
+    Publishes a snapshot generation by atomically replacing the CURRENT pointer file, so readers see every file of the generation at once.
+
+    Args:
+        generation (str): The name of the generation to publish
+
+    Returns:
+        None
+    """
+    pointer_path = os.path.join(snapshot_root, 'CURRENT')
+    temp_path = f'{pointer_path}.tmp'
+    with open(temp_path, 'w') as file:
+        file.write(generation)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, pointer_path)
+    return None
+
+def collect_snapshot_generations() -> None:
+    """
+    Removes old snapshot generations that are not published, not among the newest `snapshot_keep_generations` and not pinned by a QC run
+    of this or another worker process (see `pinned_snapshot`).
+
+    Returns:
+        None
+    """
+    with snapshot_pins_lock:
+        generations = sorted(name for name in os.listdir(snapshot_root) if name.startswith('gen_'))
+        keep = set(generations[-snapshot_keep_generations:]) | set(snapshot_pins) | {get_current_generation()}
+        for generation in generations:
+            if generation not in keep and not is_pinned_by_other_process(generation):
+                # files still open in another process are left for the next refresh
+                shutil.rmtree(os.path.join(snapshot_root, generation), ignore_errors=True)
+    return None
+
+def apply_snapshot_schema(df: pd.DataFrame, file_path: str) -> pd.DataFrame:
+    """
+    Casts the columns of a snapshot to the dtypes in its schema (see `snapshot_schemas`).
+    Columns missing from the frame are ignored, and text columns keep their missing values.
+
+    Args:
+        df (pd.DataFrame): The snapshot to cast
+        file_path (str): The path of the snapshot, used to look up its schema
+
+    Returns:
+        pd.DataFrame: The snapshot with the schema dtypes applied
+    """
+    schema = snapshot_schemas.get(os.path.splitext(os.path.basename(file_path))[0], {})
+    df = df.copy(deep=False)
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'str':
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+    return df
+
+def write_snapshot(df: pd.DataFrame, file_path: str, csv: bool = True) -> None:
+    """
+    Writes a snapshot to the local storage.
+    A typed Arrow IPC file is written when pyarrow is installed, which every worker process can memory-map without copying,
+    and the CSV file is written next to it for inspection.
+
+    Args:
+        df (pd.DataFrame): The snapshot to write
+        file_path (str): The path of the CSV file to write (the Arrow file uses the same name with a .arrow extension)
+        csv (bool, optional): If False, only the Arrow file is written (used for large derived snapshots, default is True)
+
+    Returns:
+        None
+    """
+    df = apply_snapshot_schema(df, file_path)
+    if csv or pa is None:
+        df.to_csv(file_path, index = False)
+
+    if pa is not None:
+        # object columns of mixed python types cannot be stored in a single Arrow column
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # written under a temporary name so a process never maps a half written file
+        arrow_path = os.path.splitext(file_path)[0] + '.arrow'
+        with pa.OSFile(f'{arrow_path}.tmp', 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f'{arrow_path}.tmp', arrow_path)
+
+    return None
+
+def get_snapshot_source(file_path: str) -> str:
+    """
+    Chooses the file a snapshot is read from: the Arrow file if pyarrow is installed and the file is at least as new as the CSV file 
+    (or there is no CSV file), else the CSV file.
+
+    Args:
+        file_path (str): The path of the CSV file of the snapshot
+
+    Returns:
+        str: The path of the file to read
+    """
+    arrow_path = os.path.splitext(file_path)[0] + '.arrow'
+    if pa is not None and os.path.exists(arrow_path):
+        if not os.path.exists(file_path) or os.stat(arrow_path).st_mtime_ns >= os.stat(file_path).st_mtime_ns:
+            return arrow_path
+    return file_path
+
+def load_snapshot_file(file_path: str) -> pd.DataFrame:
+    """
+    Loads a snapshot from the local storage without the snapshot cache.
+    Arrow files are memory-mapped, so numeric columns stay backed by the shared page cache instead of being copied into every worker process.
+
+    Args:
+        file_path (str): The path of the CSV file of the snapshot
+
+    Returns:
+        pd.DataFrame: The snapshot with its schema dtypes
+    """
+    source_path = get_snapshot_source(file_path)
+    if source_path.endswith('.arrow'):
+        source = pa.memory_map(source_path, 'r') if snapshot_memory_map else pa.OSFile(source_path, 'rb')
+        return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+    return apply_snapshot_schema(pd.read_csv(file_path), file_path)
+
+def read_snapshot(file_path: str) -> pd.DataFrame:
+    """
+    Reads a snapshot from the local storage through the in-process snapshot cache.
+    The file is only loaded again when the snapshot generation or the modification time of the file changes.
+    Loading a file drops the cached frames of generations that are neither published nor pinned (see `evict_old_snapshot_frames`).
+
+    Args:
+        file_path (str): The path of the CSV file of the snapshot
+
+    Returns:
+        pd.DataFrame: A copy of the cached snapshot (copy-on-write from pandas 3.0, deep before), so changes made by the caller never reach the cached frame
+    """
+    cache_key = os.path.abspath(file_path)
+
+    with snapshot_cache_lock:
+        source_path = get_snapshot_source(file_path)
+        modified_time = os.stat(source_path).st_mtime_ns
+        cache_entry = snapshot_cache.get(cache_key)
+        if cache_entry is None or cache_entry['generation'] != snapshot_generation or cache_entry['modified_time'] != modified_time or cache_entry['source_path'] != source_path:
+            cache_entry = {'generation': snapshot_generation, 'modified_time': modified_time, 'source_path': source_path, 'frame': load_snapshot_file(file_path)}
+            snapshot_cache[cache_key] = cache_entry
+            loaded = True
+        else:
+            loaded = False
+
+    if loaded:
+        evict_old_snapshot_frames()
+
+    # with copy-on-write (pandas 3.0) the copy shares the cached buffers until the caller changes it
+    return cache_entry['frame'].copy(deep=not snapshot_copy_on_write)
+
+def evict_old_snapshot_frames() -> None:
+    """
+    Drops the cached frames of snapshot generations that are neither the published generation nor pinned by a QC run of this process.
+    Needed in every worker process, not only the one that refreshed, so the memory maps of old generations are closed and they can be removed.
+
+    Returns:
+        None
+    """
+    with snapshot_pins_lock:
+        live_generations = set(snapshot_pins)
+    live_generations.add(get_current_generation())
+    snapshot_dir = os.path.abspath(snapshot_root)
+
+    with snapshot_cache_lock:
+        for cache_key, cache_entry in list(snapshot_cache.items()):
+            generation_dir = os.path.dirname(os.path.abspath(cache_entry['source_path']))
+            # snapshots read from the stored_data folder itself belong to no generation
+            if os.path.dirname(generation_dir) == snapshot_dir and os.path.basename(generation_dir) not in live_generations:
+                del snapshot_cache[cache_key]
+    return None
+
+def invalidate_snapshots() -> None:
+    """
+    Starts a new snapshot generation so every cached snapshot is parsed again on its next read.
+    The shared categories of compacted frames are dropped too, so they do not keep growing with values that are no longer stored.
+
+    Returns:
+        None
+    """
+    global snapshot_generation
+    with snapshot_cache_lock:
+        snapshot_generation += 1
+        snapshot_cache.clear()
+    with shared_categories_lock:
+        shared_categories.clear()
+    return None
+
 def get_data_dictionary(filter: bool = True) -> pd.DataFrame:
     """
     Retrieves the data dictionary from the redcap_metadata table in the mariaDB server.
@@ -338,20 +865,21 @@ def get_data_dictionary(filter: bool = True) -> pd.DataFrame:
 
 def store_data_dictionary() -> None:
     """
-    Stores the data dictionary locally as a CSV file.
+    Stores the data dictionary locally as a snapshot (CSV file and typed Arrow copy).
 
     Returns:
         None
     """
-    path = f'{rootdir}\\stored_data'
+    path = get_snapshot_dir()
 
     if not os.path.exists(path):
         os.makedirs(path)
 
     data_dictionary = get_data_dictionary(filter=False)
+    # branching logic is matched as a single line
     data_dictionary['branching_logic'] = data_dictionary['branching_logic'].str.replace('\n', ' ')
 
-    data_dictionary.to_csv(f'{path}\\data_dic.csv', index = False)
+    write_snapshot(data_dictionary, f'{path}\\data_dic.csv')
 
     return None
 
@@ -362,8 +890,8 @@ def retrieve_data_dictionary() -> pd.DataFrame:
     Returns:
         pd.DataFrame: A pandas DataFrame containing the filtered data dictionary
     """
-    path = f'{rootdir}\\stored_data'
-    data_dic = pd.read_csv(f'{path}\\data_dic.csv')
+    path = get_snapshot_dir()
+    data_dic = read_snapshot(f'{path}\\data_dic.csv')
 
     return data_dic
 
@@ -380,12 +908,12 @@ def get_user_roles() -> pd.DataFrame:
     return user_roles
 def store_user_roles() -> None:
     """
-    Stores the user roles locally as a CSV file.
+    Stores the user roles locally as a snapshot (CSV file and typed Arrow copy).
     
     Returns:
         None
     """
-    path = f'{rootdir}\\stored_data'
+    path = get_snapshot_dir()
 
     if not os.path.exists(path):
         os.makedirs(path)
@@ -397,7 +925,7 @@ def store_user_roles() -> None:
     df_exploded[["form_name", "permission"]] = df_exploded["data_entry"].str.split(",", expand=True)
     # df_exploded = df_exploded.drop(columns = "data_entry")
 
-    df_exploded.to_csv(f'{path}\\user_roles.csv', index = False)
+    write_snapshot(df_exploded, f'{path}\\user_roles.csv')
 
     return None
 
@@ -409,8 +937,8 @@ def retrieve_user_roles() -> pd.DataFrame:
         pd.DataFrame: A pandas DataFrame containing the user roles
     """
 
-    path = f'{rootdir}\\stored_data'
-    user_roles = pd.read_csv(f'{path}\\user_roles.csv')
+    path = get_snapshot_dir()
+    user_roles = read_snapshot(f'{path}\\user_roles.csv')
 
     return user_roles
 
@@ -428,7 +956,7 @@ def get_user_information() -> pd.DataFrame:
 
 def store_project_data() -> pd.DataFrame:
     """
-    Retrieves redcap_projects table from the mariaDB server and stores it locally as a CSV file.
+    Retrieves redcap_projects table from the mariaDB server and stores it locally as a snapshot (CSV file and typed Arrow copy).
 
     Returns:
         pd.DataFrame: A pandas DataFrame containing the redcap_projects table.
@@ -436,7 +964,7 @@ def store_project_data() -> pd.DataFrame:
     table_data = retrieve_database_table(['redcap_projects'])
     projects = table_data['redcap_projects']
 
-    projects.to_csv('stored_data/redcap_projects.csv', index = False)
+    write_snapshot(projects, os.path.join(get_snapshot_dir(), 'redcap_projects.csv'))
     return projects
 
 def retrieve_project_data() -> pd.DataFrame:
@@ -446,7 +974,7 @@ def retrieve_project_data() -> pd.DataFrame:
     Returns:
         pd.DataFrame: A pandas DataFrame containing the redcap_projects table
     """
-    projects = pd.read_csv('stored_data/redcap_projects.csv')
+    projects = read_snapshot(os.path.join(get_snapshot_dir(), 'redcap_projects.csv'))
 
     return projects
 
@@ -454,22 +982,32 @@ def store_completed_users() -> None:
     """
     Stores the list of users who have completed the study in the local storage. 
     Filters to see if study_complete is 0 or ss_status is 2 or 4.
+    The filter runs on the mariaDB server in one UNION ALL query over every data table, so only the completed records are transferred.
+    Runs as the periodic reconcile of the completed users set (see `add_completed_user`).
 
     Returns:
         None
+
+    Raises:
+        RuntimeError: Raised if the query fails, so the stored completed users are not replaced by an empty list
     """
+    global completed_user_set, completed_user_generation
     projects = retrieve_project_data()
-    data_table_list = list(set(projects['data_table']))
-
-    table_data = retrieve_database_table(data_table_list)
-    merged_table_data = pd.concat(table_data.values())
+    data_table_list = sorted(set(projects['data_table']))
 
-    merged_table_data = merged_table_data[((merged_table_data['field_name'] == 'study_complete') & (merged_table_data['value'] == '0')) | ((merged_table_data['field_name'] == 'ss_status') & ((merged_table_data['value'] == '2') | (merged_table_data['value'] == '4')))].reset_index(drop=True)
+    sql_comm = ' UNION ALL '.join(f"SELECT DISTINCT project_id, record FROM {table_name} WHERE (field_name = 'study_complete' AND value = '0') OR (field_name = 'ss_status' AND value IN ('2', '4'))" for table_name in data_table_list)
+    conn = connect_to_maria()
+    results = execute_maria_cmd(conn, sql_comm)
+    conn.close()
+    if results is None:
+        raise RuntimeError("Completed users could not be retrieved from the data tables.")
 
-    merged_table_data = merged_table_data[['project_id', 'record']]
+    merged_table_data = pd.DataFrame(results, columns=['project_id', 'record'])
 
-    with open(fr'{rootdir}\\stored_data\\completed_users.csv', 'w', newline='') as f:
-        merged_table_data.to_csv(f, index = False)
+    with completed_user_lock:
+        write_snapshot(merged_table_data, os.path.join(get_snapshot_dir(), 'completed_users.csv'))
+        completed_user_set = set(zip(merged_table_data['project_id'].astype(int), merged_table_data['record'].astype(str))) | completed_user_additions
+        completed_user_generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
         
     return None
 
@@ -480,158 +1018,546 @@ def retrieve_completed_users() -> pd.DataFrame:
     Returns:
         pd.DataFrame: A pandas DataFrame containing the list of users who have completed the study
     """
-    completed_users = pd.read_csv(fr'{rootdir}\\stored_data\\completed_users.csv')
+    completed_users = read_snapshot(os.path.join(get_snapshot_dir(), 'completed_users.csv'))
     return completed_users
 
-def refresh_all_stored_data() -> None:
+def check_study_completed(field_name: str, value: str) -> bool:
     """
-    Refreshes all stored data in the stored_data folder.
+    Checks if a redcap_data value marks the study as completed (study_complete is 0 or ss_status is 2 or 4).
+
+    Args:
+        field_name (str): The field name of the value
+        value (str): The value of the field
 
     Returns:
-        None
+        bool: True if the value marks the study as completed, False otherwise
     """
-    path = f'{rootdir}\\stored_data'
-    if not os.path.exists(path):
-        os.makedirs(path)
-    store_data_dictionary()
-    store_project_data()
-    store_completed_users()
-    store_user_roles()
-    logging.info("Stored data refreshed.")
-    return None
+    value = str(value)
+    return (field_name == 'study_complete' and value == '0') or (field_name == 'ss_status' and value in ('2', '4'))
 
-def set_last_checked(filename: str, message: str) -> None:
+@contextlib.contextmanager
+def completed_user_additions_file_lock():
     """
-    Sets the last checked data in the log file.
-
-    Args:
-        filename (str): The name of the file to write the message to.
-        message (str): The message to write to the log file.
+    Holds the lock file of completed_user_additions.csv, so appends of different worker processes do not interleave.
 
-    Returns:
+    Yields:
         None
     """
+    os.makedirs(os.path.dirname(completed_user_additions_path), exist_ok=True)
+    with open(completed_user_additions_path + '.lock', 'a+') as lock_file:
+        while not try_lock_file(lock_file):
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            unlock_file(lock_file)
 
-    with open(filename, 'w') as f:
-        f.write(message)
-    return None
-
-def refresh_log_event_trigger(table_name: str) -> str:
+def read_completed_user_additions() -> set:
     """
-    Refreshes (creates or replaces) a trigger for the log_event table to send data to the Flask server when a new record is created or updated.
+    Reads the completed users appended to completed_user_additions.csv since the last read, by this or any other worker process.
+    Must be called while holding `completed_user_lock`.
+
+    Returns:
+        set: The newly read (project_id, record) pairs
+    """
+    global completed_user_additions_offset
+
+    if not os.path.exists(completed_user_additions_path) or os.path.getsize(completed_user_additions_path) == completed_user_additions_offset:
+        return set()
+    with open(completed_user_additions_path, 'rb') as file:
+        file.seek(completed_user_additions_offset)
+        data = file.read()
+    # a line that is still being appended is read next time
+    data = data[:data.rfind(b'\n') + 1]
+    completed_user_additions_offset += len(data)
+
+    new_additions = set()
+    for line in data.decode('utf-8').splitlines():
+        project_id, _, record = line.partition(',')
+        if project_id.isnumeric() and record:
+            new_additions.add((int(project_id), record))
+    new_additions -= completed_user_additions
+    completed_user_additions.update(new_additions)
+    return new_additions
+
+def get_completed_records(project_id: int) -> set:
+    """
+    Retrieves the records of a project whose users have completed the study from the in-memory completed users set.
+    The set is loaded from the snapshot generation the first time it is used and again after each refresh, together with the completed users 
+    received from the trigger by any worker process (see `add_completed_user`).
 
     Args:
-        table_name (str): The name of the log_event table to create the trigger for.
+        project_id (int): The project_id to retrieve the completed records for
 
     Returns:
-        str: The SQL command to create the trigger for the log_event table.
-    """
-    trigger_name = table_name + "_update"
-    trigger_comm = f'''CREATE OR REPLACE TRIGGER {trigger_name} AFTER INSERT ON {table_name} FOR EACH ROW BEGIN DECLARE rtn_value text DEFAULT ''; '''
-    trigger_comm += f'''SET @json = JSON_OBJECT( 'log_event_id', NEW.log_event_id, 'project_id', NEW.project_id, 'ts', NEW.ts, 'user', NEW.user, 'ip', NEW.ip, 'page', NEW.page, 'event', NEW.event, 'object_type', NEW.object_type, 'sql_log', NEW.sql_log, 'pk', NEW.pk, 'event_id', NEW.event_id, 'data_values', NEW.data_values, 'description', NEW.description, 'legacy', NEW.legacy, 'change_reason', NEW.change_reason); '''
-    trigger_comm += f'''IF (NEW.event IN ('UPDATE', 'INSERT') AND NEW.page IN ('DataEntry/index.php') AND NEW.description not in ('Assign record to Data Access Group')) THEN SELECT http_post('https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria', 'application/json', @json) INTO @rtn_value;  END IF; END; '''
-    return trigger_comm
+        set: The records (as strings) of the users who have completed the study
+    """
+    global completed_user_set, completed_user_generation
+    generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
+    with completed_user_lock:
+        new_additions = read_completed_user_additions()
+        if completed_user_set is None or completed_user_generation != generation:
+            completed_users = retrieve_completed_users()
+            completed_user_set = set(zip(completed_users['project_id'].astype(int), completed_users['record'].astype(str))) | completed_user_additions
+            completed_user_generation = generation
+        else:
+            new_additions -= completed_user_set
+            completed_user_set |= new_additions
+        project_records = {record for pid, record in completed_user_set if pid == int(project_id)}
 
-def refresh_data_table_trigger(table_name: str) -> str:
+    # users completed in another worker process are removed from the cached record matrices of this one
+    for key in new_additions:
+        drop_record_matrix_record(key[0], key[1])
+    return project_records
+
+def add_completed_user(study_complete_entry: dict) -> bool:
     """
-    Refreshes (creates or replaces) a trigger for the data table to send data to the Flask server when a record has completed a study.
+    Adds a record to the completed users set if the redcap_data value sent by the study-complete trigger marks the study as completed.
+    New completed users are appended to completed_user_additions.csv, where other worker processes and later runs of the app pick them up (see `get_completed_records`),
+    and removed from the cached record matrices. The published snapshot is not written to, the data tables hold the user from the next stored data refresh on (see `store_completed_users`).
 
     Args:
-        table_name (str): The name of the log_event table to create the trigger for.
+        study_complete_entry (dict): The redcap_data row sent by the trigger (project_id, event_id, record, field_name, value, instance)
 
     Returns:
-        str: The SQL command to create the trigger for the log_event table.
+        bool: True if the record was newly added to the completed users, False otherwise
     """
-    trigger_name = table_name + "_update"
-    trigger_comm = f'''CREATE OR REPLACE TRIGGER {trigger_name} AFTER INSERT ON {table_name} FOR EACH ROW BEGIN DECLARE rtn_value text DEFAULT ''; '''
-    trigger_comm += f'''SET @json = JSON_OBJECT( 'project_id', NEW.project_id, 'event_id', NEW.event_id, 'record', NEW.record, 'field_name', NEW.field_name, 'value', NEW.value, 'instance', NEW.instance); '''
-    trigger_comm += f'''IF (NEW.field_name IN ('study_complete')) THEN SELECT http_post('https://redcom.hnrc.tufts.edu/flaskApp/study-complete', 'application/json', @json) INTO @rtn_value;  END IF; END; '''
-    return trigger_comm
-					
-def refresh_necessary_log_event_triggers(conn: mariadb.connections.Connection) -> str:
+    if not check_study_completed(study_complete_entry['field_name'], study_complete_entry['value']):
+        return False
+
+    # makes sure the set is loaded before adding to it
+    get_completed_records(study_complete_entry['project_id'])
+    key = (int(study_complete_entry['project_id']), str(study_complete_entry['record']))
+
+    with completed_user_lock:
+        if key in completed_user_set:
+            return False
+        completed_user_set.add(key)
+        completed_user_additions.add(key)
+        with completed_user_additions_file_lock(), open(completed_user_additions_path, 'a', encoding='utf-8') as file:
+            file.write(f"{key[0]},{key[1]}\n")
+
+    drop_record_matrix_record(key[0], key[1])
+    logging.info(f"Record {key[1]} in project {key[0]} added to completed users.")
+    return True
+
+def get_table_fingerprints(conn: mariadb.connections.Connection, table_names: list) -> dict:
     """
-    Refreshes triggers for the log_event tables to send data to the Flask server when a new record is created or updated.
+    Retrieves a cheap fingerprint of each table from information_schema.TABLES (last update time, row estimate, data size and next auto increment value).
+    Tables without an update time (e.g. after a server restart) get no fingerprint, so the snapshots built from them are always reloaded.
 
     Args:
         conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+        table_names (list): The names of the tables to fingerprint
 
     Returns:
-        str: A message indicating the completion of the trigger creation process.
+        dict: A dictionary of type `string: string | None` mapping each table name to its fingerprint
     """
-    cmd = 'SELECT DISTINCT log_event_table FROM redcap_projects;'
-    res = execute_maria_cmd(conn, cmd)
-    tables = []
-    for table_name in range(len(res)):
-        name = list(res[table_name])
-        tables.append(''.join(name))
-    
-    for table in tables:
-        trigger_comm = refresh_log_event_trigger(table)
-        execute_maria_cmd(conn, trigger_comm)
+    fingerprints = {table_name: None for table_name in table_names}
+    placeholders = ', '.join(['?'] * len(table_names))
+    sql_comm = f"SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, DATA_LENGTH, AUTO_INCREMENT FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})"
+    results = execute_maria_cmd(conn, sql_comm, tuple(table_names)) or []
 
-    timestamp = datetime.datetime.now(datetime.timezone.utc)
-    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+    for table_name, update_time, table_rows, data_length, auto_increment in results:
+        if update_time is not None:
+            fingerprints[table_name] = f"{update_time}|{table_rows}|{data_length}|{auto_increment}"
+    return fingerprints
 
-def refresh_necessary_data_table_triggers(conn: mariadb.connections.Connection) -> str:
+def read_refresh_report(generation: str | None) -> dict:
     """
-    Refreshes triggers for the log_event tables to send data to the Flask server when a new record is created or updated.
+    Reads the refresh report (fingerprints, skipped snapshots and durations) recorded with a snapshot generation.
 
     Args:
-        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+        generation (str | None): The name of the generation
 
     Returns:
-        str: A message indicating the completion of the trigger creation process.
+        dict: The refresh report, or an empty dictionary if the generation has none
     """
-    cmd = 'SELECT DISTINCT data_table FROM redcap_projects;'
-    res = execute_maria_cmd(conn, cmd)
-    tables = []
-    for table_name in range(len(res)):
-        name = list(res[table_name])
-        tables.append(''.join(name))
-    
-    for table in tables:
-        trigger_comm = refresh_data_table_trigger(table)
-        execute_maria_cmd(conn, trigger_comm)
-
-    timestamp = datetime.datetime.now(datetime.timezone.utc)
-    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+    if generation is None:
+        return {}
+    report_path = os.path.join(snapshot_root, generation, 'refresh_report.json')
+    if not os.path.exists(report_path):
+        return {}
+    with open(report_path, 'r') as file:
+        return json.load(file)
 
-def drop_log_event_triggers(conn: mariadb.connections.Connection) -> str:
+def reuse_snapshot_files(previous_generation: str | None, generation: str, snapshot_name: str) -> bool:
     """
-    Drops triggers for the log_event tables to stop sending data to the Flask server when a new record is created or updated.
+    Copies the files of an unchanged snapshot (CSV file and Arrow copy, or JSON file) from the previous generation into the new one.
 
     Args:
-        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+        previous_generation (str | None): The name of the generation to copy from
+        generation (str): The name of the generation to copy to
+        snapshot_name (str): The file name of the snapshot without extension (e.g. 'data_dic')
 
     Returns:
-        str: A message indicating the completion of the trigger drop process.
+        bool: True if the snapshot was copied, False if the previous generation does not have it
     """
-    cmd = 'SELECT DISTINCT log_event_table FROM redcap_projects;'
-    res = execute_maria_cmd(conn, cmd)
-    tables = []
-    for table_name in range(len(res)):
-        name = list(res[table_name])
-        tables.append(''.join(name))
-
-    for table in tables:
-        trigger_comm = f'drop trigger if exists {table}_update;'
-        execute_maria_cmd(conn, trigger_comm)
-    
-    timestamp = datetime.datetime.now(datetime.timezone.utc)
-    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+    if previous_generation is None:
+        return False
+    previous_paths = [os.path.join(snapshot_root, previous_generation, f'{snapshot_name}{extension}') for extension in ['.csv', '.arrow', '.json']]
+    previous_paths = [previous_path for previous_path in previous_paths if os.path.exists(previous_path)]
+    if not previous_paths:
+        return False
+    for previous_path in previous_paths:
+        shutil.copy2(previous_path, os.path.join(snapshot_root, generation, os.path.basename(previous_path)))
+    return True
 
-def drop_data_table_triggers(conn: mariadb.connections.Connection) -> str:
+def try_lock_file(lock_file) -> bool:
     """
-    Drops triggers for the log_event tables to stop sending data to the Flask server when a new record is created or updated.
+    Tries to take the exclusive lock of an open lock file without waiting. The lock is held across worker processes until `unlock_file` is called or the file is closed.
 
     Args:
-        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+        lock_file (file): The open lock file
 
     Returns:
-        str: A message indicating the completion of the trigger drop process.
+        bool: True if the lock was taken, False if another process or thread holds it
     """
-    cmd = 'SELECT DISTINCT data_table FROM redcap_projects;'
-    res = execute_maria_cmd(conn, cmd)
+    try:
+        if os.name == 'nt':
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+def unlock_file(lock_file) -> None:
+    """
+    Releases the lock taken with `try_lock_file`.
+
+    Args:
+        lock_file (file): The open lock file
+
+    Returns:
+        None
+    """
+    if os.name == 'nt':
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    return None
+
+@contextlib.contextmanager
+def snapshot_refresh_file_lock():
+    """
+    Holds the snapshot refresh lock file, so only one worker process refreshes and publishes stored data at a time.
+    Other processes wait for the lock and then pick up the published generation through the CURRENT pointer file.
+
+    Yields:
+        None
+    """
+    os.makedirs(snapshot_root, exist_ok=True)
+    with open(os.path.join(snapshot_root, 'refresh.lock'), 'a+') as lock_file:
+        while not try_lock_file(lock_file):
+            time.sleep(1)
+        try:
+            yield
+        finally:
+            unlock_file(lock_file)
+
+def refresh_all_stored_data(force: bool = False, pid_list: list = None) -> None:
+    """
+    Refreshes all stored data in the stored_data folder.
+    The snapshots are written to a new generation that is published in one step once every file is written,
+    so running QC processes keep reading the generation they pinned. Old generations are removed afterwards.
+    Only one worker process refreshes at a time (see `snapshot_refresh_file_lock`). A call that waited for another process's refresh
+    returns without refreshing again once that refresh is published, unless `force` is set or the published generation lacks its provenance projects.
+
+    Besides the stored tables, the generation holds the enriched data dictionary (see `build_enriched_dictionary`), the messenger metadata (see `build_messenger_metadata`) and,
+    if projects are given, their provenance table (see `get_provenance_table`), so worker processes do not each rebuild them.
+
+    A snapshot is only reloaded from the mariaDB server if the fingerprint of its source tables changed (see `get_table_fingerprints`),
+    otherwise the files of the previous generation are reused. The fingerprints, skipped snapshots and durations are recorded
+    in the refresh_report.json file of the generation.
+
+    Args:
+        force (bool, optional): If True, reloads every snapshot regardless of the fingerprints (default is False)
+        pid_list (list, optional): The project_ids to store the provenance table for (default is to not store it)
+
+    Returns:
+        None
+    """
+    refresh_start = time.perf_counter()
+    # a refresh published while this one waited for the lock already holds what this one would load
+    call_generation = get_current_generation()
+
+    with snapshot_refresh_lock, snapshot_refresh_file_lock():
+        previous_generation = get_current_generation()
+        previous_report = read_refresh_report(previous_generation)
+        if not force and previous_generation != call_generation and (pid_list is None or set(int(pid) for pid in pid_list) <= set(previous_report.get('provenance_projects', []))):
+            logging.info(f"Stored data was refreshed (generation {previous_generation}) while this refresh waited, not refreshing again.")
+            return None
+
+        # fingerprints are taken under the lock, so they are not older than the generation they are compared with
+        conn = connect_to_maria()
+        project_tables = pd.DataFrame(execute_maria_cmd(conn, 'SELECT project_id, log_event_table, data_table FROM redcap_projects;'), columns=['project_id', 'log_event_table', 'data_table'])
+        data_table_list = sorted(project_tables['data_table'].unique())
+        # the DRW tables change with every submission and are not part of the enriched data dictionary (see check_for_confirmed_correct_fields)
+        event_table_list = ['redcap_events_metadata', 'redcap_events_arms', 'redcap_events_forms', 'redcap_events_repeat']
+
+        # (snapshot file name, store function, source tables) in the order they are refreshed
+        snapshot_sources = [
+            ('data_dic', store_data_dictionary, ['redcap_metadata']),
+            ('redcap_projects', store_project_data, ['redcap_projects']),
+            ('completed_users', store_completed_users, data_table_list),
+            ('user_roles', store_user_roles, ['redcap_user_roles']),
+            ('enriched_dic', store_enriched_dictionary, ['redcap_metadata', 'redcap_projects'] + event_table_list),
+            ('messenger_meta', store_messenger_metadata, ['redcap_history_version', 'redcap_projects', 'redcap_user_information']),
+        ]
+        fingerprint_tables = ['redcap_metadata', 'redcap_projects', 'redcap_user_roles', 'redcap_user_information', 'redcap_history_version'] + event_table_list + data_table_list
+        if pid_list is not None:
+            provenance_projects = sorted(int(pid) for pid in pid_list)
+            project_tables = project_tables[project_tables['project_id'].isin(provenance_projects)]
+            provenance_tables = sorted(set(project_tables['log_event_table']) | set(project_tables['data_table']))
+            fingerprint_tables += [table_name for table_name in provenance_tables if table_name not in fingerprint_tables]
+            # the project list is part of the provenance fingerprint
+            snapshot_sources.append(('provenance', lambda: store_provenance(provenance_projects), ['provenance_projects', 'redcap_metadata', 'redcap_user_information'] + provenance_tables))
+        fingerprints = get_table_fingerprints(conn, fingerprint_tables)
+        conn.close()
+        if pid_list is not None:
+            fingerprints['provenance_projects'] = ','.join(str(pid) for pid in provenance_projects)
+
+        generation = create_snapshot_generation()
+        report = {'generation': generation, 'previous_generation': previous_generation, 'started': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), 'snapshots': {}}
+        try:
+            with pinned_snapshot(generation):
+                for snapshot_name, store_function, source_tables in snapshot_sources:
+                    snapshot_start = time.perf_counter()
+                    source_fingerprint = {table_name: fingerprints[table_name] for table_name in source_tables}
+                    previous_fingerprint = previous_report.get('snapshots', {}).get(snapshot_name, {}).get('fingerprint')
+
+                    unchanged = not force and None not in source_fingerprint.values() and source_fingerprint == previous_fingerprint
+                    skipped = unchanged and reuse_snapshot_files(previous_generation, generation, snapshot_name)
+                    if not skipped:
+                        store_function()
+
+                    report['snapshots'][snapshot_name] = {'fingerprint': source_fingerprint, 'skipped': skipped, 'seconds': round(time.perf_counter() - snapshot_start, 3)}
+
+            if pid_list is not None:
+                report['provenance_projects'] = provenance_projects
+            report['seconds'] = round(time.perf_counter() - refresh_start, 3)
+            with open(os.path.join(snapshot_root, generation, 'refresh_report.json'), 'w') as file:
+                json.dump(report, file, indent=2)
+        except Exception:
+            shutil.rmtree(os.path.join(snapshot_root, generation), ignore_errors=True)
+            raise
+        publish_snapshot_generation(generation)
+        invalidate_snapshots()
+        collect_snapshot_generations()
+
+    skipped_snapshots = [snapshot_name for snapshot_name, snapshot_report in report['snapshots'].items() if snapshot_report['skipped']]
+    logging.info(f"Stored data refreshed (generation {generation}) in {report['seconds']}s, skipped unchanged: {skipped_snapshots}.")
+    return None
+
+def set_last_checked(filename: str, message: str) -> None:
+    """
+    Sets the last checked data in the log file.
+
+    Args:
+        filename (str): The name of the file to write the message to.
+        message (str): The message to write to the log file.
+
+    Returns:
+        None
+    """
+
+    with open(filename, 'w') as f:
+        f.write(message)
+    return None
+
+def refresh_log_event_trigger(table_name: str) -> str:
+    """
+    Refreshes (creates or replaces) a trigger for the log_event table to send data to the Flask server when a new record is created or updated.
+    In outbox mode (see `trigger_capture_mode`), the trigger only records the log_event_id in the outbox table, so REDCap saves never wait on the Flask server.
+
+    Args:
+        table_name (str): The name of the log_event table to create the trigger for.
+
+    Returns:
+        str: The SQL command to create the trigger for the log_event table.
+    """
+    trigger_name = table_name + "_update"
+    if trigger_capture_mode == 'outbox':
+        trigger_comm = f'''CREATE OR REPLACE TRIGGER {trigger_name} AFTER INSERT ON {table_name} FOR EACH ROW BEGIN '''
+        trigger_comm += f'''IF (NEW.event IN ('UPDATE', 'INSERT') AND NEW.page IN ('DataEntry/index.php') AND NEW.description not in ('Assign record to Data Access Group')) THEN INSERT INTO {log_outbox_table} (log_table, log_event_id, project_id) VALUES ('{table_name}', NEW.log_event_id, NEW.project_id);  END IF; END; '''
+        return trigger_comm
+
+    trigger_comm = f'''CREATE OR REPLACE TRIGGER {trigger_name} AFTER INSERT ON {table_name} FOR EACH ROW BEGIN DECLARE rtn_value text DEFAULT ''; '''
+    trigger_comm += f'''SET @json = JSON_OBJECT( 'log_event_id', NEW.log_event_id, 'project_id', NEW.project_id, 'ts', NEW.ts, 'user', NEW.user, 'ip', NEW.ip, 'page', NEW.page, 'event', NEW.event, 'object_type', NEW.object_type, 'sql_log', NEW.sql_log, 'pk', NEW.pk, 'event_id', NEW.event_id, 'data_values', NEW.data_values, 'description', NEW.description, 'legacy', NEW.legacy, 'change_reason', NEW.change_reason); '''
+    trigger_comm += f'''IF (NEW.event IN ('UPDATE', 'INSERT') AND NEW.page IN ('DataEntry/index.php') AND NEW.description not in ('Assign record to Data Access Group')) THEN SELECT http_post('https://redcom.hnrc.tufts.edu/flaskApp/receive-from-maria', 'application/json', @json) INTO @rtn_value;  END IF; END; '''
+    return trigger_comm
+
+def refresh_data_table_trigger(table_name: str, event: str = 'INSERT') -> str:
+    """
+    Refreshes (creates or replaces) a trigger for the data table to send data to the Flask server when a record has completed a study.
+    Both fields that mark a completion (study_complete and ss_status, see `check_study_completed`) are sent, on insert and on update of their value.
+    The JSON is only built for those fields, so other rows of the data table are not slowed down.
+
+    Args:
+        table_name (str): The name of the data table to create the trigger for.
+        event (str, optional): 'INSERT' or 'UPDATE' (default is 'INSERT')
+
+    Returns:
+        str: The SQL command to create the trigger for the data table.
+    """
+    trigger_name = table_name + ("_update" if event == 'INSERT' else "_value_update")
+    trigger_comm = f'''CREATE OR REPLACE TRIGGER {trigger_name} AFTER {event} ON {table_name} FOR EACH ROW BEGIN DECLARE rtn_value text DEFAULT ''; '''
+    trigger_comm += f'''IF (NEW.field_name IN ('study_complete', 'ss_status')) THEN '''
+    trigger_comm += f'''SET @json = JSON_OBJECT( 'project_id', NEW.project_id, 'event_id', NEW.event_id, 'record', NEW.record, 'field_name', NEW.field_name, 'value', NEW.value, 'instance', NEW.instance); '''
+    trigger_comm += f'''SELECT http_post('https://redcom.hnrc.tufts.edu/flaskApp/study-complete', 'application/json', @json) INTO @rtn_value;  END IF; END; '''
+    return trigger_comm
+					
+def create_log_outbox(conn: mariadb.connections.Connection) -> None:
+    """
+    Creates the outbox table the log_event triggers write to in outbox mode, if it does not exist.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        None
+    """
+    execute_maria_cmd(conn, f'''CREATE TABLE IF NOT EXISTS {log_outbox_table} (
+        outbox_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        log_table VARCHAR(64) NOT NULL,
+        log_event_id BIGINT NOT NULL,
+        project_id INT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)''')
+    return None
+
+def hash_trigger_definition(timing: str, event: str, table_name: str, body: str) -> str:
+    """
+    Hashes a trigger definition with its whitespace and trailing semicolon normalized, so the generated and installed definitions can be compared.
+
+    Args:
+        timing (str): The action timing of the trigger (e.g. 'AFTER')
+        event (str): The event of the trigger (e.g. 'INSERT')
+        table_name (str): The table the trigger is on
+        body (str): The statement the trigger runs for each row
+
+    Returns:
+        str: The sha256 hex digest of the definition
+    """
+    body = ' '.join(body.split()).rstrip(';').strip()
+    definition = f"{timing.upper()} {event.upper()} {table_name.lower()} {body}"
+    return hashlib.sha256(definition.encode('utf-8')).hexdigest()
+
+def get_installed_trigger_hashes(conn: mariadb.connections.Connection) -> dict:
+    """
+    Retrieves the definitions of the triggers installed in the current database from information_schema.TRIGGERS.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        dict: The hash of each installed trigger (see `hash_trigger_definition`), keyed by trigger name
+    """
+    res = execute_maria_cmd(conn, "SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, EVENT_OBJECT_TABLE, ACTION_STATEMENT FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE();") or []
+    return {trigger_name: hash_trigger_definition(timing, event, table_name, body) for trigger_name, timing, event, table_name, body in res}
+
+def refresh_changed_triggers(conn: mariadb.connections.Connection, trigger_comms: list) -> dict:
+    """
+    Creates the triggers that are missing and replaces the ones whose installed definition differs from the generated one.
+    Unchanged triggers are left alone, so the hot REDCap tables are not locked to replace them.
+    The installed definitions are read again afterwards, so a trigger whose command failed is reported as failed rather than created or replaced.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+        trigger_comms (list): The generated `CREATE OR REPLACE TRIGGER` commands (see `refresh_log_event_trigger`)
+
+    Returns:
+        dict: The trigger names by outcome, formatted as follows: `{'created': [...], 'replaced': [...], 'unchanged': [...], 'failed': [...]}`
+    """
+    installed_hashes = get_installed_trigger_hashes(conn)
+    report = {'created': [], 'replaced': [], 'unchanged': [], 'failed': []}
+
+    # execute_maria_cmd logs and swallows errors, so the changed triggers are checked against the installed definitions afterwards
+    changed_triggers = []
+    for trigger_comm in trigger_comms:
+        trigger_name, timing, event, table_name, body = re.match(r"CREATE OR REPLACE TRIGGER (\S+) (BEFORE|AFTER) (INSERT|UPDATE|DELETE) ON (\S+) FOR EACH ROW (.*)", trigger_comm, re.DOTALL).groups()
+        installed_hash = installed_hashes.get(trigger_name)
+        generated_hash = hash_trigger_definition(timing, event, table_name, body)
+        if installed_hash == generated_hash:
+            report['unchanged'].append(trigger_name)
+            continue
+        execute_maria_cmd(conn, trigger_comm)
+        changed_triggers.append((trigger_name, installed_hash, generated_hash))
+
+    if changed_triggers:
+        installed_hashes = get_installed_trigger_hashes(conn)
+    for trigger_name, previous_hash, generated_hash in changed_triggers:
+        if installed_hashes.get(trigger_name) != generated_hash:
+            report['failed'].append(trigger_name)
+        else:
+            report['created' if previous_hash is None else 'replaced'].append(trigger_name)
+    if report['failed']:
+        logging.info(f"Triggers could not be created or replaced: {report['failed']}")
+
+    return report
+
+def refresh_necessary_log_event_triggers(conn: mariadb.connections.Connection) -> str:
+    """
+    Refreshes triggers for the log_event tables to send data to the Flask server when a new record is created or updated.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        str: A message indicating the completion of the trigger creation process.
+    """
+    cmd = 'SELECT DISTINCT log_event_table FROM redcap_projects;'
+    res = execute_maria_cmd(conn, cmd)
+    tables = []
+    for table_name in range(len(res)):
+        name = list(res[table_name])
+        tables.append(''.join(name))
+
+    # the outbox table has to exist before the triggers write to it
+    if trigger_capture_mode == 'outbox':
+        create_log_outbox(conn)
+    
+    report = refresh_changed_triggers(conn, [refresh_log_event_trigger(table) for table in tables])
+
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}: log_event triggers created {report['created']}, replaced {report['replaced']}, failed {report['failed']}, {len(report['unchanged'])} unchanged"
+
+def refresh_necessary_data_table_triggers(conn: mariadb.connections.Connection) -> str:
+    """
+    Refreshes triggers for the log_event tables to send data to the Flask server when a new record is created or updated.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        str: A message indicating the completion of the trigger creation process.
+    """
+    cmd = 'SELECT DISTINCT data_table FROM redcap_projects;'
+    res = execute_maria_cmd(conn, cmd)
+    tables = []
+    for table_name in range(len(res)):
+        name = list(res[table_name])
+        tables.append(''.join(name))
+    
+    report = refresh_changed_triggers(conn, [refresh_data_table_trigger(table, event) for table in tables for event in ('INSERT', 'UPDATE')])
+
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}: data triggers created {report['created']}, replaced {report['replaced']}, failed {report['failed']}, {len(report['unchanged'])} unchanged"
+
+def drop_log_event_triggers(conn: mariadb.connections.Connection) -> str:
+    """
+    Drops triggers for the log_event tables to stop sending data to the Flask server when a new record is created or updated.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        str: A message indicating the completion of the trigger drop process.
+    """
+    cmd = 'SELECT DISTINCT log_event_table FROM redcap_projects;'
+    res = execute_maria_cmd(conn, cmd)
     tables = []
     for table_name in range(len(res)):
         name = list(res[table_name])
@@ -644,6 +1570,31 @@ def drop_data_table_triggers(conn: mariadb.connections.Connection) -> str:
     timestamp = datetime.datetime.now(datetime.timezone.utc)
     return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
 
+def drop_data_table_triggers(conn: mariadb.connections.Connection) -> str:
+    """
+    Drops triggers for the log_event tables to stop sending data to the Flask server when a new record is created or updated.
+
+    Args:
+        conn (mariadb.connections.Connection): The active connection to the mariaDB server.
+
+    Returns:
+        str: A message indicating the completion of the trigger drop process.
+    """
+    cmd = 'SELECT DISTINCT data_table FROM redcap_projects;'
+    res = execute_maria_cmd(conn, cmd)
+    tables = []
+    for table_name in range(len(res)):
+        name = list(res[table_name])
+        tables.append(''.join(name))
+
+    for table in tables:
+        for trigger_name in (f'{table}_update', f'{table}_value_update'):
+            trigger_comm = f'drop trigger if exists {trigger_name};'
+            execute_maria_cmd(conn, trigger_comm)
+    
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    return f"Last complete at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+
 def refresh_background_trigger() -> None:
     """
     Official process to refresh triggers for the log_event and data tables (used in multithreading).
@@ -652,8 +1603,8 @@ def refresh_background_trigger() -> None:
         None
     """
     conn = connect_to_maria()
-    refresh_necessary_log_event_triggers(conn)
-    # refresh_necessary_data_table_triggers(conn)
+    logging.info(refresh_necessary_log_event_triggers(conn))
+    logging.info(refresh_necessary_data_table_triggers(conn))
     conn.close()
     return None
 
@@ -668,7 +1619,7 @@ def retrieve_default_reviewer(project_id: int, form_name: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: A pandas DataFrame containing the default assignees for the project
     """
-    default_reviewers = pd.read_csv('stored_data/default_reviewers.csv')
+    default_reviewers = read_snapshot('stored_data/default_reviewers.csv')
     user_roles = retrieve_user_roles()
 
     default_reviewers = default_reviewers[default_reviewers['project_id'] == project_id]
@@ -691,15 +1642,32 @@ def filter_data_table(data_table: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: A pandas DataFrame containing the filtered redcap_data table
     """        
     data_table['instance'] = data_table['instance'].fillna(1).astype(int)
+    data_table = add_numeric_value(data_table)
     data_table['value'] = "'" + data_table['value'].astype(str) + "'"
     data_table = data_table.rename(columns={'record': 'pk'})
-    data_table = data_table[['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value']]
+    data_table = data_table[['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value', 'value_num']]
     data_table = data_table[data_table['pk'].str.isnumeric()]
 
     data_table = data_table.astype({'project_id': int, 'event_id': int, 'pk': int, 'instance': int, 'field_name': str, 'value': str})
 
     return data_table
 
+def add_numeric_value(data_table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds a `value_num` column to a redcap_data table holding the value parsed as a float (NaN if not numeric).
+    Parsing is done once when the table is loaded so later QC steps can reuse it instead of converting the text again.
+
+    Args:
+        data_table (pd.DataFrame): A pandas DataFrame containing a redcap_data table with a raw `value` column
+
+    Returns:
+        pd.DataFrame: The same DataFrame with the `value_num` column added
+    """
+    if 'value_num' not in data_table.columns:
+        data_table['value_num'] = pd.to_numeric(data_table['value'], errors='coerce').astype('float64')
+
+    return data_table
+
 def retrieve_all_data(pid_list: list) -> pd.DataFrame:
     """
     Retrieves all data from the redcap_data tables for a list of project_ids.
@@ -716,7 +1684,7 @@ def retrieve_all_data(pid_list: list) -> pd.DataFrame:
 
     table_data = retrieve_database_table(data_tables)
 
-    unioned_data_table = pd.DataFrame(columns=['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value'])
+    unioned_data_table = pd.DataFrame(columns=['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value', 'value_num'])
     for data_table in range(len(data_tables)):
         # loads relevant data table
 
@@ -725,6 +1693,37 @@ def retrieve_all_data(pid_list: list) -> pd.DataFrame:
 
     return unioned_data_table
 
+def retrieve_complete_field_data(pid_list: list) -> pd.DataFrame:
+    """
+    Retrieves only the form `_complete` fields from the redcap_data tables for a list of project_ids.
+    The project and field filters are pushed down to the mariaDB server so each data table is read once.
+
+    Args:
+        pid_list (list): A list of project_ids to retrieve the data for.
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the `_complete` fields for the projects in the list
+    """
+    project_table = retrieve_project_data()
+    project_table = project_table[project_table['project_id'].isin(pid_list)]
+    data_tables = project_table['data_table'].unique().tolist()
+
+    col_names = ['project_id', 'event_id', 'record', 'field_name', 'value', 'instance']
+    pid_input = tuple(int(pid) for pid in pid_list)
+    num_qs = ('?, ' * len(pid_input))[:-2]
+
+    conn = connect_to_maria()
+    complete_tables = []
+    for data_table in data_tables:
+        sql_comm = f"SELECT {', '.join(col_names)} FROM {data_table} WHERE project_id IN ({num_qs}) AND field_name LIKE '%\\_complete%'"
+        results = execute_maria_cmd(conn, sql_comm, pid_input)
+        complete_tables.append(filter_data_table(pd.DataFrame(results, columns = col_names)))
+    conn.close()
+
+    if len(complete_tables) == 0:
+        return pd.DataFrame(columns=['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value', 'value_num'])
+    return pd.concat(complete_tables, ignore_index=True)
+
 def get_log_event_and_data_tables(project_id: int) -> tuple[list, list]:
     """
     Retrieves the log_event and data table from the redcap_projects table.
@@ -744,49 +1743,325 @@ def get_log_event_and_data_tables(project_id: int) -> tuple[list, list]:
 
     return log_list, data_list
 
-def check_for_confirmed_correct_fields(data_dictionary: pd.DataFrame) -> pd.DataFrame:
+def connect_to_sqlite_mirror() -> sqlite3.Connection:
     """
-    Checks the data dictionary for fields that have been confirmed correct in the redcap_data_quality_status and redcap_data_quality_resolutions tables.
-    Removes these fields from the data dictionary so they cannot be flagged as missing data. 
+    Opens a connection to the local SQLite mirror in write-ahead logging mode, so readers are not blocked while it syncs.
+
+    Returns:
+        sqlite3.Connection: A connection to the SQLite mirror
+    """
+    lite_conn = sqlite3.connect(sqlite_mirror_path, timeout=30)
+    lite_conn.execute('PRAGMA journal_mode=WAL')
+    return lite_conn
+
+def to_sqlite_value(value):
+    """
+    Converts a value returned by mariaDB to a type SQLite can store.
 
     Args:
-        data_dictionary (pd.DataFrame): A pandas DataFrame containing the data dictionary
+        value: The value to convert
 
     Returns:
-        pd.DataFrame: A pandas DataFrame containing the data dictionary with fields that have been confirmed correct removed
+        The value as an int, float, str, bytes or None
     """
-    table_data = retrieve_database_table(['redcap_data_quality_status', 'redcap_data_quality_resolutions'])
-
-    dq_status = table_data['redcap_data_quality_status']
-    dq_resolutions = table_data['redcap_data_quality_resolutions']
-    dq_status[['record', 'event_id', 'assigned_user_id']] = dq_status[['record', 'event_id', 'assigned_user_id']].apply(pd.to_numeric, errors='coerce')
-    dq_resolutions[['res_id', 'status_id', 'user_id']] = dq_resolutions[['res_id', 'status_id', 'user_id']].apply(pd.to_numeric, errors='coerce')
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.timedelta)):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
 
-    dq_total = dq_status.merge(dq_resolutions, on = 'status_id')
-    dq_total = dq_total[dq_total['response'] == 'CONFIRMED_CORRECT']
+def sync_sqlite_mirror(full: bool = False) -> None:
+    """
+    Copies the rows of the mirrored mariaDB tables (see `sqlite_mirror_tables`) whose key is above the high-water mark of the local SQLite mirror.
+    New rows are picked up incrementally. Rows changed in place (e.g. closed queries) are picked up by a full sync. Both run in the background (see `start_sqlite_mirror`).
+    DRW entries recorded by `record_drw_submission` before the sync started are covered by the synced rows, so they are removed.
 
-    dq_total = dq_total[['project_id', 'event_id', 'field_name']].drop_duplicates()
+    Args:
+        full (bool, optional): If True, reloads the mirrored tables completely (default is False)
 
-    data_dictionary = data_dictionary.merge(dq_total, on=['project_id', 'event_id', 'field_name'], how='left', indicator=True)
-    data_dictionary = data_dictionary[data_dictionary['_merge'] == 'left_only'].drop('_merge', axis=1)
+    Returns:
+        None
+    """
+    maria_conn = connect_to_maria()
+    table_cols = get_colnames(maria_conn, list(sqlite_mirror_tables.keys()))
+    sync_start = time.time()
 
-    return data_dictionary
+    with sqlite_mirror_lock:
+        lite_conn = connect_to_sqlite_mirror()
+        try:
+            lite_conn.execute("CREATE TABLE IF NOT EXISTS drw_submitted (project_id, event_id, field_name, instance, record, assigned_user_id, submitted)")
+            lite_conn.execute("DELETE FROM drw_submitted WHERE submitted < ?", (sync_start,))
+            for table_name, key_column in sqlite_mirror_tables.items():
+                column_list = ', '.join(table_cols[table_name])
+                lite_conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({column_list}, PRIMARY KEY ({key_column}))")
+                if full:
+                    lite_conn.execute(f"DELETE FROM {table_name}")
+
+                high_water_mark = lite_conn.execute(f"SELECT COALESCE(MAX({key_column}), 0) FROM {table_name}").fetchone()[0]
+                rows = execute_maria_cmd(maria_conn, f"SELECT {column_list} FROM {table_name} WHERE {key_column} > ? ORDER BY {key_column}", (high_water_mark,)) or []
+
+                num_qs = ('?, ' * len(table_cols[table_name]))[:-2]
+                lite_conn.executemany(f"INSERT OR REPLACE INTO {table_name} ({column_list}) VALUES ({num_qs})", [tuple(to_sqlite_value(value) for value in row) for row in rows])
+
+            for sql_comm in sqlite_mirror_indexes:
+                lite_conn.execute(sql_comm)
+            lite_conn.commit()
+        finally:
+            lite_conn.close()
+
+    maria_conn.close()
+    return None
 
-def get_drw_table() -> pd.DataFrame:
+def record_drw_submission(project_id: int, event_id: int, hnrcid: int, field_name: str, assigned_user_id: int, repeat_instance: int) -> None:
     """
-    Retrieves redcap_data_quality_resolutions and redcap_data_quality_status tables and joins them
+    Records a DRW entry just created in mariaDB in the SQLite mirror, so the duplicate check (see `check_existing_drw_entry`) sees it before the next background sync.
+
+    Args:
+        project_id (int): The project_id of the DRW entry
+        event_id (int): The event_id of the DRW entry
+        hnrcid (int): The record of the DRW entry
+        field_name (str): The field_name of the DRW entry
+        assigned_user_id (int): The user_id the DRW entry is assigned to
+        repeat_instance (int): The repeat_instance of the DRW entry
 
     Returns:
-        pd.DataFrame: A pandas DataFrame containing the merged redcap_data_quality_resolutions and redcap_data_quality_status tables
+        None
     """
-    table_data = retrieve_database_table(['redcap_data_quality_status', 'redcap_data_quality_resolutions'])
+    lite_conn = connect_to_sqlite_mirror()
+    try:
+        lite_conn.execute("INSERT INTO drw_submitted (project_id, event_id, field_name, instance, record, assigned_user_id, submitted) VALUES (?, ?, ?, ?, ?, ?, ?)", 
+                          (int(project_id), int(event_id), field_name, int(repeat_instance), int(hnrcid), int(assigned_user_id), time.time()))
+        lite_conn.commit()
+    finally:
+        lite_conn.close()
+    return None
 
-    dq_status = table_data['redcap_data_quality_status']
-    dq_resolutions = table_data['redcap_data_quality_resolutions']
-    dq_status[['record', 'event_id', 'assigned_user_id']] = dq_status[['record', 'event_id', 'assigned_user_id']].apply(pd.to_numeric, errors='coerce')
-    dq_resolutions[['res_id', 'status_id', 'user_id']] = dq_resolutions[['res_id', 'status_id', 'user_id']].apply(pd.to_numeric, errors='coerce')
+def run_sqlite_mirror_sync() -> None:
+    """
+    Syncs new rows into the SQLite mirror every `sqlite_mirror_sync_seconds` and runs a full sync every `sqlite_mirror_full_sync_seconds`, 
+    so QC lookups never wait for mariaDB. Only one worker process syncs at a time, the others read the synced mirror.
+    Runs in its own thread (see `start_sqlite_mirror`).
 
-    dq_total = dq_status.merge(dq_resolutions, on = 'status_id')
+    Returns:
+        None
+    """
+    last_full_sync = None
+    while True:
+        full = last_full_sync is None or time.monotonic() - last_full_sync >= sqlite_mirror_full_sync_seconds
+        try:
+            with open(sqlite_mirror_lock_path, 'a+') as lock_file:
+                if try_lock_file(lock_file):
+                    try:
+                        sync_sqlite_mirror(full=full)
+                    finally:
+                        unlock_file(lock_file)
+            if full:
+                last_full_sync = time.monotonic()
+        except Exception as e:
+            logging.info(f"Error syncing the SQLite mirror: {e}\n{traceback.format_exc()}")
+        time.sleep(sqlite_mirror_sync_seconds)
+
+def start_sqlite_mirror(sync_seconds: float = 30, full_sync_seconds: float = 900) -> None:
+    """
+    Starts the local SQLite mirror: syncs it once, then keeps it in sync in the background, and runs the DRW and provenance lookups against it.
+    Does nothing if the mirror is already running.
+
+    Args:
+        sync_seconds (float, optional): The seconds between syncs of new rows (default is 30)
+        full_sync_seconds (float, optional): The seconds between full syncs (default is 900)
+
+    Returns:
+        None
+    """
+    global sqlite_mirror_enabled, sqlite_mirror_sync_seconds, sqlite_mirror_full_sync_seconds
+
+    if sqlite_mirror_enabled:
+        return None
+    sqlite_mirror_sync_seconds = sync_seconds
+    sqlite_mirror_full_sync_seconds = full_sync_seconds
+    os.makedirs(os.path.dirname(sqlite_mirror_path), exist_ok=True)
+    # the first sync waits for a sync running in another process, so the mirror tables exist before the lookups use them
+    with open(sqlite_mirror_lock_path, 'a+') as lock_file:
+        while not try_lock_file(lock_file):
+            time.sleep(1)
+        try:
+            sync_sqlite_mirror(full=not os.path.exists(sqlite_mirror_path))
+        finally:
+            unlock_file(lock_file)
+    sqlite_mirror_enabled = True
+    threading.Thread(target=run_sqlite_mirror_sync, name='sqlite-mirror-sync', daemon=True).start()
+    logging.info(f"SQLite mirror started (sync every {sync_seconds}s, full sync every {full_sync_seconds}s).")
+    return None
+
+def query_sqlite_mirror(sql_comm: str, data_input: tuple = ()) -> pd.DataFrame:
+    """
+    Runs a query on the local SQLite mirror.
+
+    Args:
+        sql_comm (str): The SQL query to run
+        data_input (tuple, optional): The values of the query parameters (default is no parameters)
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the query results
+    """
+    lite_conn = connect_to_sqlite_mirror()
+    try:
+        return pd.read_sql_query(sql_comm, lite_conn, params=data_input)
+    finally:
+        lite_conn.close()
+
+def retrieve_dq_tables() -> dict:
+    """
+    Retrieves the redcap_data_quality_status and redcap_data_quality_resolutions tables from the SQLite mirror if it is enabled, otherwise from the mariaDB server.
+
+    Returns:
+        dict: A dictionary of type `string: pandas.DataFrame` in the format of `retrieve_database_table`
+    """
+    if sqlite_mirror_enabled:
+        return {table_name: query_sqlite_mirror(f"SELECT * FROM {table_name}") for table_name in sqlite_mirror_tables}
+    return retrieve_database_table(['redcap_data_quality_status', 'redcap_data_quality_resolutions'])
+
+def load_provenance_into_mirror(provenance: pd.DataFrame, pid_list: list) -> None:
+    """
+    Replaces the provenance table of the SQLite mirror, so `get_entry_of_outlier` and `get_entry_of_missing` can run as indexed queries.
+
+    Args:
+        provenance (pd.DataFrame): The unioned super table of the projects (see `get_unioned_super_table`)
+        pid_list (list): The project_ids the provenance table covers
+
+    Returns:
+        None
+    """
+    category_columns = provenance.columns[provenance.dtypes == 'category']
+    provenance = provenance.astype({column: object for column in category_columns})
+
+    with sqlite_mirror_lock:
+        lite_conn = connect_to_sqlite_mirror()
+        try:
+            provenance.to_sql('provenance', lite_conn, if_exists='replace', index=False)
+            lite_conn.execute("CREATE INDEX IF NOT EXISTS provenance_field_lookup ON provenance (form_name, event_id, field_name, pk, instance)")
+            lite_conn.execute("CREATE INDEX IF NOT EXISTS provenance_record_lookup ON provenance (form_name, event_id, pk, instance)")
+            lite_conn.execute("CREATE TABLE IF NOT EXISTS mirror_meta (name PRIMARY KEY, value)")
+            lite_conn.execute("INSERT OR REPLACE INTO mirror_meta (name, value) VALUES ('provenance_projects', ?)", (','.join(str(int(pid)) for pid in sorted(pid_list)),))
+            lite_conn.commit()
+        finally:
+            lite_conn.close()
+    return None
+
+def get_mirror_provenance_projects() -> list:
+    """
+    Retrieves the project_ids covered by the provenance table of the SQLite mirror.
+
+    Returns:
+        list: The project_ids, or an empty list if the mirror is disabled or has no provenance table
+    """
+    if not sqlite_mirror_enabled or not os.path.exists(sqlite_mirror_path):
+        return []
+    try:
+        meta = query_sqlite_mirror("SELECT value FROM mirror_meta WHERE name = 'provenance_projects'")
+    except Exception:
+        return []
+    if meta.empty or not meta['value'][0]:
+        return []
+    return [int(pid) for pid in meta['value'][0].split(',')]
+
+def get_entry_from_mirror(event_id: int, hnrcid: int, form_name: str, field_name: str | None, repeat_instance: int) -> tuple[int,str,str] | None:
+    """
+    Finds the data entrist the same way as `get_entry_of_outlier` and `get_entry_of_missing`, with indexed queries on the provenance table of the SQLite mirror.
+    Each filter is only kept if rows are left after it, and the user with the most entries is returned.
+
+    Args:
+        event_id (int): The event_id of the data entry
+        hnrcid (int): The hnrcid of the data entry
+        form_name (str): The form_name of the data entry
+        field_name (str | None): The field_name of the data entry (None skips the field filter)
+        repeat_instance (int): The repeat_instance of the data entry
+
+    Returns:
+        tuple[int,str,str] | None: A tuple containing the user_id, username, and email of the data entrist, or None if there are no entries
+    """
+    filters = [('form_name', form_name), ('event_id', int(event_id)), ('field_name', field_name), ('pk', int(hnrcid)), ('instance', int(repeat_instance))]
+    conditions = []
+    data_input = []
+
+    lite_conn = connect_to_sqlite_mirror()
+    try:
+        for column, value in filters:
+            if value is None:
+                continue
+            if lite_conn.execute(f"SELECT 1 FROM provenance WHERE {' AND '.join(conditions + [f'{column} = ?'])} LIMIT 1", tuple(data_input + [value])).fetchone() is not None:
+                conditions.append(f'{column} = ?')
+                data_input.append(value)
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        entry = lite_conn.execute(f"SELECT ui_id, user, user_email FROM provenance {where_clause} GROUP BY ui_id, user, user_email ORDER BY COUNT(*) DESC, MIN(rowid) LIMIT 1", tuple(data_input)).fetchone()
+    finally:
+        lite_conn.close()
+
+    if entry is None:
+        return None
+    return int(entry[0]), str(entry[1]), str(entry[2])
+
+def get_confirmed_correct_fields() -> pd.DataFrame:
+    """
+    Retrieves the fields that have been confirmed correct in the redcap_data_quality_status and redcap_data_quality_resolutions tables.
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame with the project_id, event_id and field_name of every field confirmed correct
+    """
+    if sqlite_mirror_enabled:
+        dq_total = query_sqlite_mirror("SELECT DISTINCT s.project_id, s.event_id, s.field_name FROM redcap_data_quality_status s JOIN redcap_data_quality_resolutions r ON r.status_id = s.status_id WHERE r.response = 'CONFIRMED_CORRECT'")
+        dq_total['event_id'] = pd.to_numeric(dq_total['event_id'], errors='coerce')
+    else:
+        table_data = retrieve_database_table(['redcap_data_quality_status', 'redcap_data_quality_resolutions'])
+
+        dq_status = table_data['redcap_data_quality_status']
+        dq_resolutions = table_data['redcap_data_quality_resolutions']
+        dq_status[['record', 'event_id', 'assigned_user_id']] = dq_status[['record', 'event_id', 'assigned_user_id']].apply(pd.to_numeric, errors='coerce')
+        dq_resolutions[['res_id', 'status_id', 'user_id']] = dq_resolutions[['res_id', 'status_id', 'user_id']].apply(pd.to_numeric, errors='coerce')
+
+        dq_total = dq_status.merge(dq_resolutions, on = 'status_id')
+        dq_total = dq_total[dq_total['response'] == 'CONFIRMED_CORRECT']
+
+        dq_total = dq_total[['project_id', 'event_id', 'field_name']].drop_duplicates()
+
+    return dq_total
+
+def check_for_confirmed_correct_fields(data_dictionary: pd.DataFrame, qc_context: dict = None) -> pd.DataFrame:
+    """
+    Checks the data dictionary for fields that have been confirmed correct in the redcap_data_quality_status and redcap_data_quality_resolutions tables.
+    Removes these fields from the data dictionary so they cannot be flagged as missing data. 
+    The confirmed fields are read on every QC run (once per run with a memoization context), so a field confirmed correct is not flagged again.
+
+    Args:
+        data_dictionary (pd.DataFrame): A pandas DataFrame containing the data dictionary
+        qc_context (dict, optional): The memoization context of the run (see `create_qc_context`)
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the data dictionary with fields that have been confirmed correct removed
+    """
+    dq_total = qc_context_get(qc_context, 'confirmed_correct_fields', get_confirmed_correct_fields)
+
+    data_dictionary = data_dictionary.merge(dq_total, on=['project_id', 'event_id', 'field_name'], how='left', indicator=True)
+    data_dictionary = data_dictionary[data_dictionary['_merge'] == 'left_only'].drop('_merge', axis=1)
+
+    return data_dictionary
+
+def get_drw_table() -> pd.DataFrame:
+    """
+    Retrieves redcap_data_quality_resolutions and redcap_data_quality_status tables and joins them
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the merged redcap_data_quality_resolutions and redcap_data_quality_status tables
+    """
+    table_data = retrieve_dq_tables()
+
+    dq_status = table_data['redcap_data_quality_status']
+    dq_resolutions = table_data['redcap_data_quality_resolutions']
+    dq_status[['record', 'event_id', 'assigned_user_id']] = dq_status[['record', 'event_id', 'assigned_user_id']].apply(pd.to_numeric, errors='coerce')
+    dq_resolutions[['res_id', 'status_id', 'user_id']] = dq_resolutions[['res_id', 'status_id', 'user_id']].apply(pd.to_numeric, errors='coerce')
+
+    dq_total = dq_status.merge(dq_resolutions, on = 'status_id')
     dq_total = dq_total[dq_total[['project_id', 'event_id', 'record', 'instance']].applymap(np.isfinite).all(axis=1)]
     dq_total = dq_total.astype({'project_id': int, 'event_id': int, 'record': int, 'instance': int, 'field_name': str})
     return dq_total
@@ -798,6 +2073,9 @@ def get_current_drw_count() -> int:
     Returns: 
         int: The current number of entries in the redcap_data_quality
     """
+    if sqlite_mirror_enabled:
+        return int(query_sqlite_mirror("SELECT COUNT(*) AS status_count FROM redcap_data_quality_status")['status_count'][0])
+
     table_data = retrieve_database_table(['redcap_data_quality_status'])
 
     dq_status = table_data['redcap_data_quality_status']
@@ -805,6 +2083,38 @@ def get_current_drw_count() -> int:
 
     return status_id_count
 
+def compact_frame(df: pd.DataFrame, category_columns: list = None) -> pd.DataFrame:
+    """
+    Converts a DataFrame to a compact in-memory layout.
+    Low-cardinality string columns become categoricals whose categories are shared by the frames compacted in the same snapshot generation
+    (see `invalidate_snapshots`), and integer ID columns are downcast to the narrowest integer type that holds them.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to compact
+        category_columns (list, optional): The columns to convert to categoricals (default is `compact_category_columns`)
+
+    Returns:
+        pd.DataFrame: The compacted DataFrame
+    """
+    if category_columns is None:
+        category_columns = compact_category_columns
+
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if (col in compact_integer_columns) and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+
+        elif (col in category_columns) and (df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype)):
+            with shared_categories_lock:
+                categories = shared_categories.get(col, pd.Index([], dtype=object))
+                new_categories = pd.Index(df[col].dropna().unique()).difference(categories)
+                if len(new_categories) > 0:
+                    categories = categories.append(new_categories)
+                    shared_categories[col] = categories
+            df[col] = pd.Categorical(df[col], categories=categories)
+
+    return df
+
 def filter_log_event_table(log_event_table: pd.DataFrame) -> pd.DataFrame:
     """
     Filters the log_event table to only hold Data Entry pages rather than administrative logging.
@@ -871,10 +2181,12 @@ def filter_log_event_table(log_event_table: pd.DataFrame) -> pd.DataFrame:
         data_entry_table[['field_name', 'value']] = data_entry_table['data_values'].str.split(' = ',expand=True)
         data_entry_table = data_entry_table.astype({'project_id': int, 'event_id': int, 'pk': int, 'instance': int, 'field_name': str, 'value': str})
 
+    # the raw log strings are no longer needed once they have been split into field_name and value
+    data_entry_table = data_entry_table.drop(columns=['data_values', 'sql_log'])
 
     return data_entry_table
 
-def get_unioned_super_table(pid_list: list) -> pd.DataFrame:
+def get_unioned_super_table(pid_list: list, qc_context: dict = None) -> pd.DataFrame:
     
     data_table_names = []
     log_event_table_names = []
@@ -882,16 +2194,15 @@ def get_unioned_super_table(pid_list: list) -> pd.DataFrame:
     for pid in pid_list:
         log_table_name, data_table_name = get_log_event_and_data_tables(pid)
         for data_table in data_table_name:
-            table = retrieve_database_table([data_table])
-            d_table = table[data_table]
+            d_table = qc_context_table(qc_context, data_table)
             d_table = d_table[d_table['project_id'] == pid]
-            d_table = filter_data_table(d_table)
+            d_table = filter_data_table(d_table).drop(columns=['value_num'])
             data_table_names.append(d_table)
         for log_table in log_table_name:
-            table = retrieve_database_table([log_table])
-            l_table = table[log_table]
+            l_table = qc_context_table(qc_context, log_table)
             l_table = l_table[l_table['project_id'] == pid]
             l_table = filter_log_event_table(l_table)
+            l_table = compact_frame(l_table[['log_event_id', 'project_id', 'event_id', 'pk', 'instance', 'field_name', 'value', 'user']])
             log_event_table_names.append(l_table)
 
 
@@ -899,18 +2210,310 @@ def get_unioned_super_table(pid_list: list) -> pd.DataFrame:
     unioned_data_table = pd.concat(data_table_names)
     
     # loads user info table and merges with log table to find user_id
-    user_info_table = retrieve_database_table(['redcap_user_information'])
-    user_info = user_info_table['redcap_user_information']
+    user_info = qc_context_table(qc_context, 'redcap_user_information')
     user_info = user_info[['ui_id', 'username', 'user_email']]
     unioned_log_table = (unioned_log_table.merge(user_info, left_on = 'user', right_on = 'username')).drop(columns=['username'])
 
-    data_dictionary = retrieve_data_dictionary()
+    data_dictionary = qc_context_get(qc_context, 'stored_data_dictionary', retrieve_data_dictionary)
     data_dictionary = data_dictionary[['project_id', 'field_name','form_name']]
     unioned_data_table = (unioned_data_table.merge(data_dictionary, on = ['project_id', 'field_name']))
 
     unioned_super_table = unioned_data_table.merge(unioned_log_table, on=['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value'])
 
+    # only the columns used to find the data entrist are kept, in a compact layout
+    unioned_super_table = unioned_super_table[super_table_columns]
+    unioned_super_table = compact_frame(unioned_super_table)
+
     return unioned_super_table
+def store_provenance(pid_list: list) -> None:
+    """
+    Stores the unioned super table (who entered each value) of the projects in the snapshot generation as a memory-mapped Arrow file.
+    No CSV copy is written because of its size.
+
+    Args:
+        pid_list (list): A list of project_ids to store the provenance table for
+
+    Returns:
+        None
+    """
+    provenance = get_unioned_super_table(pid_list)
+    write_snapshot(provenance, os.path.join(get_snapshot_dir(), 'provenance.csv'), csv = False)
+    if sqlite_mirror_enabled:
+        load_provenance_into_mirror(provenance, pid_list)
+    return None
+
+def get_provenance_table(pid_list: list) -> pd.DataFrame | None:
+    """
+    Retrieves the unioned super table of the projects from the pinned (or published) snapshot generation if it was refreshed with them,
+    otherwise builds it from the mariaDB server (see `get_unioned_super_table`).
+    Used by the routine sweeps, which pin the generation they refreshed. Real-time QC builds the table itself so it includes the latest entries.
+
+    Args:
+        pid_list (list): A list of project_ids to retrieve the provenance table for
+
+    Returns:
+        pd.DataFrame | None: A pandas DataFrame containing the unioned super table of the projects, 
+                             or None if the SQLite mirror holds it (the data entrist lookups then run on the mirror)
+    """
+    provenance_path = os.path.join(get_snapshot_dir(), 'provenance.csv')
+    report = read_refresh_report(getattr(snapshot_local, 'generation', None) or get_current_generation())
+    pid_list = [int(pid) for pid in pid_list]
+
+    if set(pid_list) <= set(get_mirror_provenance_projects()):
+        return None
+    if set(pid_list) <= set(report.get('provenance_projects', [])) and os.path.exists(get_snapshot_source(provenance_path)):
+        provenance = load_snapshot_file(provenance_path)
+        return provenance[provenance['project_id'].isin(pid_list)].reset_index(drop=True)
+    return get_unioned_super_table(pid_list)
+
+def build_record_matrix(data_table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivots a long-format redcap_data table for one project into a wide record matrix.
+    Rows are keyed by (record, event_id, instance) and each field is its own column. 
+    Fields whose values are all numeric are stored as floats, the rest are kept as text.
+
+    Args:
+        data_table (pd.DataFrame): A pandas DataFrame containing the redcap_data rows of one project
+
+    Returns:
+        pd.DataFrame: The wide record matrix for the project
+    """
+    data_table = add_numeric_value(data_table)
+    data_table = data_table[['record', 'event_id', 'instance', 'field_name', 'value', 'value_num']]
+    data_table = data_table.astype({'record': str, 'field_name': str, 'value': object})
+    data_table['event_id'] = data_table['event_id'].astype(int)
+    data_table['instance'] = data_table['instance'].fillna(1).astype(int)
+    data_table = data_table.drop_duplicates(subset=['record', 'event_id', 'instance', 'field_name'], keep='last')
+
+    text_matrix = data_table.pivot(index=['record', 'event_id', 'instance'], columns='field_name', values='value')
+    numeric_matrix = data_table.pivot(index=['record', 'event_id', 'instance'], columns='field_name', values='value_num')
+
+    # a field is typed as numeric if every value it holds could be parsed as a number
+    numeric_fields = text_matrix.columns[numeric_matrix.notna().sum() == text_matrix.notna().sum()]
+    record_matrix = pd.concat([text_matrix.drop(columns=numeric_fields), numeric_matrix[numeric_fields].astype('float64')], axis=1)
+
+    return record_matrix
+
+def refresh_record_matrices(pid_list: list, merged_data_table: pd.DataFrame = None) -> None:
+    """
+    Builds the wide record matrix of every project in the list and stores it in the record matrix cache.
+    Users who have completed the study are left out. Runs once per routine sweep.
+
+    Args:
+        pid_list (list): A list of project_ids to build the record matrices for
+        merged_data_table (pd.DataFrame, optional): The already loaded redcap_data tables of the projects (default is to load them)
+
+    Returns:
+        None
+    """
+    if merged_data_table is None:
+        data_table_names = []
+        for pid in pid_list:
+            log_table_name, data_table_name = get_log_event_and_data_tables(pid)
+            data_table_names.extend(data_table_name)
+
+        data_tables = retrieve_database_table(list(set(data_table_names)))
+        merged_data_table = add_numeric_value(pd.concat(data_tables.values(), ignore_index=True))
+        del data_tables
+
+    for pid in pid_list:
+        project_table = merged_data_table[merged_data_table['project_id'] == pid]
+        completed_records = get_completed_records(pid)
+        project_table = project_table[~project_table['record'].astype(str).isin(completed_records)]
+
+        record_matrix = build_record_matrix(project_table)
+        present_fields = set(record_matrix.columns[record_matrix.notna().any()])
+        present_events = set(record_matrix.index.get_level_values('event_id'))
+
+        with record_matrix_lock:
+            record_matrix_cache[int(pid)] = {'matrix': record_matrix, 'field_names': present_fields, 'event_ids': present_events, 'built': time.monotonic(), 'stale': False}
+
+    logging.info(f"Record matrices refreshed for projects {list(pid_list)}.")
+    return None
+
+def update_record_matrix(data_entry_table: pd.DataFrame) -> None:
+    """
+    Applies newly logged values (from the redcap_log_event table) to the cached record matrices so they stay current between sweeps.
+    Projects without a cached record matrix are skipped.
+
+    Args:
+        data_entry_table (pd.DataFrame): The filtered log_event rows (see `filter_log_event_table`)
+
+    Returns:
+        None
+    """
+    if data_entry_table.empty:
+        return None
+
+    # log values are quoted (e.g. '12'), matrix values are not
+    values = data_entry_table['value'].astype(str).str.replace(r"^'(.*)'$", r"\1", regex=True)
+
+    with record_matrix_lock:
+        for (project_id, record, event_id, instance, field_name), value in zip(data_entry_table[['project_id', 'pk', 'event_id', 'instance', 'field_name']].itertuples(index=False, name=None), values):
+            cache_entry = record_matrix_cache.get(int(project_id))
+            if cache_entry is None:
+                continue
+            record_matrix = cache_entry['matrix']
+            key = (str(record), int(event_id), int(instance))
+
+            if value == '':
+                new_value = np.nan
+            elif field_name in record_matrix.columns and pd.api.types.is_float_dtype(record_matrix[field_name]):
+                new_value = pd.to_numeric(value, errors='coerce')
+                # a text value in a numeric field turns the column back into text
+                if pd.isna(new_value):
+                    record_matrix[field_name] = record_matrix[field_name].astype(object)
+                    new_value = value
+            else:
+                new_value = value
+
+            record_matrix.loc[key, field_name] = new_value
+            if pd.notna(new_value):
+                cache_entry['field_names'].add(field_name)
+                cache_entry['event_ids'].add(int(event_id))
+
+    return None
+
+def invalidate_record_matrices(log_event_table: pd.DataFrame) -> None:
+    """
+    Marks the cached record matrices of projects as stale if the log entries hold writes to the redcap_data tables that `update_record_matrix` cannot apply
+    (API writes, imports, deletes, ...). A stale record matrix is rebuilt by the next QC run of its project (see `has_current_record_matrix`).
+
+    Args:
+        log_event_table (pd.DataFrame): The unfiltered log_event rows
+
+    Returns:
+        None
+    """
+    if log_event_table.empty or not {'project_id', 'object_type', 'description', 'page'}.issubset(log_event_table.columns):
+        return None
+
+    # the same rows `filter_log_event_table` keeps are applied to the record matrices
+    data_entry_mask = (log_event_table['description'].isin(["Update record", "Create record"]) & 
+                       log_event_table['page'].isin(["DataEntry/index.php", "ProjectGeneral/create_project.php"]))
+    other_writes = log_event_table[(log_event_table['object_type'] == "redcap_data") & ~data_entry_mask]
+
+    with record_matrix_lock:
+        for project_id in other_writes['project_id'].dropna().unique():
+            cache_entry = record_matrix_cache.get(int(project_id))
+            if cache_entry is not None and not cache_entry['stale']:
+                cache_entry['stale'] = True
+                logging.info(f"Record matrix of project {project_id} marked stale by a write outside of data entry.")
+    return None
+
+def drop_record_matrix_record(project_id: int, record: str) -> None:
+    """
+    Removes every row of a record from the cached record matrix of a project (used when the user completes the study).
+
+    Args:
+        project_id (int): The project_id of the record
+        record (str): The record to remove
+
+    Returns:
+        None
+    """
+    with record_matrix_lock:
+        cache_entry = record_matrix_cache.get(int(project_id))
+        if cache_entry is not None:
+            cache_entry['matrix'] = cache_entry['matrix'].drop(index=str(record), level='record', errors='ignore')
+    return None
+
+def has_record_matrix(project_id: int) -> bool:
+    """
+    Checks if a record matrix is cached for a project.
+
+    Args:
+        project_id (int): The project_id to check
+
+    Returns:
+        bool: True if the record matrix of the project is cached
+    """
+    with record_matrix_lock:
+        return int(project_id) in record_matrix_cache
+
+def has_current_record_matrix(project_id: int) -> bool:
+    """
+    Checks if the cached record matrix of a project can be used as is, i.e. it is not stale (see `invalidate_record_matrices`)
+    and was built less than `record_matrix_max_age` seconds ago.
+
+    Args:
+        project_id (int): The project_id to check
+
+    Returns:
+        bool: True if the record matrix of the project is cached and current
+    """
+    with record_matrix_lock:
+        cache_entry = record_matrix_cache.get(int(project_id))
+        return cache_entry is not None and not cache_entry['stale'] and time.monotonic() - cache_entry['built'] < record_matrix_max_age
+
+def reads_record_matrix(project_id: int, merged_data_table: pd.DataFrame | None) -> bool:
+    """
+    Checks if a QC step reads the cached record matrix of a project rather than the merged_data_table it was given.
+    A step without data tables reads the record matrix even if it expired since the run started, so one run never mixes both sources.
+
+    Args:
+        project_id (int): The project_id of the step
+        merged_data_table (pd.DataFrame | None): The data tables loaded for the run, None if the run relies on the record matrix
+
+    Returns:
+        bool: True if the step reads the record matrix
+    """
+    if merged_data_table is None:
+        return has_record_matrix(project_id)
+    return has_current_record_matrix(project_id)
+
+def get_record_matrix_presence(project_id: int) -> tuple[set, set] | None:
+    """
+    Retrieves the event_ids and field_names that hold at least one value in the cached record matrix of a project.
+
+    Args:
+        project_id (int): The project_id to retrieve the presence sets for
+
+    Returns:
+        tuple[set, set] | None: The set of event_ids and the set of field_names, or None if no record matrix is cached
+    """
+    with record_matrix_lock:
+        cache_entry = record_matrix_cache.get(int(project_id))
+        if cache_entry is None:
+            return None
+        return set(cache_entry['event_ids']), set(cache_entry['field_names'])
+
+def get_record_matrix_slice(project_id: int, field_names: list, event_id: int = None) -> pd.DataFrame | None:
+    """
+    Retrieves the given field columns of a cached record matrix, returned in the long format of the redcap_data table.
+    Only entries that hold a value are returned.
+
+    Args:
+        project_id (int): The project_id of the record matrix
+        field_names (list): The field_names (columns) to retrieve
+        event_id (int, optional): Restricts the slice to one event (default is all events)
+
+    Returns:
+        pd.DataFrame | None: A pandas DataFrame with project_id, event_id, record, instance, field_name, value and value_num columns, or None if no record matrix is cached
+    """
+    with record_matrix_lock:
+        cache_entry = record_matrix_cache.get(int(project_id))
+        if cache_entry is None:
+            return None
+        record_matrix = cache_entry['matrix']
+        field_names = [field_name for field_name in pd.unique(pd.Series(field_names, dtype=object)) if field_name in record_matrix.columns]
+
+        if event_id is not None:
+            if int(event_id) in record_matrix.index.get_level_values('event_id'):
+                record_matrix = record_matrix.xs(int(event_id), level='event_id', drop_level=False)
+            else:
+                record_matrix = record_matrix.iloc[0:0]
+        matrix_slice = record_matrix[field_names].astype(object)
+
+    # melt keeps the empty cells on every pandas version (unlike stack), so they are dropped explicitly
+    long_slice = matrix_slice.reset_index().melt(id_vars=['record', 'event_id', 'instance'], var_name='field_name', value_name='value')
+    long_slice = long_slice.dropna(subset=['value']).reset_index(drop=True)
+    long_slice = long_slice.reindex(columns=['record', 'event_id', 'instance', 'field_name', 'value'])
+    long_slice.insert(0, 'project_id', int(project_id))
+    long_slice['value_num'] = pd.to_numeric(long_slice['value'], errors='coerce').astype('float64')
+
+    return long_slice
+
 def resolve_open_queries(pid_list: list, production_mode: bool = False) -> None:
     """
     Resolves open queries for missing data in the redcap_data_quality_resolutions and redcap_data_quality_status tables by 
@@ -1007,7 +2610,8 @@ def get_thread_id(mess_tables: dict, channel_name: str, user_id: int, assigned_u
 
 def get_username(mess_tables: dict, recipient_user_id: int) -> str:
     """
-    Retrieves the username of the recipient of the message from the redcap_user_information table.
+    Retrieves the username of the recipient of the message from the redcap_user_information table if it is in `mess_tables`, 
+    otherwise from the messenger metadata (see `get_messenger_metadata`).
     
     Args:
         mess_tables (dict): A dictionary containing the tables necessary for the messaging system
@@ -1016,13 +2620,17 @@ def get_username(mess_tables: dict, recipient_user_id: int) -> str:
     Returns:
         str: The username of the recipient of the message
     """
-    user_info = mess_tables['redcap_user_information']
-    username = user_info[user_info['ui_id'] == recipient_user_id]['username']
-    return username.iloc[0]
+    if 'redcap_user_information' in mess_tables:
+        user_info = mess_tables['redcap_user_information']
+        username = user_info[user_info['ui_id'] == recipient_user_id]['username']
+        return username.iloc[0]
+
+    return lookup_messenger_metadata('users', int(recipient_user_id), "SELECT ui_id, username, user_email FROM redcap_user_information WHERE ui_id = ?")[0]
 
 def get_app_title(mess_tables: dict, project_id: int) -> str:
     """
-    Retrieves the official title of the project from the redcap_projects table.
+    Retrieves the official title of the project from the redcap_projects table if it is in `mess_tables`, 
+    otherwise from the messenger metadata (see `get_messenger_metadata`).
 
     Args:
         mess_tables (dict): A dictionary containing the tables necessary for the messaging system
@@ -1031,9 +2639,12 @@ def get_app_title(mess_tables: dict, project_id: int) -> str:
     Returns:
         str: The official title of the project
     """
-    project_info = mess_tables['redcap_projects']
-    app_title = project_info[project_info['project_id'] == project_id]['app_title']
-    return app_title.iloc[0]
+    if 'redcap_projects' in mess_tables:
+        project_info = mess_tables['redcap_projects']
+        app_title = project_info[project_info['project_id'] == project_id]['app_title']
+        return app_title.iloc[0]
+
+    return lookup_messenger_metadata('app_titles', int(project_id), "SELECT project_id, app_title FROM redcap_projects WHERE project_id = ?")
 
 def find_version_history() -> str:
     """
@@ -1043,27 +2654,119 @@ def find_version_history() -> str:
         str: The build of the latest updated redcap version
     """
     version_table = retrieve_database_table(['redcap_history_version'])
-    redcap_version = version_table['redcap_version'].iloc[-1]
+    redcap_version = version_table['redcap_history_version']['redcap_version'].iloc[-1]
     return redcap_version
 
-def create_msg_body(app_title: str, redcap_version:str, project_id: int, status: str, recipient_user_id: int, status_id: int, username: str, sent_time: datetime.datetime) -> str:
+def build_messenger_metadata() -> dict:
     """
-    Creates the message body to be sent to the recipient via the REDCap messenger, including a link to the workflow table.
+    Builds the metadata needed to compose messenger messages: the current redcap version, the title of every project and the username and email of every user.
 
-    Args:
-        app_title (str): The official title of the project
-        redcap_version (str): The current version of the redcap server
-        project_id (int): The project_id of the project the message is being sent in
-        status (str): The status of the data query
-        recipient_user_id (int): The user_id of the recipient of the message
-        status_id (int): The status_id of the data query
-        username (str): The username of the author of the message
-        sent_time (datetime.datetime): The time the message was sent
-    
     Returns:
-        str: The message body to be sent to the recipient via the REDCap messenger, including a link to the workflow table
+        dict: The messenger metadata, formatted as follows: `{'redcap_version': str, 'app_titles': {project_id: app_title, ...}, 'users': {ui_id: [username, user_email], ...}}`
     """
-    if (status is None):
+    conn = connect_to_maria()
+    projects = execute_maria_cmd(conn, "SELECT project_id, app_title FROM redcap_projects") or []
+    users = execute_maria_cmd(conn, "SELECT ui_id, username, user_email FROM redcap_user_information") or []
+    conn.close()
+
+    return {
+        'redcap_version': str(find_version_history()),
+        'app_titles': {int(project_id): app_title for project_id, app_title in projects},
+        'users': {int(ui_id): [username, user_email] for ui_id, username, user_email in users},
+    }
+
+def store_messenger_metadata() -> None:
+    """
+    Stores the messenger metadata (see `build_messenger_metadata`) in the snapshot generation as a JSON file.
+
+    Returns:
+        None
+    """
+    file_path = os.path.join(get_snapshot_dir(), 'messenger_meta.json')
+    with open(f'{file_path}.tmp', 'w') as file:
+        json.dump(build_messenger_metadata(), file)
+    os.replace(f'{file_path}.tmp', file_path)
+    return None
+
+def get_messenger_metadata() -> dict:
+    """
+    Retrieves the messenger metadata of the pinned (or published) snapshot generation, reading it the first time it is requested.
+    The metadata is read from the generation if it was stored there (see `store_messenger_metadata`), otherwise it is built.
+
+    Returns:
+        dict: The messenger metadata in the format of `build_messenger_metadata`
+    """
+    generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
+
+    with messenger_metadata_lock:
+        metadata = messenger_metadata_cache.get(generation)
+        if metadata is None:
+            file_path = os.path.join(get_snapshot_dir(), 'messenger_meta.json')
+            if os.path.exists(file_path):
+                with open(file_path, 'r') as file:
+                    metadata = json.load(file)
+                # JSON keys are strings
+                metadata['app_titles'] = {int(project_id): app_title for project_id, app_title in metadata['app_titles'].items()}
+                metadata['users'] = {int(ui_id): user for ui_id, user in metadata['users'].items()}
+            else:
+                metadata = build_messenger_metadata()
+            messenger_metadata_cache[generation] = metadata
+            # older generations are no longer needed once the newest ones are read
+            while len(messenger_metadata_cache) > snapshot_keep_generations:
+                del messenger_metadata_cache[next(iter(messenger_metadata_cache))]
+
+    return metadata
+
+def lookup_messenger_metadata(lookup_name: str, key: int, sql_comm: str):
+    """
+    Looks up a project title or user in the messenger metadata. 
+    Projects and users created after the snapshot generation was built are queried from the mariaDB server and added to a copy of the metadata,
+    which replaces the cached one under `messenger_metadata_lock`, so the dicts other QC threads are reading are never changed.
+
+    Args:
+        lookup_name (str): The name of the lookup, 'app_titles' or 'users'
+        key (int): The project_id or ui_id to look up
+        sql_comm (str): The query returning the key and its values, used if the key is not in the metadata
+
+    Returns:
+        The app_title of the project, or the [username, user_email] of the user
+    """
+    lookup = get_messenger_metadata()[lookup_name]
+    if key in lookup:
+        return lookup[key]
+
+    conn = connect_to_maria()
+    rows = execute_maria_cmd(conn, sql_comm, (key,)) or []
+    conn.close()
+    if not rows:
+        raise KeyError(f"{key} not found in {lookup_name}")
+    value = rows[0][1] if len(rows[0]) == 2 else list(rows[0][1:])
+
+    generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
+    with messenger_metadata_lock:
+        metadata = messenger_metadata_cache.get(generation)
+        if metadata is not None:
+            messenger_metadata_cache[generation] = {**metadata, lookup_name: {**metadata[lookup_name], key: value}}
+    return value
+
+def create_msg_body(app_title: str, redcap_version:str, project_id: int, status: str, recipient_user_id: int, status_id: int, username: str, sent_time: datetime.datetime) -> str:
+    """
+    Creates the message body to be sent to the recipient via the REDCap messenger, including a link to the workflow table.
+
+    Args:
+        app_title (str): The official title of the project
+        redcap_version (str): The current version of the redcap server
+        project_id (int): The project_id of the project the message is being sent in
+        status (str): The status of the data query
+        recipient_user_id (int): The user_id of the recipient of the message
+        status_id (int): The status_id of the data query
+        username (str): The username of the author of the message
+        sent_time (datetime.datetime): The time the message was sent
+    
+    Returns:
+        str: The message body to be sent to the recipient via the REDCap messenger, including a link to the workflow table
+    """
+    if (status is None):
         status = ''
     message_body = '''[{"msg_body":'''
     message_body += fr'''"You have been assigned to a data query that was just opened in the REDCap project \"<b>{app_title}<\/b>\".<br><br>Open the data query assigned to you: '''
@@ -1112,7 +2815,7 @@ def send_periodic_email() -> None:
     if time_diff > datetime.timedelta(hours=24):
         drw_table = get_drw_table()
         user_info = get_user_information()
-        redcap_version = find_version_history()
+        redcap_version = get_messenger_metadata()['redcap_version']
 
         user_info = user_info[['ui_id', 'username', 'user_email']]
         drw_table = drw_table.merge(user_info, left_on='assigned_user_id', right_on='ui_id', how='left')
@@ -1185,7 +2888,7 @@ def prepare_mess_data(mess_tables: dict, author_user_id: int, recipient_user_id:
 
     app_title = get_app_title(mess_tables, project_id)
     channel_name = f'Assigned to a data query in project {project_id}: {app_title}'
-    redcap_version = find_version_history()
+    redcap_version = get_messenger_metadata()['redcap_version']
 
     # sets necessary field values for threads table
     thread_id = get_thread_id(mess_tables, channel_name, author_user_id, recipient_user_id, project_id)
@@ -1282,13 +2985,13 @@ def prepare_drw_data(dq_tables: dict, ts: datetime.datetime, project_id: int, ev
 
     return data_rows
 
-def get_entry_of_outlier(unioned_super_table: pd.DataFrame, project_id: int, event_id: int, hnrcid: int, form_name: str, field_name: str, value: str, repeat_instance: int) -> tuple[int,str,str]:
+def get_entry_of_outlier(unioned_super_table: pd.DataFrame | None, project_id: int, event_id: int, hnrcid: int, form_name: str, field_name: str, value: str, repeat_instance: int) -> tuple[int,str,str]:
     """
     Retrieves the user_id, username, and email of the data entrist by filtering on the hnrcid, event_id, field_name, and instance attributes.
     Currently returns the user with the most entries in the filtered table. 
 
     Args:
-        unioned_super_table (pd.DataFrame): A pandas DataFrame containing the unioned super table
+        unioned_super_table (pd.DataFrame | None): A pandas DataFrame containing the unioned super table (None runs the lookup on the SQLite mirror)
         project_id (int): The project_id of the data entry
         event_id (int): The event_id of the data entry
         hnrcid (int): The hnrcid of the data entry
@@ -1310,6 +3013,13 @@ def get_entry_of_outlier(unioned_super_table: pd.DataFrame, project_id: int, eve
 
     # print(f"{project_id} {event_id} {hnrcid} {field_name} {value} {repeat_instance}")
 
+    # without a table, the lookup runs on the provenance table of the SQLite mirror (see `get_provenance_table`)
+    if unioned_super_table is None:
+        entry = get_entry_from_mirror(event_id, hnrcid, form_name, field_name, repeat_instance)
+        if entry is not None:
+            return entry
+        unioned_super_table = pd.DataFrame(columns=super_table_columns)
+
     if len(unioned_super_table[(unioned_super_table['form_name'] == form_name)]) > 0:
         unioned_super_table = unioned_super_table[(unioned_super_table['form_name'] == form_name)]
         
@@ -1471,7 +3181,10 @@ def find_outliers_qq(df: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: A DataFrame containing only the outliers.
     """
     # Ensure 'value' is numeric to avoid issues with StandardScaler and other numerical operations
-    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    if 'value_num' in df.columns:
+        df['value'] = df['value_num']
+    else:
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
     
     # Group solo points (where the group size is 1)
     solo_points = df.groupby('field_name').filter(lambda x: len(x) == 1)
@@ -1555,7 +3268,8 @@ def create_data_res_workflow_entry(conn: mariadb.connections.Connection, project
     """
     # redcap tables to be modified
     dq_table_names = ['redcap_data_quality_status', 'redcap_data_quality_resolutions']
-    mess_table_names = ['redcap_messages_threads', 'redcap_messages', 'redcap_messages_recipients', 'redcap_user_information', 'redcap_projects']
+    # usernames and project titles come from the messenger metadata (see `get_messenger_metadata`)
+    mess_table_names = ['redcap_messages_threads', 'redcap_messages', 'redcap_messages_recipients']
 
     dq_table_cols = get_colnames(conn, dq_table_names)
     mess_table_cols = get_colnames(conn, mess_table_names)
@@ -1566,9 +3280,6 @@ def create_data_res_workflow_entry(conn: mariadb.connections.Connection, project
     drw_rows = prepare_drw_data(dq_tables, ts, project_id, event_id, hnrcid, field_name, value, repeat_instance, assigned_user_id, user_id, comment)
     mess_rows = prepare_mess_data(mess_tables, author_user_id = user_id, recipient_user_id = assigned_user_id, sent_time = ts, project_id = project_id, status = drw_rows[0][10], status_id = drw_rows[0][0])
     update_thread = mess_rows.pop(0)
-
-    mess_table_names.remove('redcap_user_information')
-    mess_table_names.remove('redcap_projects')
     
     # for both DQ tables, creates a row with all the necessary fields entered
     for table in range(len(dq_table_names)):
@@ -1611,6 +3322,14 @@ def check_existing_drw_entry(project_id: int, event_id: int, hnrcid: int, field_
     Returns:
         pd.DataFrame: A DataFrame containing the existing DRW entry
     """
+    if sqlite_mirror_enabled:
+        # indexed lookup on the local mirror, including the entries created since its last sync
+        lookup_values = (int(project_id), int(event_id), field_name, int(repeat_instance), int(hnrcid), int(official_user_id))
+        dq_status = query_sqlite_mirror("SELECT * FROM redcap_data_quality_status WHERE project_id = ? AND event_id = ? AND field_name = ? AND instance = ? AND CAST(record AS INTEGER) = ? AND assigned_user_id = ?", lookup_values)
+        if dq_status.empty:
+            dq_status = query_sqlite_mirror("SELECT * FROM drw_submitted WHERE project_id = ? AND event_id = ? AND field_name = ? AND instance = ? AND record = ? AND assigned_user_id = ?", lookup_values)
+        return dq_status
+
     table_data = retrieve_database_table(['redcap_data_quality_status'])
 
     dq_status = table_data['redcap_data_quality_status']
@@ -1651,10 +3370,12 @@ def outlier_data_submission(project_id: int, event_id: int, hnrcid: int, form_na
     log_msg = f'project_id {project_id}, hnrcid {hnrcid}, event_id {event_id}, repeat_instance {repeat_instance}, field_name {field_name}, value {value}, user {official_user_id}: {username} {email}. '
 
     dq_status = check_existing_drw_entry(project_id, event_id, hnrcid, field_name, official_user_id, repeat_instance)
+    created = False
 
     if (len(dq_status.index) == 0):
         try:
             create_data_res_workflow_entry(conn, project_id, event_id, hnrcid, field_name, value, repeat_instance, official_user_id, official_user_id, comment = f"Flagged Value", ping = ping)
+            created = True
             log_msg += "Created a Data Resolution Workflow entry. "
             if ping:
                 log_msg += f"Sent ping to user {official_user_id}: {username}"
@@ -1671,9 +3392,13 @@ def outlier_data_submission(project_id: int, event_id: int, hnrcid: int, form_na
     conn.commit()       # commit changes to the database so they can be officially submitted once the process is over
     conn.close()        # connection MUST be closed at end of process so it is not infinitely hanging
 
+    # the new DRW entry has to be in the mirror before the next duplicate check
+    if sqlite_mirror_enabled and created:
+        record_drw_submission(project_id, event_id, hnrcid, field_name, official_user_id, repeat_instance)
+
     return None
 
-def operate_outlier_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.DataFrame, unioned_super_table: pd.DataFrame, outlier_method: str = 'Chauvanet', production_mode: bool = False) -> None:
+def operate_outlier_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.DataFrame, unioned_super_table: pd.DataFrame, outlier_method: str = 'Chauvanet', production_mode: bool = False, qc_context: dict = None) -> None:
     """
     Operates the outlier detection and submission process for a given DataFrame.
 
@@ -1683,12 +3408,13 @@ def operate_outlier_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
         unioned_super_table (pd.DataFrame): The DataFrame containing the unioned super table
         outlier_method (str, optional): The method to use for outlier detection (default is 'Chauvanet')
         production_mode (bool, optional): A boolean indicating whether to run in production mode (default is False)
+        qc_context (dict, optional): The memoization context of the run (see `create_qc_context`)
 
     Returns:
         None
     """
     # Fetches the data dictionary and merge with the data entry table
-    data_dictionary = get_data_dictionary()
+    data_dictionary = qc_context_get(qc_context, 'data_dictionary', get_data_dictionary)
     data_dictionary = data_dictionary[['project_id', 'field_name','form_name']]
     data_entry_table = (data_entry_table.merge(data_dictionary, on = ['project_id', 'field_name']))
 
@@ -1699,20 +3425,32 @@ def operate_outlier_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
     event_id = data_entry_table['event_id'].iloc[0]
 
 
-    drw_table = get_drw_table()
+    drw_table = qc_context_get(qc_context, 'drw_table', get_drw_table)
 
-    merged_data_table['instance'] = merged_data_table['instance'].fillna(1).astype(int)
-    merged_data_table['outlier'] = False
-    merged_data_table = merged_data_table.astype({'project_id': int, 'event_id': int, 'record': int, 'instance': int, 'field_name': str})
-    # marks rows that have drw entries
-    merged_data_table = merged_data_table.merge(drw_table, left_on = ['project_id', 'record', 'event_id', 'field_name', 'instance'], right_on = ['project_id', 'record', 'event_id', 'field_name', 'instance'], how='left', indicator=True)
+    # reads field columns from the cached record matrix of the project if there is one, otherwise masks the merged_data_table
+    use_record_matrix = reads_record_matrix(project_id, merged_data_table)
+    if not use_record_matrix:
+        merged_data_table = add_numeric_value(merged_data_table)
+        merged_data_table['instance'] = merged_data_table['instance'].fillna(1).astype(int)
+        merged_data_table['outlier'] = False
+        merged_data_table = merged_data_table.astype({'project_id': int, 'event_id': int, 'record': int, 'instance': int, 'field_name': str})
+        # marks rows that have drw entries
+        merged_data_table = merged_data_table.merge(drw_table, left_on = ['project_id', 'record', 'event_id', 'field_name', 'instance'], right_on = ['project_id', 'record', 'event_id', 'field_name', 'instance'], how='left', indicator=True)
     
     # Parses through DataFrame based on each field_name to check for outliers
     df_list = []
     cols = list(data_entry_table['field_name'])
     for col in cols:
-        df = merged_data_table[merged_data_table['field_name'] == col]
-        df['value'] = df['value'].astype(float)
+        if use_record_matrix:
+            df = get_record_matrix_slice(project_id, [col])
+            df = df.astype({'project_id': int, 'event_id': int, 'record': int, 'instance': int, 'field_name': str})
+            df['outlier'] = False
+            # marks rows that have drw entries
+            df = df.merge(drw_table[drw_table['field_name'] == col], on = ['project_id', 'record', 'event_id', 'field_name', 'instance'], how='left', indicator=True)
+        else:
+            df = merged_data_table[merged_data_table['field_name'] == col]
+        # reuses the value parsed when the data table was loaded, skipping entries that are not numeric
+        df = df[df['value_num'].notna()].assign(value = lambda x: x['value_num'])
         df = (df.merge(data_dictionary, on = ['project_id', 'field_name']))
         if len(df) > 0:
             df_list.append(df)
@@ -1755,12 +3493,12 @@ def operate_outlier_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
     logging.info(f"Completed outlier detection and submission for project {project_id} and field {field_name}.")
     return None
 
-def get_entry_of_missing(unioned_super_table: pd.DataFrame, project_id: int, event_id: int, hnrcid: int, form_name: str, field_name: str, value: str, repeat_instance: int) -> tuple[int,str,str]:
+def get_entry_of_missing(unioned_super_table: pd.DataFrame | None, project_id: int, event_id: int, hnrcid: int, form_name: str, field_name: str, value: str, repeat_instance: int) -> tuple[int,str,str]:
     """
     Retrieves the user_id and username of the data entrist by filtering on the hnrcid, event_id, field_name, and instance attributes.
 
     Args:
-        unioned_super_table (pd.DataFrame): The DataFrame containing all the data for the relevant project
+        unioned_super_table (pd.DataFrame | None): The DataFrame containing all the data for the relevant project (None runs the lookup on the SQLite mirror)
         project_id (int): The project_id of the data entry
         event_id (int): The event_id of the data entry
         hnrcid (int): The hnrcid of the data entry
@@ -1788,6 +3526,13 @@ def get_entry_of_missing(unioned_super_table: pd.DataFrame, project_id: int, eve
 
     # unioned_super_table.to_csv(f'output_logs/user_id/unioned_super_table_{project_id}_{event_id}_{hnrcid}_{form_name}_{field_name}_{value}_{repeat_instance}_before.csv')
 
+    # without a table, the lookup runs on the provenance table of the SQLite mirror (see `get_provenance_table`)
+    if unioned_super_table is None:
+        entry = get_entry_from_mirror(event_id, hnrcid, form_name, None, repeat_instance)
+        if entry is not None:
+            return entry
+        unioned_super_table = pd.DataFrame(columns=super_table_columns)
+
     if len(unioned_super_table[(unioned_super_table['form_name'] == form_name)]) > 0:
         unioned_super_table = unioned_super_table[(unioned_super_table['form_name'] == form_name)]
         
@@ -1850,6 +3595,14 @@ def navigate_branching_logic(personalized_data_dic: pd.DataFrame, missing_check_
     event_id = missing_check_dict['event_id']
     form_name = missing_check_dict['form_name']
 
+    # numeric values are parsed once up front rather than inside the nested loop below. 
+    # values that cannot be read as a number (other than missing values) are skipped, as before
+    if 'value_num' in personalized_data_dic.columns:
+        numeric_values = personalized_data_dic['value_num'].astype(float)
+    else:
+        numeric_values = pd.to_numeric(personalized_data_dic['value'], errors='coerce').astype(float)
+    is_parsed = numeric_values.notna() | personalized_data_dic['value'].isna() | (personalized_data_dic['value'].astype(str).str.strip().str.lower() == 'nan')
+    other_values = list(zip(personalized_data_dic['field_name'][is_parsed], numeric_values[is_parsed]))
 
     for index, row in personalized_data_dic.iterrows():
         x = row['field_name']
@@ -1861,13 +3614,7 @@ def navigate_branching_logic(personalized_data_dic: pd.DataFrame, missing_check_
         remove_row = False
 
         # print(list(row))
-        for _, other_row in personalized_data_dic.iterrows():
-            other_x = other_row['field_name']
-            other_y = other_row['value']
-            try:
-                other_y = float(other_y)
-            except:
-                continue
+        for other_x, other_y in other_values:
             if (f" AND " in branching_logic) or (f" and " in branching_logic):
                 remove_row = True
                 break
@@ -1926,6 +3673,7 @@ def navigate_branching_logic(personalized_data_dic: pd.DataFrame, missing_check_
                 remove_row = False
         if remove_row:
             personalized_data_dic = personalized_data_dic[personalized_data_dic['field_name'] != x].reset_index(drop=True)
+            other_values = [(other_x, other_y) for other_x, other_y in other_values if other_x != x]
         
     for _, row in personalized_data_dic.iterrows():
         # or (f"other" in row['field_name'])
@@ -1992,7 +3740,8 @@ def find_missing_data(merged_data_table: pd.DataFrame, data_dictionary: pd.DataF
         return pd.DataFrame()
     else:    
         merged_data_table = merged_data_table.astype({'project_id': 'int', 'event_id': 'int', 'record': 'int', 'instance': 'int', 'field_name': 'str', 'value': 'str'})
-        merged_data_table = merged_data_table[['project_id', 'event_id', 'record', 'form_name', 'field_name', 'instance', 'value']]
+        merged_data_table = add_numeric_value(merged_data_table)
+        merged_data_table = merged_data_table[['project_id', 'event_id', 'record', 'form_name', 'field_name', 'instance', 'value', 'value_num']]
 
 
         # create df with all possible data entries for each record in the form
@@ -2072,10 +3821,12 @@ def missing_data_submission(project_id: int, event_id: int, hnrcid: int, form_na
     log_msg = f'project_id {project_id}, hnrcid {hnrcid}, event_id {event_id}, repeat_instance {repeat_instance}, field_name {field_name}, value {value}, user {official_user_id}: {username} {email}. '
 
     dq_status = check_existing_drw_entry(project_id, event_id, hnrcid, field_name, official_user_id, repeat_instance)
+    created = False
     
     if (len(dq_status.index) == 0):
         try:
             create_data_res_workflow_entry(conn, project_id, event_id, hnrcid, field_name, value, repeat_instance, official_user_id, official_user_id, comment = f"Missing data", ping = ping)
+            created = True
             log_msg += "Created a Data Resolution Workflow entry. "
             if ping:
                 log_msg += f"Sent ping to user {official_user_id}: {username}"
@@ -2092,6 +3843,10 @@ def missing_data_submission(project_id: int, event_id: int, hnrcid: int, form_na
     conn.commit()       # commit changes to the database so they can be officially submitted once the process is over
     conn.close()        # connection MUST be closed at end of process so it is not infinitely hanging
 
+    # the new DRW entry has to be in the mirror before the next duplicate check
+    if sqlite_mirror_enabled and created:
+        record_drw_submission(project_id, event_id, hnrcid, field_name, official_user_id, repeat_instance)
+
     return None
 
 def submit_stored_drw_entries(alert_threshold: int = 100, production_mode: bool = False) -> None:
@@ -2113,7 +3868,7 @@ def submit_stored_drw_entries(alert_threshold: int = 100, production_mode: bool
     
     logging.info(f"{len(potential_submissions)} entries to submit to REDCap.")
     pid_list = potential_submissions['project_id'].unique()
-    unioned_super_table = get_unioned_super_table(pid_list)
+    unioned_super_table = get_provenance_table(pid_list)
 
     if production_mode:
         if len(potential_submissions) > alert_threshold:
@@ -2130,7 +3885,91 @@ def submit_stored_drw_entries(alert_threshold: int = 100, production_mode: bool
     pd.DataFrame(columns=['project_id', 'event_id', 'record', 'form_name', 'field_name', 'value', 'instance', 'official_user_id', 'username', 'email','approved']).to_csv('stored_data/drw_entries.csv', index=False)
     return None
 
-def operate_missing_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.DataFrame, unioned_super_table: pd.DataFrame, production_mode: bool = False) -> None: 
+def build_enriched_dictionary() -> pd.DataFrame:
+    """
+    Builds the enriched data dictionary used by the missing data and outlier checks.
+    Merges the stored data dictionary with the event arms (see `get_arm_data`) and the project investigators and sorts by project_id, form_name and field_order.
+    Fields confirmed correct change with every DRW resolution, so they are removed by each QC run instead (see `check_for_confirmed_correct_fields`).
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the enriched data dictionary
+    """
+    data_dictionary = retrieve_data_dictionary()
+    data_dictionary = data_dictionary[['project_id', 'field_name','form_name', 'field_order', 'element_type', 'element_validation_type', 'branching_logic', 'misc']]
+
+    project_table = retrieve_project_data()
+    project_table = project_table[['project_id', 'investigators']]
+
+    event_arms_table = get_arm_data()
+    event_arms_table = event_arms_table[['project_id', 'event_id', 'event_name', 'form_name', 'custom_repeat_form_label']]
+    data_dictionary = (data_dictionary.merge(event_arms_table, on = ['project_id', 'form_name']))
+    data_dictionary = (data_dictionary.merge(project_table, on = ['project_id']))
+    data_dictionary = data_dictionary.sort_values(by=['project_id', 'form_name', 'field_order'], kind='mergesort', ignore_index=True)
+
+    return data_dictionary
+
+def store_enriched_dictionary() -> None:
+    """
+    Stores the enriched data dictionary (see `build_enriched_dictionary`) in the snapshot generation, so worker processes map it instead of each rebuilding it.
+
+    Returns:
+        None
+    """
+    write_snapshot(build_enriched_dictionary(), os.path.join(get_snapshot_dir(), 'enriched_dic.csv'), csv = False)
+    return None
+
+def get_enriched_dictionary() -> dict:
+    """
+    Retrieves the enriched data dictionary of the pinned (or published) snapshot generation and builds its hash indexes the first time.
+    The dictionary is read from the generation if it was stored there (see `store_enriched_dictionary`), otherwise it is built.
+    It still holds the fields confirmed correct, callers remove them with `check_for_confirmed_correct_fields`.
+
+    Returns:
+        dict: A dictionary with the enriched data dictionary under 'table' and its hash indexes under 'indexes', 
+              formatted as follows: `{'table': pd.DataFrame, 'indexes': {'project_field': {(project_id, field_name): row_positions, ...}, ...}}`
+    """
+    generation = getattr(snapshot_local, 'generation', None) or get_current_generation()
+
+    with enriched_dictionary_lock:
+        cache_entry = enriched_dictionary_cache.get(generation)
+        if cache_entry is None:
+            enriched_path = os.path.join(get_snapshot_dir(), 'enriched_dic.csv')
+            if os.path.exists(get_snapshot_source(enriched_path)):
+                data_dictionary = load_snapshot_file(enriched_path)
+            else:
+                data_dictionary = build_enriched_dictionary()
+            indexes = {index_name: data_dictionary.groupby(index_columns, sort=False).indices for index_name, index_columns in enriched_dictionary_indexes.items()}
+            cache_entry = {'table': data_dictionary, 'indexes': indexes}
+            enriched_dictionary_cache[generation] = cache_entry
+            # older generations are no longer needed once the newest ones are built
+            while len(enriched_dictionary_cache) > snapshot_keep_generations:
+                del enriched_dictionary_cache[next(iter(enriched_dictionary_cache))]
+
+    return {'table': cache_entry['table'].copy(deep=not snapshot_copy_on_write), 'indexes': cache_entry['indexes']}
+
+def lookup_enriched_dictionary(index_name: str, keys: list, qc_context: dict = None) -> pd.DataFrame:
+    """
+    Retrieves the rows of the enriched data dictionary that match any of the keys of a hash index, in the order of the enriched data dictionary.
+    Fields that have been confirmed correct are removed (see `check_for_confirmed_correct_fields`).
+
+    Args:
+        index_name (str): The name of the hash index (see `enriched_dictionary_indexes`)
+        keys (list): A list of key tuples in the column order of the index, e.g. `[(project_id, field_name), ...]`
+        qc_context (dict, optional): The memoization context of the run (see `create_qc_context`)
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the matching rows of the enriched data dictionary
+    """
+    enriched_dictionary = get_enriched_dictionary()
+    index = enriched_dictionary['indexes'][index_name]
+    positions = [index[key] for key in keys if key in index]
+
+    if not positions:
+        return enriched_dictionary['table'].iloc[0:0]
+    data_dictionary = enriched_dictionary['table'].iloc[np.sort(np.concatenate(positions))]
+    return check_for_confirmed_correct_fields(data_dictionary, qc_context).reset_index(drop=True)
+
+def operate_missing_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.DataFrame, unioned_super_table: pd.DataFrame, production_mode: bool = False, qc_context: dict = None) -> None: 
     """
     Operates the missing data detection and submission process for a given DataFrame. Finds fields that have been filled out at least once and checks for missing data entries.
 
@@ -2138,22 +3977,16 @@ def operate_missing_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
         merged_data_table (pd.DataFrame): The merged data table containing all data entries for a given project
         data_entry_table (pd.DataFrame): The data entry table containing the inputted data 
         production_mode (bool, optional): A boolean indicating whether to run the function in production mode (default is False)
+        qc_context (dict, optional): The memoization context of the run (see `create_qc_context`)
     
     Returns:
         None
     """
-    data_dictionary = retrieve_data_dictionary()
-    data_dictionary = data_dictionary[['project_id', 'field_name','form_name', 'field_order', 'element_type', 'element_validation_type', 'branching_logic', 'misc']]
-    data_dictionary = data_dictionary.sort_values(by=['project_id', 'form_name', 'field_order'], ignore_index=True)
-    
-    drw_table = get_drw_table()
-    event_arms_table = get_arm_data()
-    event_arms_table = event_arms_table[['project_id', 'event_id', 'event_name', 'form_name', 'custom_repeat_form_label']]
-    data_dictionary = (data_dictionary.merge(event_arms_table, on = ['project_id', 'form_name']))
-
-    data_dictionary = check_for_confirmed_correct_fields(data_dictionary)
+    drw_table = qc_context_get(qc_context, 'drw_table', get_drw_table)
 
-    data_entry_table = (data_entry_table.merge(data_dictionary, on = ['project_id',  'event_id', 'field_name']))
+    # only the enriched data dictionary rows of the entered fields are needed to find the form and event
+    data_entry_keys = list(data_entry_table[['project_id', 'field_name']].drop_duplicates().itertuples(index=False, name=None))
+    data_entry_table = (data_entry_table.merge(lookup_enriched_dictionary('project_field', data_entry_keys, qc_context), on = ['project_id',  'event_id', 'field_name']))
     data_entry_table['instance'] = data_entry_table['instance'].fillna(1).astype(int)
 
     missing_check_dict = {'project_id': None, 'event_id': None, 'form_name': None, 'event_name': None}
@@ -2163,12 +3996,26 @@ def operate_missing_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
     missing_check_dict['form_name'] = data_entry_table['form_name'].unique()[0]
     missing_check_dict['event_name'] = data_entry_table['event_name'].unique()[0]
 
+    data_dictionary = lookup_enriched_dictionary('project_event_form', [(missing_check_dict['project_id'], missing_check_dict['event_id'], missing_check_dict['form_name'])], qc_context)
+
     # only keep fields that are in the merged_data_table (only fields that are filled out at least once are considered)
-    dd_mask = data_dictionary[['project_id', 'event_id', 'field_name']].isin(merged_data_table[['project_id', 'event_id', 'field_name']].to_dict(orient='list')).all(axis=1)
+    # uses the cached record matrix of the project if there is one, otherwise masks the merged_data_table
+    record_matrix_presence = get_record_matrix_presence(missing_check_dict['project_id']) if reads_record_matrix(missing_check_dict['project_id'], merged_data_table) else None
+    if record_matrix_presence is None:
+        dd_mask = data_dictionary[['project_id', 'event_id', 'field_name']].isin(merged_data_table[['project_id', 'event_id', 'field_name']].to_dict(orient='list')).all(axis=1)
+    else:
+        present_events, present_fields = record_matrix_presence
+        dd_mask = ((data_dictionary['project_id'] == missing_check_dict['project_id']) & 
+                   (data_dictionary['event_id'].isin(present_events)) & 
+                   (data_dictionary['field_name'].isin(present_fields)))
     data_dictionary = data_dictionary[dd_mask]
 
-    merged_data_table = merged_data_table[merged_data_table['project_id'] == missing_check_dict['project_id']]
-    merged_data_table = merged_data_table[merged_data_table['event_id'].astype(int) == missing_check_dict['event_id']]
+    if record_matrix_presence is None:
+        merged_data_table = merged_data_table[merged_data_table['project_id'] == missing_check_dict['project_id']]
+        merged_data_table = merged_data_table[merged_data_table['event_id'].astype(int) == missing_check_dict['event_id']]
+    else:
+        form_fields = data_dictionary[data_dictionary['form_name'] == missing_check_dict['form_name']]['field_name']
+        merged_data_table = get_record_matrix_slice(missing_check_dict['project_id'], form_fields, event_id = missing_check_dict['event_id'])
     merged_data_table = (merged_data_table.merge(data_dictionary, on = ['project_id', 'event_id',  'field_name']))
     merged_data_table['instance'] = merged_data_table['instance'].fillna(1).astype(int)
 
@@ -2202,7 +4049,8 @@ def operate_missing_qc(merged_data_table: pd.DataFrame, data_entry_table: pd.Dat
     logging.info(f"Completed missing data detection and submission for form {missing_check_dict['form_name']} in project {missing_check_dict['project_id']} and event {missing_check_dict['event_id']}.")
     return None
 
-def operate_quality_control_individual(data_entry: dict, outlier_method: str = 'Chauvanet', outlier_qc: bool = True, missing_qc: bool = True, routine: bool = False, production_mode: bool = False) -> None:
+@pinned_snapshot()
+def operate_quality_control_individual(data_entry: dict, outlier_method: str = 'Chauvanet', outlier_qc: bool = True, missing_qc: bool = True, routine: bool = False, production_mode: bool = False, data_entry_table: pd.DataFrame = None, qc_context: dict = None) -> None:
     """
     Operates the quality control process on a data entry.
 
@@ -2213,50 +4061,71 @@ def operate_quality_control_individual(data_entry: dict, outlier_method: str = '
         missing_qc (bool, optional): A boolean indicating whether to perform missing data quality control (default is True)
         routine (bool, optional): A boolean indicating whether to perform the quality control routine (default is False)
         production_mode (bool, optional): A boolean indicating whether to run the process in production mode (default is False)
+        data_entry_table (pd.DataFrame, optional): The filtered log entries to check, if several triggers were merged into one run (see `merge_data_entries`)
+        qc_context (dict, optional): The memoization context to use, if the run is part of a batch (default is a new context for this run)
     
     Returns:
         None
     """
     proj_id = data_entry['project_id']
-    data_entry_table = pd.json_normalize(data_entry)
+    completed_records = get_completed_records(proj_id)
+    if str(data_entry.get('pk')) in completed_records:
+        logging.info(f"Record {data_entry.get('pk')} in project {proj_id} has completed the study, skipping QC.")
+        return None
+
+    if data_entry_table is None:
+        data_entry_table = pd.json_normalize(data_entry)
+        if not routine:
+            invalidate_record_matrices(data_entry_table)
+            data_entry_table = filter_log_event_table(data_entry_table)
     if not routine:
-        data_entry_table = filter_log_event_table(data_entry_table)
+        # keeps the cached record matrix of the project current with the logged values
+        update_record_matrix(data_entry_table)
     
     if data_entry_table.empty:
         logging.info(f"No data entries found with proj_id {proj_id}.")
         return None
 
-    data_dictionary = retrieve_data_dictionary()
+    # every table of this run is loaded once, even if several steps need it
+    batch_context = qc_context is not None
+    if not batch_context:
+        qc_context = create_qc_context(f"individual {proj_id}/{data_entry.get('pk')}")
+
+    data_dictionary = qc_context_get(qc_context, 'stored_data_dictionary', retrieve_data_dictionary)
     # check data_dictionary to see if data_entry_table, event_id, and field_name are in the data dictionary
     data_dictionary = data_dictionary[['project_id', 'field_name']]
     data_dictionary = data_dictionary[data_dictionary['project_id'] == proj_id]
     data_entry_table = (data_entry_table.merge(data_dictionary, on = ['project_id', 'field_name']))
 
-
-    log_table_names, data_table_names = get_log_event_and_data_tables(proj_id)
-    data_tables = retrieve_database_table(data_table_names)
-
-    completed_users = retrieve_completed_users()
-    completed_user_list = completed_users[completed_users['project_id'] == proj_id]['record'].to_list()
-
-    # Creates joined table of all redcap_data tables, and filters to only include data from the associated projects
-    merged_data_table = pd.concat(data_tables.values())
-    merged_data_table = merged_data_table[merged_data_table['project_id'].isin([proj_id])]
-    merged_data_table = merged_data_table[~merged_data_table['record'].isin(completed_user_list)]
+    # the data tables only need to be loaded if there is no current record matrix for the project
+    if has_current_record_matrix(proj_id):
+        merged_data_table = None
+    else:
+        log_table_names, data_table_names = get_log_event_and_data_tables(proj_id)
+        data_tables = [qc_context_table(qc_context, data_table_name) for data_table_name in data_table_names]
+
+        # Creates joined table of all redcap_data tables, and filters to only include data from the associated projects
+        merged_data_table = compact_frame(add_numeric_value(pd.concat(data_tables, ignore_index=True)))
+        merged_data_table = merged_data_table[merged_data_table['project_id'].isin([proj_id])]
+        # a stale or expired record matrix is rebuilt from the tables that were just loaded
+        if has_record_matrix(proj_id):
+            refresh_record_matrices([proj_id], merged_data_table)
+        merged_data_table = merged_data_table[~merged_data_table['record'].astype(str).isin(completed_records)]
     
 
-    unioned_super_table = get_unioned_super_table([proj_id])
+    unioned_super_table = get_unioned_super_table([proj_id], qc_context)
 
     if missing_qc:
-        operate_missing_qc(merged_data_table, data_entry_table, unioned_super_table, production_mode)
+        operate_missing_qc(merged_data_table, data_entry_table, unioned_super_table, production_mode, qc_context)
     if outlier_qc:
         # print(data_entry_table)
-        operate_outlier_qc(merged_data_table, data_entry_table, unioned_super_table, outlier_method, production_mode)
-
+        operate_outlier_qc(merged_data_table, data_entry_table, unioned_super_table, outlier_method, production_mode, qc_context)
 
+    if not batch_context:
+        log_qc_context(qc_context)
     return None
 
-def operate_quality_control_routine(data_entry: dict, merged_data_table: pd.DataFrame, unioned_super_table: pd.DataFrame, outlier_method: str = 'Chauvanet', outlier_qc: bool = True, missing_qc: bool = True, routine: bool = False, production_mode: bool = False) -> None:
+def operate_quality_control_routine(data_entry: dict, merged_data_table: pd.DataFrame, unioned_super_table: pd.DataFrame, outlier_method: str = 'Chauvanet', outlier_qc: bool = True, missing_qc: bool = True, routine: bool = False, production_mode: bool = False, qc_context: dict = None) -> None:
     """
     Operates the quality control process on a data entry.
 
@@ -2269,6 +4138,7 @@ def operate_quality_control_routine(data_entry: dict, merged_data_table: pd.Data
         missing_qc (bool, optional): A boolean indicating whether to perform missing data quality control (default is True)
         routine (bool, optional): A boolean indicating whether to perform the quality control routine (default is False)
         production_mode (bool, optional): A boolean indicating whether to run the process in production mode (default is False)
+        qc_context (dict, optional): The memoization context of the sweep (see `create_qc_context`)
 
     Returns:
         None
@@ -2282,27 +4152,27 @@ def operate_quality_control_routine(data_entry: dict, merged_data_table: pd.Data
         logging.info(f"No data entries found with proj_id {proj_id}.")
         return None
 
-    data_dictionary = retrieve_data_dictionary()
+    data_dictionary = qc_context_get(qc_context, 'stored_data_dictionary', retrieve_data_dictionary)
     # check data_dictionary to see if data_entry_table, event_id, and field_name are in the data dictionary
     data_dictionary = data_dictionary[['project_id', 'field_name']]
     data_dictionary = data_dictionary[data_dictionary['project_id'] == proj_id]
     data_entry_table = (data_entry_table.merge(data_dictionary, on = ['project_id', 'field_name']))
 
 
-    completed_users = retrieve_completed_users()
-    completed_user_list = completed_users[completed_users['project_id'] == proj_id]['record'].to_list()
-
     # Creates joined table of all redcap_data tables, and filters to only include data from the associated projects
-    
-    merged_data_table = merged_data_table[merged_data_table['project_id'].isin([proj_id])]
-    merged_data_table = merged_data_table[~merged_data_table['record'].isin(completed_user_list)]
+    # (not needed if the project has a cached record matrix, which already leaves out completed users)
+    if not reads_record_matrix(proj_id, merged_data_table):
+        completed_records = get_completed_records(proj_id)
+
+        merged_data_table = merged_data_table[merged_data_table['project_id'].isin([proj_id])]
+        merged_data_table = merged_data_table[~merged_data_table['record'].astype(str).isin(completed_records)]
     
 
     if missing_qc:
-        operate_missing_qc(merged_data_table, data_entry_table, unioned_super_table, production_mode)
+        operate_missing_qc(merged_data_table, data_entry_table, unioned_super_table, production_mode, qc_context)
     if outlier_qc:
         # print(data_entry_table)
-        operate_outlier_qc(merged_data_table, data_entry_table, unioned_super_table, outlier_method, production_mode)
+        operate_outlier_qc(merged_data_table, data_entry_table, unioned_super_table, outlier_method, production_mode, qc_context)
 
 
     return None
@@ -2312,8 +4182,9 @@ def find_empty_forms(data_dictionary: pd.DataFrame, project_form_event_combos: p
     Finds all empty forms in a given project.
 
     one df (project_form_event_combos) has all the possible field_name and event_id combos. 
-    The other (unioned_data_table) has all the pk, field_name and event_id combos that have been used. 
+    The other (complete_data_table) has all the pk, field_name and event_id combos that have been used. 
     If a pk has a field_name and event_id combo that is not in the used df, then it is missing.
+    All projects are loaded once and compared in a single pass using hashed key lookups.
     
     Args:
         data_dictionary (pd.DataFrame): The data dictionary to use for the process
@@ -2323,52 +4194,53 @@ def find_empty_forms(data_dictionary: pd.DataFrame, project_form_event_combos: p
     Returns:
         list: A list of dataframes containing the missing forms separated by project id
     """    
-    missing_forms_list = []
-
-    completed_users = retrieve_completed_users()
     drw_table = get_drw_table()
 
-    for project_id in pid_list:  
-        
-        unioned_data_table = retrieve_all_data(pid_list)
-        unioned_data_table = unioned_data_table[unioned_data_table['project_id'] == project_id]
-        # display(unioned_data_table)        
-        unioned_data_table = (unioned_data_table.merge(data_dictionary, on = ['project_id', 'event_id', 'field_name']))
-        unioned_data_table = unioned_data_table[['pk', 'project_id', 'event_id', 'form_name', 'field_name', 'field_order']].drop_duplicates()
-        unioned_data_table = unioned_data_table[(unioned_data_table['field_name'].str.contains('_complete', case=False, na=False))]
-        unioned_data_table = unioned_data_table.drop(columns=['form_name']).reset_index(drop=True)
-        unioned_data_table = unioned_data_table.sort_values(by=['pk', 'event_id', 'field_order', 'field_name']).reset_index(drop=True)
+    # loads only the _complete fields of every project at once, reading the cached record matrices if every project has a current one
+    if all(has_current_record_matrix(pid) for pid in pid_list):
+        complete_tables = []
+        for pid in pid_list:
+            present_events, present_fields = get_record_matrix_presence(pid)
+            complete_fields = [field for field in present_fields if '_complete' in field.lower()]
+            complete_tables.append(get_record_matrix_slice(pid, complete_fields))
+        complete_data_table = pd.concat(complete_tables, ignore_index=True).rename(columns={'record': 'pk'})
+        complete_data_table = complete_data_table[complete_data_table['pk'].astype(str).str.isnumeric()]
+        complete_data_table = complete_data_table.astype({'project_id': int, 'event_id': int, 'pk': int, 'instance': int, 'field_name': str})
+    else:
+        complete_data_table = retrieve_complete_field_data(pid_list)
+    complete_data_table = complete_data_table.merge(data_dictionary[['project_id', 'event_id', 'field_name']].drop_duplicates(), on = ['project_id', 'event_id', 'field_name'])
+    complete_data_table = complete_data_table[['pk', 'project_id', 'event_id', 'field_name']].drop_duplicates().reset_index(drop=True)
 
-        for index, row in unioned_data_table.iterrows():
-            if (project_id, row['pk']) in completed_users:
-                unioned_data_table.drop(index, inplace=True)
+    # anti-join against the users who have completed the study
+    completed_users = [(int(pid), int(record)) for pid in pid_list for record in get_completed_records(pid) if record.isnumeric()]
+    completed_keys = pd.MultiIndex.from_arrays([[pid for pid, record in completed_users], [record for pid, record in completed_users]])
+    completed_mask = pd.MultiIndex.from_frame(complete_data_table[['project_id', 'pk']]).isin(completed_keys)
+    complete_data_table = complete_data_table[~completed_mask].reset_index(drop=True)
 
+    # every possible (pk, event, form) combination for each project
+    project_pks = complete_data_table[['project_id', 'pk']].drop_duplicates()
+    missing_forms = project_form_event_combos[project_form_event_combos['project_id'].isin(pid_list)]
+    missing_forms = missing_forms[['project_id', 'event_id', 'form_name', 'field_name']].merge(project_pks, on = 'project_id')
 
+    form_keys = ['project_id', 'pk', 'event_id', 'field_name']
+    event_keys = ['project_id', 'pk', 'event_id']
 
-        temp_project_form_event_combos = project_form_event_combos[project_form_event_combos['project_id'] == project_id]
-        
-        pk_list = unioned_data_table['pk'].unique().tolist()
-        temp_project_form_event_combos['pk'] = np.nan
-        temp_project_form_event_combos = temp_project_form_event_combos.assign(pk=[pk_list] * len(temp_project_form_event_combos))
-        temp_project_form_event_combos = temp_project_form_event_combos.explode('pk').reset_index(drop=True)
-        
+    # set difference between possible and used combinations marks the missing forms
+    missing_forms['missing_form'] = ~pd.MultiIndex.from_frame(missing_forms[form_keys]).isin(pd.MultiIndex.from_frame(complete_data_table[form_keys]))
 
-        # join so all possible combinations are present, then filter out the ones that are actually present in the data
-        temp_missing_forms = (temp_project_form_event_combos.merge(unioned_data_table, on=['project_id', 'event_id', 'field_name', 'pk'], how='left', indicator=True))
-        temp_missing_forms['missing_form'] = (temp_missing_forms['_merge'] == 'left_only')
-        temp_missing_forms = temp_missing_forms[['pk', 'project_id', 'event_id', 'form_name', 'field_name', 'missing_form']].reset_index(drop=True)
+    # marks forms where the pk does not have matches at all for the event
+    missing_forms['pk_missing_event'] = ~pd.MultiIndex.from_frame(missing_forms[event_keys]).isin(pd.MultiIndex.from_frame(complete_data_table[event_keys]))
 
-        # marks forms where the pk does not have matches at all for the event
-        temp_missing_forms = temp_missing_forms.merge(unioned_data_table, left_on=['pk', 'project_id', 'event_id'], right_on=['pk', 'project_id', 'event_id'], how='left', indicator=True)
-        temp_missing_forms['pk_missing_event'] = (temp_missing_forms['_merge'] == 'left_only')
-        temp_missing_forms = temp_missing_forms[['pk', 'project_id', 'event_id', 'form_name', 'field_name_x', 'missing_form', 'pk_missing_event']].drop_duplicates().reset_index(drop=True)
+    # marks forms that exist in the drw table
+    drw_keys = pd.MultiIndex.from_frame(drw_table[['project_id', 'record', 'event_id', 'field_name']])
+    missing_forms['drw_exists'] = pd.MultiIndex.from_frame(missing_forms[form_keys]).isin(drw_keys)
 
-        # marks forms that exist in the drw table
-        temp_missing_forms = temp_missing_forms.merge(drw_table, left_on=['pk', 'project_id', 'event_id', 'field_name_x'], right_on=['record', 'project_id', 'event_id', 'field_name'], how='left', indicator=True)
-        temp_missing_forms['drw_exists'] = (temp_missing_forms['_merge'] == 'both')
-        temp_missing_forms = temp_missing_forms[['pk', 'project_id', 'event_id', 'form_name', 'field_name_x', 'missing_form', 'pk_missing_event', 'drw_exists']].reset_index(drop=True)
+    missing_forms = missing_forms.rename(columns={'field_name': 'field_name_x'})
+    missing_forms = missing_forms[['pk', 'project_id', 'event_id', 'form_name', 'field_name_x', 'missing_form', 'pk_missing_event', 'drw_exists']]
 
-        missing_forms_list.append(temp_missing_forms)
+    # one frame per requested project in pid_list order, empty if the project has no missing forms
+    project_groups = dict(list(missing_forms.groupby('project_id', sort=False)))
+    missing_forms_list = [project_groups.get(pid, missing_forms.iloc[0:0]).reset_index(drop=True) for pid in pid_list]
     
     return missing_forms_list
 
@@ -2399,18 +4271,7 @@ def filter_missing_forms(pid_list: list, ping: bool = True, production_mode: boo
 
     if run_empty_forms:
 
-        data_dictionary = retrieve_data_dictionary()
-        data_dictionary = data_dictionary[['project_id', 'field_name','form_name', 'field_order', 'element_type', 'element_validation_type', 'branching_logic', 'misc']]
-
-        project_table = retrieve_project_data()
-        project_table = project_table[['project_id', 'investigators']]
-
-        event_arms_table = get_arm_data()
-        event_arms_table = event_arms_table[['project_id', 'event_id', 'event_name', 'form_name', 'custom_repeat_form_label']]
-        data_dictionary = (data_dictionary.merge(event_arms_table, on = ['project_id', 'form_name']))
-        data_dictionary = (data_dictionary.merge(project_table, on = ['project_id']))
-
-        data_dictionary = check_for_confirmed_correct_fields(data_dictionary)
+        data_dictionary = check_for_confirmed_correct_fields(get_enriched_dictionary()['table'])
 
         # data_dictionary = data_dictionary[data_dictionary['investigators'] == 'auto']
         data_dictionary = data_dictionary.sort_values(by=['project_id', 'field_order', 'event_id', 'form_name'], ignore_index=True)
@@ -2422,11 +4283,12 @@ def filter_missing_forms(pid_list: list, ping: bool = True, production_mode: boo
 
         missing_forms_list = find_empty_forms(data_dictionary, project_form_event_combos, pid_list)
 
-        unioned_super_table = get_unioned_super_table(pid_list)
+        unioned_super_table = get_provenance_table(pid_list)
 
         # if the event has entries, any empty forms are considered missing, except forms that have not been filled out yet by anyone
         # if someone has not filled out any form in that event, then it is not considered missing
         for i, missing_forms_project in enumerate(missing_forms_list):
+            yield_to_realtime_qc()
             filled_event_forms = set(missing_forms_project[missing_forms_project['missing_form'] == False][['event_id', 'form_name']].drop_duplicates().itertuples(index=False, name=None))
             
             with open('stored_data/drw_entries.csv', 'a', newline='') as file:
@@ -2456,34 +4318,28 @@ def check_for_all_outliers(pid_list: list, outlier_method = 'Chauvanet', alert_t
         None
     """
 
-    data_dictionary = retrieve_data_dictionary()
-    data_dictionary = data_dictionary[['project_id', 'field_name','form_name', 'field_order', 'element_type', 'element_validation_type', 'branching_logic', 'misc']]
-
-    project_table = retrieve_project_data()
-    project_table = project_table[['project_id', 'investigators']]
-
-    event_arms_table = get_arm_data()
-    event_arms_table = event_arms_table[['project_id', 'event_id', 'event_name', 'form_name', 'custom_repeat_form_label']]
-    data_dictionary = (data_dictionary.merge(event_arms_table, on = ['project_id', 'form_name']))
-    data_dictionary = (data_dictionary.merge(project_table, on = ['project_id']))
+    data_dictionary = get_enriched_dictionary()['table']
     data_dictionary = data_dictionary[data_dictionary['project_id'].isin(pid_list)]
-
     data_dictionary = check_for_confirmed_correct_fields(data_dictionary)
     data_dictionary = data_dictionary.sort_values(by=['project_id', 'event_id', 'form_name'], ignore_index=True) 
 
     data_dictionary = data_dictionary[(data_dictionary['element_validation_type'] == 'int') | (data_dictionary['element_validation_type'] == 'float')]
     project_field_combos = data_dictionary[['project_id', 'field_name']].drop_duplicates().reset_index(drop=True)
 
-    unioned_super_table = get_unioned_super_table(pid_list)
+    unioned_super_table = get_provenance_table(pid_list)
 
-    data_table_names = []
-    for pid in pid_list:
-        log_table_name, data_table_name = get_log_event_and_data_tables(pid)
-        for data_table in data_table_name:
-            data_table_names.append(data_table)
+    # the data tables only need to be loaded if a project has no current record matrix
+    if all(has_current_record_matrix(pid) for pid in pid_list):
+        merged_data_table = None
+    else:
+        data_table_names = []
+        for pid in pid_list:
+            log_table_name, data_table_name = get_log_event_and_data_tables(pid)
+            for data_table in data_table_name:
+                data_table_names.append(data_table)
 
-    data_tables = retrieve_database_table(data_table_names)
-    merged_data_table = pd.concat(data_tables.values())
+        data_tables = retrieve_database_table(data_table_names)
+        merged_data_table = compact_frame(add_numeric_value(pd.concat(data_tables.values(), ignore_index=True)))
 
     redcap_data = {
         'log_event_id': None,
@@ -2509,6 +4365,7 @@ def check_for_all_outliers(pid_list: list, outlier_method = 'Chauvanet', alert_t
     # reverse order so that the most recent projects are checked first
     # project_field_combos = project_field_combos[::-1].reset_index(drop=True)
 
+    field_count = len(project_field_combos)
     outlier_file_name = 'stored_data/last_checked_outlier.log'
     missing_file_name = 'stored_data/last_checked_missing.log'
     run_outlier = False
@@ -2521,6 +4378,9 @@ def check_for_all_outliers(pid_list: list, outlier_method = 'Chauvanet', alert_t
             run_outlier = True
 
     if run_outlier:
+        # the sweep only writes to drw_entries.csv, so the tables it reads are loaded once for the whole sweep
+        qc_context = create_qc_context('outlier sweep')
+
         # remove fields that have already been checked this cycle
         try:
             if last_checked_outlier != 'Finished':
@@ -2537,12 +4397,15 @@ def check_for_all_outliers(pid_list: list, outlier_method = 'Chauvanet', alert_t
 
 
         for _, row in project_field_combos.iterrows():
+            # real-time QC runs first, the sweep continues from this field afterwards
+            yield_to_realtime_qc()
             redcap_data['project_id'] = row['project_id']
             redcap_data['field_name'] = row['field_name']
 
-            operate_quality_control_routine(redcap_data, merged_data_table, unioned_super_table, outlier_method, outlier_qc = True, missing_qc = False, routine=True, production_mode=production_mode)
+            operate_quality_control_routine(redcap_data, merged_data_table, unioned_super_table, outlier_method, outlier_qc = True, missing_qc = False, routine=True, production_mode=production_mode, qc_context=qc_context)
 
             set_last_checked(outlier_file_name, f"{row['project_id']} {row['field_name']}")
+            report_progress(f"Checking outliers: {row['project_id']} {row['field_name']} ({_ + 1} of {field_count})")
 
             status_id_count_now = get_current_drw_count()
             if (((status_id_count_now - status_id_count) > alert_threshold) and (not alert_sent)):
@@ -2551,6 +4414,7 @@ def check_for_all_outliers(pid_list: list, outlier_method = 'Chauvanet', alert_t
             
             gc.collect()
         set_last_checked(outlier_file_name, f"Finished")
+        log_qc_context(qc_context)
     logging.info("All outlier data entries have been checked.")
     return None
     
@@ -2567,18 +4431,8 @@ def check_for_all_missing(pid_list: list, alert_threshold: int = 100, ping: bool
     Returns:
         None
     """
-    data_dictionary = retrieve_data_dictionary()
-    data_dictionary = data_dictionary[['project_id', 'field_name','form_name', 'field_order', 'element_type', 'element_validation_type', 'branching_logic', 'misc']]
-
-    project_table = retrieve_project_data()
-    project_table = project_table[['project_id', 'investigators']]
-
-    event_arms_table = get_arm_data()
-    event_arms_table = event_arms_table[['project_id', 'event_id', 'event_name', 'form_name', 'custom_repeat_form_label']]
-    data_dictionary = (data_dictionary.merge(event_arms_table, on = ['project_id', 'form_name']))
-    data_dictionary = (data_dictionary.merge(project_table, on = ['project_id']))
+    data_dictionary = get_enriched_dictionary()['table']
     data_dictionary = data_dictionary[data_dictionary['project_id'].isin(pid_list)]
-
     data_dictionary = check_for_confirmed_correct_fields(data_dictionary)
     data_dictionary = data_dictionary.sort_values(by=['project_id', 'event_id', 'form_name'], ignore_index=True) 
     project_form_event_combos = data_dictionary[['project_id', 'event_id', 'form_name', 'field_name']].drop_duplicates()
@@ -2587,16 +4441,20 @@ def check_for_all_missing(pid_list: list, alert_threshold: int = 100, ping: bool
     project_form_event_combos = project_form_event_combos[(project_form_event_combos['field_name'].str.contains('_complete', case=False, na=False))]
     project_form_event_combos = project_form_event_combos.drop(columns=['form_name'])
 
-    unioned_super_table = get_unioned_super_table(pid_list)
+    unioned_super_table = get_provenance_table(pid_list)
 
-    data_table_names = []
-    for pid in pid_list:
-        log_table_name, data_table_name = get_log_event_and_data_tables(pid)
-        for data_table in data_table_name:
-            data_table_names.append(data_table)
+    # the data tables only need to be loaded if a project has no current record matrix
+    if all(has_current_record_matrix(pid) for pid in pid_list):
+        merged_data_table = None
+    else:
+        data_table_names = []
+        for pid in pid_list:
+            log_table_name, data_table_name = get_log_event_and_data_tables(pid)
+            for data_table in data_table_name:
+                data_table_names.append(data_table)
 
-    data_tables = retrieve_database_table(data_table_names)
-    merged_data_table = pd.concat(data_tables.values())
+        data_tables = retrieve_database_table(data_table_names)
+        merged_data_table = compact_frame(add_numeric_value(pd.concat(data_tables.values(), ignore_index=True)))
 
     redcap_data = {
         'log_event_id': None,
@@ -2622,8 +4480,12 @@ def check_for_all_missing(pid_list: list, alert_threshold: int = 100, ping: bool
 
     # reverse order so that the most recent projects are checked first
     project_form_event_combos = project_form_event_combos[::-1].reset_index(drop=True)
+    form_count = len(project_form_event_combos)
     file_name = 'stored_data/last_checked_missing.log'
 
+    # the sweep only writes to drw_entries.csv, so the tables it reads are loaded once for the whole sweep
+    qc_context = create_qc_context('missing sweep')
+
     with open(file_name, 'r') as f:
         last_checked_form = f.read()
 
@@ -2645,13 +4507,16 @@ def check_for_all_missing(pid_list: list, alert_threshold: int = 100, ping: bool
         pass
 
     for _, row in project_form_event_combos.iterrows():
+        # real-time QC runs first, the sweep continues from this form afterwards
+        yield_to_realtime_qc()
         redcap_data['project_id'] = row['project_id']
         redcap_data['event_id'] = row['event_id']
         redcap_data['field_name'] = row['field_name']
         redcap_data['instance'] = 1
-        operate_quality_control_routine(redcap_data, merged_data_table, unioned_super_table, outlier_method = '', outlier_qc = False, missing_qc = True, routine=True, production_mode=production_mode)
+        operate_quality_control_routine(redcap_data, merged_data_table, unioned_super_table, outlier_method = '', outlier_qc = False, missing_qc = True, routine=True, production_mode=production_mode, qc_context=qc_context)
 
         set_last_checked(file_name, f"{row['project_id']} {row['event_id']} {row['field_name']}")
+        report_progress(f"Checking missing data: {row['project_id']} {row['event_id']} {row['field_name']} ({_ + 1} of {form_count})")
 
         status_id_count_now = get_current_drw_count()
         if (((status_id_count_now - status_id_count) > alert_threshold) and (not alert_sent)):
@@ -2660,6 +4525,7 @@ def check_for_all_missing(pid_list: list, alert_threshold: int = 100, ping: bool
 
         gc.collect()
     set_last_checked(file_name, f"Finished")
+    log_qc_context(qc_context)
     logging.info("All missing data entries have been checked.")
     return None
     
@@ -2677,15 +4543,1282 @@ def check_for_all_outlier_and_missing(pid_list: list, outlier_method: str = 'Cha
     Returns:
         None
     """
-    refresh_all_stored_data()
-    check_drw_enabled(pid_list)
-    if production_mode:
-        resolve_open_queries(pid_list)
-    filter_missing_forms(pid_list, ping, production_mode)
-    with open('stored_data/last_routine.log', 'w') as file:
-        file.write(f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    check_for_all_outliers(pid_list, outlier_method, alert_threshold, ping, production_mode)
-    check_for_all_missing(pid_list, alert_threshold, ping, production_mode)
-    if production_mode:
-        submit_stored_drw_entries(alert_threshold, production_mode)
+    report_progress('Refreshing stored data')
+    refresh_all_stored_data(pid_list=pid_list)
+    # the whole sweep reads the generation that was just published
+    with pinned_snapshot():
+        report_progress('Refreshing record matrices')
+        refresh_record_matrices(pid_list)
+        check_drw_enabled(pid_list)
+        if production_mode:
+            report_progress('Resolving open queries')
+            resolve_open_queries(pid_list)
+        report_progress('Checking missing forms')
+        filter_missing_forms(pid_list, ping, production_mode)
+        with open('stored_data/last_routine.log', 'w') as file:
+            file.write(f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        check_for_all_outliers(pid_list, outlier_method, alert_threshold, ping, production_mode)
+        check_for_all_missing(pid_list, alert_threshold, ping, production_mode)
+        if production_mode:
+            report_progress('Submitting stored DRW entries')
+            submit_stored_drw_entries(alert_threshold, production_mode)
+    return None
+
+def run_qc_worker() -> None:
+    """
+    Runs queued QC jobs one at a time until the process exits. Errors are logged and emailed so one failing job does not stop the worker.
+
+    Returns:
+        None
+    """
+    global qc_realtime_active, qc_realtime_running
+
+    while True:
+        priority, _, queued_at, target, kwargs, journal_ids = qc_job_queue.get()
+        with qc_queue_metrics_lock:
+            qc_queue_metrics['running'] += 1
+            if priority == qc_priority_realtime:
+                qc_realtime_running += 1
+        try:
+            target(**kwargs)
+            outcome = 'completed'
+        except Exception as e:
+            outcome = 'failed'
+            logging.info(f"Error in QC job {target.__name__}: {e}\n{traceback.format_exc()}")
+            send_error_email(message=f"Error in QC job {target.__name__}: {e} with data: {kwargs}")
+        finally:
+            with qc_queue_metrics_lock:
+                qc_queue_metrics['running'] -= 1
+                qc_queue_metrics[outcome] += 1
+                if priority == qc_priority_realtime:
+                    latency = time.monotonic() - queued_at
+                    qc_realtime_latencies.append(latency)
+                    if latency > qc_realtime_slo_seconds:
+                        qc_queue_metrics['slo_breaches'] += 1
+                        logging.info(f"Real-time QC job {target.__name__} took {latency:.1f}s from queued to finished (target {qc_realtime_slo_seconds}s).")
+                    qc_realtime_running -= 1
+                    qc_realtime_active -= 1
+                    if qc_realtime_active == 0:
+                        qc_realtime_idle.notify_all()
+            update_realtime_marker()
+            # failed jobs are emailed instead of being replayed after a restart
+            mark_journal_done(journal_ids)
+            qc_job_queue.task_done()
+
+def start_qc_workers(num_workers: int = 4, max_queue: int = 500) -> None:
+    """
+    Starts the worker threads that run queued QC jobs (see `enqueue_qc_job`), so a burst of triggers never runs more than `num_workers` QC jobs at once.
+    Queued real-time jobs always run before queued sweep jobs. Does nothing if the workers are already running.
+
+    Args:
+        num_workers (int, optional): The number of worker threads (default is 4)
+        max_queue (int, optional): The number of jobs that can wait in the queue before new jobs are rejected (default is 500)
+
+    Returns:
+        None
+    """
+    global qc_job_queue, qc_realtime_live_file
+
+    if qc_job_queue is not None:
+        return None
+    os.makedirs(qc_realtime_dir, exist_ok=True)
+    qc_realtime_live_file = open(os.path.join(qc_realtime_dir, f'qc-{os.getpid()}.lock'), 'a+')
+    try_lock_file(qc_realtime_live_file)
+    qc_job_queue = queue.PriorityQueue(maxsize=max_queue)
+    for worker_number in range(num_workers):
+        worker = threading.Thread(target=run_qc_worker, name=f'qc-worker-{worker_number}', daemon=True)
+        worker.start()
+        qc_worker_threads.append(worker)
+    logging.info(f"Started {num_workers} QC workers with a queue of {max_queue} jobs.")
+    return None
+
+def enqueue_qc_job(target, journal_ids: list = None, priority: int = qc_priority_realtime, **kwargs) -> bool:
+    """
+    Queues a QC job for the worker threads without waiting for it to run.
+    Dropped jobs stay open in the ingest journal, so they are replayed when the app restarts.
+
+    Args:
+        target (callable): The function to run, e.g. `operate_quality_control_individual`
+        journal_ids (list, optional): The ids of the journaled events the job processes (see `append_journal_event`)
+        priority (int, optional): `qc_priority_realtime` or `qc_priority_sweep` (default is real-time)
+        **kwargs: The keyword arguments of the function
+
+    Returns:
+        bool: True if the job was queued, False if the queue is full (the job is dropped and logged)
+    """
+    global qc_realtime_active
+
+    if qc_job_queue is None:
+        start_qc_workers()
+    # counted before it is queued, so the sweep already yields while it waits for a worker
+    if priority == qc_priority_realtime:
+        with qc_queue_metrics_lock:
+            qc_realtime_active += 1
+        update_realtime_marker()
+    try:
+        qc_job_queue.put_nowait((priority, next(qc_job_sequence), time.monotonic(), target, kwargs, journal_ids or []))
+    except queue.Full:
+        if priority == qc_priority_realtime:
+            with qc_queue_metrics_lock:
+                qc_realtime_active -= 1
+                if qc_realtime_active == 0:
+                    qc_realtime_idle.notify_all()
+            update_realtime_marker()
+        with qc_queue_metrics_lock:
+            qc_queue_metrics['rejected'] += 1
+        logging.info(f"QC queue is full ({qc_job_queue.maxsize} jobs), dropped {target.__name__} job with data: {kwargs}")
+        return False
+
+    with qc_queue_metrics_lock:
+        qc_queue_metrics['enqueued'] += 1
+        qc_queue_metrics['max_depth'] = max(qc_queue_metrics['max_depth'], qc_job_queue.qsize())
+    return True
+
+def get_qc_queue_metrics() -> dict:
+    """
+    Retrieves the current depth and the counters of the QC queue, and the real-time latency against its target.
+
+    Returns:
+        dict: The queue metrics, formatted as follows: `{'depth': int, 'capacity': int, 'workers': int, 'running': int, 'enqueued': int, 'rejected': int, 'completed': int, 'failed': int, 'max_depth': int, 
+              'realtime_active': int, 'realtime_p95': float | None, 'slo_seconds': int, 'slo_breaches': int, 'sweep_yields': int, 
+              'shed': int, 'deferred': int, 'deferred_backlog': int, 'db_ratio': float}`
+    """
+    with qc_queue_metrics_lock:
+        metrics = dict(qc_queue_metrics)
+        metrics['realtime_active'] = qc_realtime_active
+        latencies = sorted(qc_realtime_latencies)
+    metrics['realtime_p95'] = round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None
+    metrics['slo_seconds'] = qc_realtime_slo_seconds
+    metrics['depth'] = qc_job_queue.qsize() if qc_job_queue is not None else 0
+    metrics['capacity'] = qc_job_queue.maxsize if qc_job_queue is not None else 0
+    metrics['workers'] = sum(worker.is_alive() for worker in qc_worker_threads)
+    metrics['deferred_backlog'] = len(qc_deferred_jobs) + qc_deferred_spilled
+    metrics['db_ratio'] = round(qc_admission_db_ratio, 2)
+    return metrics
+
+def update_realtime_marker() -> None:
+    """
+    Creates the marker file of this process in `qc_realtime_dir` while real-time QC jobs are queued, running or held for their quiet window,
+    and removes it once there are none, so a sweep running in another worker process yields to them (see `yield_to_realtime_qc`).
+
+    Returns:
+        None
+    """
+    global qc_realtime_marked
+
+    with qc_realtime_marker_lock:
+        active = qc_realtime_active > 0 or bool(qc_pending_bursts)
+        if active == qc_realtime_marked:
+            return None
+        marker_path = os.path.join(qc_realtime_dir, f'qc-{os.getpid()}.active')
+        try:
+            if active:
+                os.makedirs(qc_realtime_dir, exist_ok=True)
+                open(marker_path, 'w').close()
+            else:
+                os.remove(marker_path)
+            qc_realtime_marked = active
+        except OSError as e:
+            logging.info(f"Could not update the real-time QC marker {marker_path}: {e}")
+    return None
+
+def is_realtime_active_elsewhere() -> bool:
+    """
+    Checks whether another live worker process has real-time QC in flight (see `update_realtime_marker`).
+    Markers left by stopped processes are ignored, since their lock file is no longer held.
+
+    Returns:
+        bool: True if another process has real-time QC jobs queued, running or held
+    """
+    try:
+        marker_names = [name for name in os.listdir(qc_realtime_dir) if name.endswith('.active') and name != f'qc-{os.getpid()}.active']
+    except OSError:
+        return False
+    for marker_name in marker_names:
+        with open(os.path.join(qc_realtime_dir, marker_name.replace('.active', '.lock')), 'a+') as live_file:
+            if not try_lock_file(live_file):
+                return True
+            unlock_file(live_file)
+    return False
+
+def yield_to_realtime_qc(in_worker: bool = False) -> None:
+    """
+    Waits while real-time QC jobs are queued, running or held for their quiet window in this or another worker process, so the routine sweep does not delay them.
+    Called by the sweep between fields and forms. The sweep keeps its place (and its checkpoint in the last_checked files), 
+    so it resumes where it stopped. The sweep earns waiting time as it runs, `qc_sweep_yield_share` of its running time up to `qc_sweep_max_yield` seconds,
+    and waits only as long as it has earned, so under a constant stream of triggers it still runs at least half of the time (with the default share).
+
+    Args:
+        in_worker (bool, optional): True when called from a QC worker thread (a replayed batch), which only waits for real-time jobs running in the other workers,
+                                    since the queued ones may be waiting for this very worker (default is False)
+
+    Returns:
+        None
+    """
+    def realtime_busy() -> bool:
+        if in_worker:
+            local_busy = qc_realtime_running > 0
+        else:
+            local_busy = qc_realtime_active > 0 or bool(qc_pending_bursts)
+        return local_busy or is_realtime_active_elsewhere()
+
+    # the time worked since the last call earns waiting time, in the ratio of qc_sweep_yield_share
+    start = time.monotonic()
+    last_call = getattr(qc_sweep_yield_local, 'last_call', start)
+    budget = getattr(qc_sweep_yield_local, 'budget', 0.0) + (start - last_call) * qc_sweep_yield_share / (1 - qc_sweep_yield_share)
+    budget = min(budget, qc_sweep_max_yield)
+
+    with qc_realtime_idle:
+        if budget > 0 and realtime_busy():
+            qc_queue_metrics['sweep_yields'] += 1
+            while realtime_busy() and (time.monotonic() - start) < budget:
+                # held bursts and other processes are not notified, so they are rechecked every second
+                qc_realtime_idle.wait(timeout=min(1, max(budget - (time.monotonic() - start), 0.01)))
+
+    waited = time.monotonic() - start
+    qc_sweep_yield_local.budget = max(budget - waited, 0.0)
+    qc_sweep_yield_local.last_call = time.monotonic()
+    if waited >= 1:
+        logging.info(f"{'Replayed batch' if in_worker else 'Sweep'} yielded {waited:.1f}s to real-time QC.")
+    return None
+
+def get_coalesce_key(data_entry: dict) -> tuple:
+    """
+    Returns the key that groups the triggers of one form save: the project, record, event and repeat instance of the log entry.
+
+    Args:
+        data_entry (dict): The log entry received from the trigger
+
+    Returns:
+        tuple: The key, formatted as follows: `(project_id, pk, event_id, instance)`
+    """
+    instance = 1
+    data_values = data_entry.get('data_values') or ''
+    if data_values.startswith('[instance = '):
+        instance = int(data_values.split(']')[0].split('=')[1])
+    return (data_entry.get('project_id'), str(data_entry.get('pk')), data_entry.get('event_id'), instance)
+
+def merge_data_entries(data_entries: list) -> pd.DataFrame:
+    """
+    Merges the log entries of one burst into a single data entry table, keeping the latest value of each field.
+
+    Args:
+        data_entries (list): The log entries of the burst, in the order they were received
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame in the format of `filter_log_event_table`
+    """
+    log_event_table = pd.json_normalize(data_entries)
+    invalidate_record_matrices(log_event_table)
+    data_entry_table = filter_log_event_table(log_event_table)
+    if data_entry_table.empty:
+        return data_entry_table
+    data_entry_table = data_entry_table.sort_values('log_event_id', kind='stable')
+    data_entry_table = data_entry_table.drop_duplicates(subset=['field_name'], keep='last').reset_index(drop=True)
+    return data_entry_table
+
+def coalesce_qc_entry(data_entry: dict, journal_id: str = None, **kwargs) -> bool:
+    """
+    Holds a triggered log entry until no other trigger for the same record, event and instance arrives within the quiet window,
+    so a burst of saves runs one QC job (see `start_qc_coalescer`). Without a quiet window, the entry is queued right away.
+
+    Args:
+        data_entry (dict): The log entry received from the trigger
+        journal_id (str, optional): The id of the entry in the ingest journal (see `append_journal_event`)
+        **kwargs: The keyword arguments of `operate_quality_control_individual` besides the data entry
+
+    Returns:
+        bool: True if the entry was held or queued, False if the QC queue is full or `qc_max_pending_bursts` bursts are already held
+    """
+    journal_ids = [journal_id] if journal_id is not None else []
+    if qc_quiet_window <= 0:
+        return enqueue_qc_job(operate_quality_control_individual, journal_ids = journal_ids, data_entry = data_entry, **kwargs)
+
+    key = get_coalesce_key(data_entry)
+    now = time.monotonic()
+    with qc_pending_lock:
+        burst = qc_pending_bursts.get(key)
+        if burst is None and len(qc_pending_bursts) >= qc_max_pending_bursts:
+            with qc_queue_metrics_lock:
+                qc_queue_metrics['rejected'] += 1
+            logging.info(f"{len(qc_pending_bursts)} bursts are held for their quiet window, rejected trigger for {key}")
+            return False
+        if burst is None:
+            qc_pending_bursts[key] = {'entries': [data_entry], 'journal_ids': journal_ids, 'first_seen': now, 'last_seen': now, 'kwargs': kwargs}
+        else:
+            burst['entries'].append(data_entry)
+            burst['journal_ids'].extend(journal_ids)
+            burst['last_seen'] = now
+            burst['kwargs'] = kwargs
+            with qc_queue_metrics_lock:
+                qc_queue_metrics['coalesced'] += 1
+    update_realtime_marker()
+    return True
+
+def dispatch_quiet_bursts(flush: bool = False) -> None:
+    """
+    Queues one QC job for each held burst whose quiet window has passed (or that was held for `qc_coalesce_max_wait`).
+    A burst the full QC queue rejects is held again and retried on the next check, since its triggers were already acknowledged.
+
+    Args:
+        flush (bool, optional): If True, queues every held burst regardless of its window (default is False)
+
+    Returns:
+        None
+    """
+    now = time.monotonic()
+    with qc_pending_lock:
+        ready_keys = [key for key, burst in qc_pending_bursts.items() 
+                      if flush or (now - burst['last_seen'] >= qc_quiet_window) or (now - burst['first_seen'] >= qc_coalesce_max_wait)]
+        ready_bursts = [qc_pending_bursts.pop(key) for key in ready_keys]
+
+    for key, burst in zip(ready_keys, ready_bursts):
+        entries = burst['entries']
+        if len(entries) == 1:
+            queued = enqueue_qc_job(operate_quality_control_individual, journal_ids = burst['journal_ids'], data_entry = entries[0], **burst['kwargs'])
+        else:
+            queued = enqueue_qc_job(operate_quality_control_individual, journal_ids = burst['journal_ids'], data_entry = entries[-1], data_entry_table = merge_data_entries(entries), **burst['kwargs'])
+            if queued:
+                logging.info(f"Coalesced {len(entries)} triggers for {get_coalesce_key(entries[-1])} into one QC job.")
+        if queued:
+            continue
+
+        # held again in front of any triggers for the same record that arrived in the meantime
+        with qc_pending_lock:
+            newer_burst = qc_pending_bursts.get(key)
+            if newer_burst is not None:
+                burst['entries'] += newer_burst['entries']
+                burst['journal_ids'] += newer_burst['journal_ids']
+                burst['last_seen'] = newer_burst['last_seen']
+                burst['kwargs'] = newer_burst['kwargs']
+            qc_pending_bursts[key] = burst
+        with qc_queue_metrics_lock:
+            qc_queue_metrics['burst_retries'] += 1
+    update_realtime_marker()
+    return None
+
+def run_qc_coalescer() -> None:
+    """
+    Checks the held bursts for passed quiet windows until the process exits.
+
+    Returns:
+        None
+    """
+    while True:
+        time.sleep(min(qc_quiet_window / 4, 1))
+        try:
+            dispatch_quiet_bursts()
+        except Exception as e:
+            logging.info(f"Error dispatching coalesced QC jobs: {e}\n{traceback.format_exc()}")
+
+def start_qc_coalescer(quiet_window: float = 5, max_wait: float = 60, max_pending: int = 1000) -> None:
+    """
+    Starts coalescing triggers: triggers for the same (project_id, pk, event_id, instance) are held until none arrived for `quiet_window` seconds,
+    then their values are merged and one QC job is queued. Does nothing if the window is 0 or the coalescer is already running.
+
+    Args:
+        quiet_window (float, optional): The seconds without a new trigger before a burst is run (default is 5)
+        max_wait (float, optional): The seconds a burst is held at most (default is 60)
+        max_pending (int, optional): The number of bursts held at most (default is 1000)
+
+    Returns:
+        None
+    """
+    global qc_quiet_window, qc_coalesce_max_wait, qc_max_pending_bursts
+
+    if quiet_window <= 0 or qc_quiet_window > 0:
+        return None
+    qc_quiet_window = quiet_window
+    qc_coalesce_max_wait = max_wait
+    qc_max_pending_bursts = max_pending
+    threading.Thread(target=run_qc_coalescer, name='qc-coalescer', daemon=True).start()
+    logging.info(f"Coalescing QC triggers within a quiet window of {quiet_window}s.")
+    return None
+
+def load_ingest_seen_ids() -> tuple[dict, dict]:
+    """
+    Reads the most recent log_event_ids and the floors persisted by this and other worker processes.
+
+    Returns:
+        tuple[dict, dict]: The persisted log_event_ids per log table, formatted as follows: `{'redcap_log_event': [int, ...], ...}`, 
+                           and the floor of each log table, formatted as follows: `{'redcap_log_event': int, ...}`
+    """
+    if not os.path.exists(ingest_seen_path):
+        return {}, {}
+    try:
+        with open(ingest_seen_path, 'r') as file:
+            persisted = json.load(file)
+    except (ValueError, OSError) as e:
+        logging.info(f"Could not read {ingest_seen_path}: {e}")
+        return {}, {}
+    # files written before the floors were persisted only hold the ids
+    if 'ids' not in persisted:
+        persisted = {'ids': persisted, 'floors': {}}
+    seen_ids = {table_name: [int(log_event_id) for log_event_id in log_event_ids] for table_name, log_event_ids in persisted['ids'].items()}
+    floors = {table_name: int(floor) for table_name, floor in persisted['floors'].items()}
+    return seen_ids, floors
+
+def save_ingest_seen_ids() -> None:
+    """
+    Writes the most recent log_event_ids and the floors of this process, merged with the ones other worker processes wrote. 
+    Only the `ingest_persisted_limit` highest ids per log table are kept. The floor of a log table rises to the highest id that is not kept, 
+    so a replay older than the persisted ids is still dropped after a restart.
+    Holds `ingest_lock` only to copy the seen-set, so request threads are not blocked by the merge and the write.
+
+    Returns:
+        None
+    """
+    global ingest_seen_dirty
+
+    with ingest_lock:
+        recent_ids = list(ingest_seen_ids)
+        floors = dict(ingest_floors)
+        ingest_seen_dirty = False
+
+    os.makedirs(os.path.dirname(ingest_seen_path), exist_ok=True)
+    with ingest_flush_lock, open(f'{ingest_seen_path}.lock', 'a+') as lock_file:
+        # other worker processes merge into the same file
+        while not try_lock_file(lock_file):
+            time.sleep(0.05)
+        try:
+            persisted_ids, persisted_floors = load_ingest_seen_ids()
+            seen_ids = {table_name: set(log_event_ids) for table_name, log_event_ids in persisted_ids.items()}
+            for table_name, log_event_id in recent_ids:
+                seen_ids.setdefault(table_name, set()).add(log_event_id)
+            for table_name, floor in persisted_floors.items():
+                floors[table_name] = max(floors.get(table_name, 0), floor)
+
+            kept_ids = {}
+            for table_name, log_event_ids in seen_ids.items():
+                log_event_ids = sorted(log_event_ids)
+                kept_ids[table_name] = log_event_ids[-ingest_persisted_limit:]
+                if len(log_event_ids) > ingest_persisted_limit:
+                    floors[table_name] = max(floors.get(table_name, 0), log_event_ids[-ingest_persisted_limit - 1])
+
+            with open(f'{ingest_seen_path}.{os.getpid()}.tmp', 'w') as file:
+                json.dump({'ids': kept_ids, 'floors': floors}, file)
+            os.replace(f'{ingest_seen_path}.{os.getpid()}.tmp', ingest_seen_path)
+        finally:
+            unlock_file(lock_file)
+    return None
+
+def run_ingest_seen_flusher() -> None:
+    """
+    Writes the recent log_event_ids every `ingest_seen_flush_seconds` if new ones were recorded, so the request threads never write the file.
+    Runs in its own thread, started by the first recorded log entry (see `accept_log_event`).
+
+    Returns:
+        None
+    """
+    while True:
+        time.sleep(ingest_seen_flush_seconds)
+        if not ingest_seen_dirty:
+            continue
+        try:
+            save_ingest_seen_ids()
+        except Exception as e:
+            logging.info(f"Could not write {ingest_seen_path}: {e}")
+
+@atexit.register
+def flush_ingest_seen_ids() -> None:
+    """
+    Writes the recent log_event_ids when the app stops, so ids accepted since the last background write are not lost.
+
+    Returns:
+        None
+    """
+    if ingest_seen_dirty:
+        save_ingest_seen_ids()
+    return None
+
+def accept_log_event(data_entry: dict, record: bool = True) -> bool:
+    """
+    Checks whether a triggered log entry is new, so retried or replayed triggers are dropped before any QC work is scheduled.
+
+    A log_event_id is a duplicate if it is in the seen-set of recent ids, or at or below the floor of its log table. 
+    The seen-set and floors start with the ones persisted by earlier runs, and the floor only rises to the ids evicted from the seen-set, so memory stays bounded.
+    An id below the newest ones is not a duplicate by itself: a transaction that got a lower AUTO_INCREMENT id can commit after a higher one.
+    Entries without a log_event_id are always accepted.
+
+    Args:
+        data_entry (dict): The log entry received from the trigger
+        record (bool, optional): If False, only checks the entry without recording it as seen, for callers that record it once its QC job is queued (default is True)
+
+    Returns:
+        bool: True if the entry is new, False if it is a duplicate
+    """
+    global ingest_seen_loaded, ingest_seen_dirty, ingest_flusher_started
+
+    if data_entry.get('log_event_id') is None:
+        return True
+    log_event_id = int(data_entry['log_event_id'])
+    log_tables, _ = get_log_event_and_data_tables(data_entry.get('project_id'))
+    table_name = log_tables[0] if log_tables else 'redcap_log_event'
+    key = (table_name, log_event_id)
+
+    with ingest_lock:
+        if not ingest_seen_loaded:
+            ingest_seen_loaded = True
+            persisted_ids, persisted_floors = load_ingest_seen_ids()
+            for persisted_table, log_event_ids in persisted_ids.items():
+                for persisted_id in log_event_ids:
+                    ingest_seen_ids[(persisted_table, persisted_id)] = None
+            for persisted_table, floor in persisted_floors.items():
+                ingest_floors[persisted_table] = max(ingest_floors.get(persisted_table, 0), floor)
+
+        if key in ingest_seen_ids or log_event_id <= ingest_floors.get(table_name, 0):
+            logging.info(f"Dropped duplicate log_event_id {log_event_id} of {table_name}.")
+            return False
+        if not record:
+            return True
+
+        ingest_seen_ids[key] = None
+        while len(ingest_seen_ids) > ingest_seen_limit:
+            (evicted_table, evicted_id), _ = ingest_seen_ids.popitem(last=False)
+            ingest_floors[evicted_table] = max(ingest_floors.get(evicted_table, 0), evicted_id)
+
+        ingest_seen_dirty = True
+        if not ingest_flusher_started:
+            ingest_flusher_started = True
+            threading.Thread(target=run_ingest_seen_flusher, name='ingest-seen-flusher', daemon=True).start()
+    return True
+
+def open_journal_segment() -> None:
+    """
+    Starts a new segment file of the ingest journal. Must be called while holding `journal_lock`.
+
+    Returns:
+        None
+    """
+    global journal_segment
+
+    os.makedirs(journal_dir, exist_ok=True)
+    if journal_segment is not None:
+        # records of the closed segment must be on disk before it stops being synced
+        journal_segment['file'].flush()
+        os.fsync(journal_segment['file'].fileno())
+        journal_segment['file'].close()
+        if not journal_pending.get(journal_segment['name']):
+            compact_journal_segment(journal_segment['name'])
+    segment_name = f"segment-{journal_run}-{journal_written:012d}.ndjson"
+    journal_segment = {'name': segment_name, 'file': open(os.path.join(journal_dir, segment_name), 'a', encoding='utf-8'), 'records': 0}
+    journal_pending.setdefault(segment_name, set())
+    return None
+
+def compact_journal_segment(segment_name: str) -> None:
+    """
+    Removes a closed journal segment once every event in it was processed.
+
+    Args:
+        segment_name (str): The file name of the segment
+
+    Returns:
+        None
+    """
+    journal_pending.pop(segment_name, None)
+    try:
+        os.remove(os.path.join(journal_dir, segment_name))
+    except OSError as e:
+        logging.info(f"Could not remove journal segment {segment_name}: {e}")
+    return None
+
+def write_journal_record(record: dict) -> int:
+    """
+    Appends a record to the open journal segment without waiting for it to reach the disk. Must be called while holding `journal_lock`.
+
+    Args:
+        record (dict): The record to append
+
+    Returns:
+        int: The number of the record, used to wait for its fsync (see `sync_journal`)
+    """
+    global journal_written
+
+    if journal_segment is None or journal_segment['records'] >= journal_segment_records:
+        open_journal_segment()
+    journal_segment['file'].write(json.dumps(record, default=str) + '\n')
+    journal_segment['file'].flush()
+    journal_segment['records'] += 1
+    journal_written += 1
+    return journal_written
+
+def sync_journal(record_number: int) -> None:
+    """
+    Waits until a journal record is on disk. Writers that arrive while an fsync runs are covered by the next one, so one fsync serves a whole batch of requests.
+
+    Args:
+        record_number (int): The number of the record (see `write_journal_record`)
+
+    Returns:
+        None
+    """
+    global journal_synced
+
+    with journal_sync_lock:
+        if journal_synced >= record_number:
+            return None
+        # synced under the lock, so a rotation cannot close the segment during the fsync
+        with journal_lock:
+            target = journal_written
+            os.fsync(journal_segment['file'].fileno())
+        journal_synced = target
+    return None
+
+def append_journal_event(data_entry: dict) -> str | None:
+    """
+    Records an accepted log entry in the ingest journal and waits until it is on disk, so it is replayed if the app restarts before it is processed.
+
+    Args:
+        data_entry (dict): The log entry received from the trigger
+
+    Returns:
+        str | None: The journal id of the entry, or None if the journal is disabled
+    """
+    return append_journal_events([data_entry])[0]
+
+def append_journal_events(data_entries: list) -> list:
+    """
+    Records several accepted log entries in the ingest journal under one lock and waits for a single fsync covering all of them (see `append_journal_event`).
+    Used for batches, outbox drains and replays, so a batch costs one fsync instead of one per entry.
+
+    Args:
+        data_entries (list): The log entries to record
+
+    Returns:
+        list: The journal ids of the entries in the same order, all None if the journal is disabled
+    """
+    global journal_next_id
+
+    if not journal_enabled:
+        return [None] * len(data_entries)
+    if not data_entries:
+        return []
+    journal_ids = []
+    with journal_lock:
+        for data_entry in data_entries:
+            journal_next_id += 1
+            journal_id = f"{journal_run}-{journal_next_id}"
+            record_number = write_journal_record({'type': 'event', 'id': journal_id, 'entry': data_entry})
+            journal_pending[journal_segment['name']].add(journal_id)
+            journal_ids.append(journal_id)
+    sync_journal(record_number)
+    return journal_ids
+
+def mark_journal_done(journal_ids: list) -> None:
+    """
+    Records that journaled events were processed and removes closed segments that have no open events left.
+    Done markers are not synced: if one is lost, the event is only processed again after a restart.
+
+    Args:
+        journal_ids (list): The journal ids of the processed events
+
+    Returns:
+        None
+    """
+    if not journal_enabled or not journal_ids:
+        return None
+    with journal_lock:
+        for journal_id in journal_ids:
+            write_journal_record({'type': 'done', 'id': journal_id})
+            for segment_name, pending_ids in list(journal_pending.items()):
+                if journal_id in pending_ids:
+                    pending_ids.discard(journal_id)
+                    if not pending_ids and segment_name != journal_segment['name']:
+                        compact_journal_segment(segment_name)
+                    break
+    return None
+
+def claim_stopped_journal_runs() -> list:
+    """
+    Takes the run lock of every journal run whose process has stopped. The lock of a live run is held by its process, 
+    so its segments are never claimed. Claimed locks are kept until the run's segments are replayed (see `release_journal_runs`).
+
+    Returns:
+        list: The claimed runs, formatted as follows: `[{'run': str, 'file': file}, ...]`
+    """
+    if not os.path.exists(journal_dir):
+        return []
+
+    runs = sorted({name.split('-')[1] for name in os.listdir(journal_dir) if name.startswith('segment-') and name.endswith('.ndjson')})
+    claimed_runs = []
+    for run in runs:
+        if run == journal_run:
+            continue
+        lock_file = open(os.path.join(journal_dir, f'run-{run}.lock'), 'a+')
+        if try_lock_file(lock_file):
+            claimed_runs.append({'run': run, 'file': lock_file})
+        else:
+            lock_file.close()
+    return claimed_runs
+
+def release_journal_runs(claimed_runs: list) -> None:
+    """
+    Releases and removes the run locks of replayed journal runs.
+
+    Args:
+        claimed_runs (list): The runs claimed with `claim_stopped_journal_runs`
+
+    Returns:
+        None
+    """
+    for claimed_run in claimed_runs:
+        # the deferred triggers spilled by the run were replayed from its segments
+        try:
+            os.remove(os.path.join(journal_dir, f"deferred-{claimed_run['run']}.ndjson"))
+        except OSError:
+            pass
+        unlock_file(claimed_run['file'])
+        claimed_run['file'].close()
+        try:
+            os.remove(os.path.join(journal_dir, f"run-{claimed_run['run']}.lock"))
+        except OSError:
+            # another process claimed the run in the meantime, it finds no segments left
+            pass
+    return None
+
+def read_journal_segments(runs: list) -> tuple[list, list]:
+    """
+    Reads the open events of the journal segments of the given runs.
+
+    Args:
+        runs (list): The journal runs to read, only runs claimed with `claim_stopped_journal_runs`
+
+    Returns:
+        tuple[list, list]: The open events in the order they were journaled, formatted as `[{'id': str, 'entry': dict}, ...]`, and the segment file names
+    """
+    if not runs or not os.path.exists(journal_dir):
+        return [], []
+
+    # listed after the runs were claimed, so segments removed by an earlier replay are not read
+    segment_names = sorted(name for name in os.listdir(journal_dir) 
+                           if name.startswith('segment-') and name.endswith('.ndjson') and name.split('-')[1] in runs)
+    events = {}
+    done_ids = set()
+    for segment_name in segment_names:
+        with open(os.path.join(journal_dir, segment_name), 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a write cut short by a crash, only the last line of a segment can be partial
+                    continue
+                if record.get('type') == 'event':
+                    events[record['id']] = record
+                elif record.get('type') == 'done':
+                    done_ids.add(record['id'])
+
+    open_events = [record for journal_id, record in events.items() if journal_id not in done_ids]
+    return open_events, segment_names
+
+def start_ingest_journal(**kwargs) -> None:
+    """
+    Enables the ingest journal and replays the events that stopped runs accepted but did not process.
+    Worker processes share the journal directory: each process holds the lock file of its own run, and only runs whose lock is free are replayed,
+    so the live segments of other workers are left alone. The open events are journaled again in a new segment before the old segments are removed, 
+    so a crash during the replay loses nothing.
+
+    Args:
+        **kwargs: The keyword arguments of `operate_quality_control_individual` used for the replayed events
+
+    Returns:
+        None
+    """
+    global journal_enabled, journal_run_lock_file
+
+    if journal_enabled:
+        return None
+    os.makedirs(journal_dir, exist_ok=True)
+    journal_run_lock_file = open(os.path.join(journal_dir, f'run-{journal_run}.lock'), 'a+')
+    try_lock_file(journal_run_lock_file)
+
+    claimed_runs = claim_stopped_journal_runs()
+    open_events, segment_names = read_journal_segments([claimed_run['run'] for claimed_run in claimed_runs])
+    journal_enabled = True
+
+    replayed_ids = append_journal_events([record['entry'] for record in open_events])
+    for segment_name in segment_names:
+        compact_journal_segment(segment_name)
+    release_journal_runs(claimed_runs)
+
+    # the backlog runs as batch jobs per project behind new triggers, so fresh saves are not delayed by it
+    project_entries = {}
+    for record, journal_id in zip(open_events, replayed_ids):
+        entries, journal_ids = project_entries.setdefault(record['entry'].get('project_id'), ([], []))
+        entries.append(record['entry'])
+        journal_ids.append(journal_id)
+    for entries, journal_ids in project_entries.values():
+        enqueue_qc_job(operate_quality_control_batch, journal_ids = journal_ids, priority = qc_priority_sweep, data_entries = entries, yield_to_realtime = True, **kwargs)
+    logging.info(f"Ingest journal started, replayed {len(open_events)} events from {len(segment_names)} segments.")
+    return None
+
+@pinned_snapshot()
+def operate_quality_control_batch(data_entries: list, yield_to_realtime: bool = False, **kwargs) -> None:
+    """
+    Operates the quality control process on a batch of log entries of one project as one job.
+    The entries are grouped per (project_id, pk, event_id, instance) and merged like a burst (see `merge_data_entries`), 
+    and every group is checked with the same memoization context, so the project's tables are loaded once for the whole batch.
+
+    Args:
+        data_entries (list): The log entries of the project, in the order they were received
+        yield_to_realtime (bool, optional): If True, waits for real-time QC between groups, for batches queued at `qc_priority_sweep` (default is False)
+        **kwargs: The keyword arguments of `operate_quality_control_individual` besides the data entry
+
+    Returns:
+        None
+    """
+    groups = {}
+    for data_entry in data_entries:
+        groups.setdefault(get_coalesce_key(data_entry), []).append(data_entry)
+
+    qc_context = create_qc_context(f"batch {data_entries[0].get('project_id')} ({len(data_entries)} entries)")
+    for key, entries in groups.items():
+        if yield_to_realtime:
+            yield_to_realtime_qc(in_worker = True)
+        # one failing record does not stop the rest of the batch
+        try:
+            operate_quality_control_individual(entries[-1], data_entry_table = merge_data_entries(entries), qc_context = qc_context, **kwargs)
+        except Exception as e:
+            logging.info(f"Error in batch QC for {key}: {e}\n{traceback.format_exc()}")
+            send_error_email(message=f"Error in batch QC for {key}: {e}")
+
+    log_qc_context(qc_context)
+    return None
+
+def drain_log_outbox(pid_list: list, batch_size: int = 500, **kwargs) -> int:
+    """
+    Hands the oldest log events recorded in the outbox table to QC, one batch job per project (see `operate_quality_control_batch`).
+    Only the outbox rows whose log rows were fetched and queued (or skipped) are deleted, so a row that commits late with a lower outbox_id is read by a later drain, 
+    and the rows of a job the full QC queue rejected, or whose log row is not found yet, stay in the outbox for the next drain.
+    A failed read of a log table stops the drain without deleting anything. One worker process drains at a time.
+
+    Args:
+        pid_list (list): The project_ids to run QC for
+        batch_size (int, optional): The number of outbox rows read at a time (default is 500)
+        **kwargs: The keyword arguments of `operate_quality_control_individual` besides the data entry
+
+    Returns:
+        int: The number of outbox rows drained
+    """
+    with log_outbox_lock, open(log_outbox_lock_path, 'a+') as lock_file:
+        # another worker process is draining the outbox
+        if not try_lock_file(lock_file):
+            return 0
+        try:
+            conn = connect_to_maria()
+            outbox_rows = execute_maria_cmd(conn, f"SELECT outbox_id, log_table, log_event_id FROM {log_outbox_table} ORDER BY outbox_id LIMIT {int(batch_size)}")
+            if not outbox_rows:
+                conn.close()
+                return 0
+
+            # reads the logged rows of each log table in one query
+            log_event_ids = {}
+            outbox_ids = {}
+            for outbox_id, log_table, log_event_id in outbox_rows:
+                log_event_ids.setdefault(log_table, []).append(int(log_event_id))
+                outbox_ids.setdefault((log_table, int(log_event_id)), []).append(int(outbox_id))
+            data_entries = []
+            for log_table, event_ids in log_event_ids.items():
+                num_qs = ('?, ' * len(event_ids))[:-2]
+                rows = execute_maria_cmd(conn, f"SELECT {', '.join(log_event_fields)} FROM {log_table} WHERE log_event_id IN ({num_qs})", tuple(event_ids))
+                # the error was logged by execute_maria_cmd, the rows are read again by the next drain
+                if rows is None:
+                    conn.close()
+                    return 0
+                data_entries += [(log_table, dict(zip(log_event_fields, [to_sqlite_value(value) for value in row]))) for row in rows]
+            data_entries.sort(key=lambda table_entry: table_entry[1]['log_event_id'])
+
+            # like receive_from_maria, QC is only run in production mode
+            project_entries = {}
+            handled_ids = set()
+            for log_table, data_entry in data_entries:
+                if not kwargs.get('production_mode') or data_entry['project_id'] not in pid_list or not accept_log_event(data_entry, record = False):
+                    handled_ids.update(outbox_ids[(log_table, int(data_entry['log_event_id']))])
+                    continue
+                project_entries.setdefault(data_entry['project_id'], []).append((log_table, data_entry))
+
+            # every drained row is journaled with one fsync
+            drain_journal_ids = iter(append_journal_events([data_entry for table_entries in project_entries.values() for _, data_entry in table_entries]))
+            kept_ids = set()
+            for table_entries in project_entries.values():
+                entries = [data_entry for _, data_entry in table_entries]
+                journal_ids = [journal_id for journal_id in [next(drain_journal_ids) for _ in entries] if journal_id is not None]
+                if enqueue_qc_job(operate_quality_control_batch, journal_ids = journal_ids, data_entries = entries, **kwargs):
+                    for log_table, data_entry in table_entries:
+                        accept_log_event(data_entry)
+                        handled_ids.update(outbox_ids[(log_table, int(data_entry['log_event_id']))])
+                else:
+                    # the rows stay in the outbox, so the journaled copies are closed
+                    mark_journal_done(journal_ids)
+                    kept_ids.update(outbox_id for log_table, data_entry in table_entries for outbox_id in outbox_ids[(log_table, int(data_entry['log_event_id']))])
+
+            drained_ids = sorted(handled_ids)
+            if drained_ids:
+                num_qs = ('?, ' * len(drained_ids))[:-2]
+                execute_maria_cmd(conn, f"DELETE FROM {log_outbox_table} WHERE outbox_id IN ({num_qs})", tuple(drained_ids))
+                conn.commit()
+            conn.close()
+        finally:
+            unlock_file(lock_file)
+
+    logging.info(f"Drained {len(drained_ids)} outbox rows into {len(project_entries)} QC jobs, {len(kept_ids)} rows kept for a full QC queue, {len(outbox_rows) - len(drained_ids) - len(kept_ids)} rows kept for log rows not found yet.")
+    return len(drained_ids)
+
+def run_log_outbox_poller(poll_seconds: float, pid_list: list, **kwargs) -> None:
+    """
+    Drains the outbox table until the process exits, without waiting between full batches.
+    Every worker process polls, but only one drains at a time (see `drain_log_outbox`).
+
+    Args:
+        poll_seconds (float): The seconds to wait after the outbox was found empty
+        pid_list (list): The project_ids to run QC for
+        **kwargs: The keyword arguments of `operate_quality_control_individual` besides the data entry
+
+    Returns:
+        None
+    """
+    batch_size = 500
+    while True:
+        try:
+            drained = drain_log_outbox(pid_list, batch_size, **kwargs)
+        except Exception as e:
+            drained = 0
+            logging.info(f"Error draining {log_outbox_table}: {e}\n{traceback.format_exc()}")
+        if drained < batch_size:
+            time.sleep(poll_seconds)
+
+def start_log_capture(capture_mode: str, pid_list: list, poll_seconds: float = 2, **kwargs) -> None:
+    """
+    Sets how the log_event triggers capture data entries, and starts polling the outbox table in outbox mode.
+    The triggers are only rewritten when they are next refreshed (see `refresh_background_trigger`).
+
+    Args:
+        capture_mode (str): 'http' for triggers that post each log event, 'outbox' for triggers that insert it into the outbox table
+        pid_list (list): The project_ids to run QC for
+        poll_seconds (float, optional): The seconds between polls of an empty outbox (default is 2)
+        **kwargs: The keyword arguments of `operate_quality_control_individual` besides the data entry
+
+    Returns:
+        None
+    """
+    global trigger_capture_mode
+
+    if capture_mode not in ('http', 'outbox'):
+        raise ValueError(f"Unknown capture mode {capture_mode}, expected 'http' or 'outbox'")
+    trigger_capture_mode = capture_mode
+    if capture_mode == 'outbox':
+        threading.Thread(target=run_log_outbox_poller, args=(poll_seconds, pid_list), kwargs=kwargs, name='log-outbox-poller', daemon=True).start()
+        logging.info(f"Capturing log events through {log_outbox_table}, polled every {poll_seconds}s.")
+    return None
+
+def read_single_flight_status(job_name: str) -> dict:
+    """
+    Reads the status record of a long job.
+
+    Args:
+        job_name (str): The name of the job
+
+    Returns:
+        dict: The status record, formatted as follows: `{'job': str, 'state': 'running' | 'finished' | 'failed', 'started': str, 'finished': str | None, 'progress': str, 'pid': int}`,
+              or `{'job': str, 'state': 'never run'}` if the job has no status record
+    """
+    status_path = os.path.join(single_flight_root, f'{job_name}.json')
+    try:
+        with open(status_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {'job': job_name, 'state': 'never run'}
+
+def write_single_flight_status(job_name: str, **fields) -> None:
+    """
+    Updates fields of the status record of a long job.
+
+    Args:
+        job_name (str): The name of the job
+        **fields: The fields to set
+
+    Returns:
+        None
+    """
+    status = read_single_flight_status(job_name)
+    status.update(fields)
+    status_path = os.path.join(single_flight_root, f'{job_name}.json')
+    with open(f'{status_path}.{threading.get_ident()}.tmp', 'w') as file:
+        json.dump(status, file)
+    os.replace(f'{status_path}.{threading.get_ident()}.tmp', status_path)
+    return None
+
+def report_progress(progress: str) -> None:
+    """
+    Records the progress of the long job run by the current thread in its status record. Does nothing outside of a long job.
+    Writes at most once every `single_flight_progress_seconds`, and a write that fails (e.g. while another worker reads the record on Windows) is skipped,
+    so reporting never slows down or stops the job.
+
+    Args:
+        progress (str): A short description of the current step
+
+    Returns:
+        None
+    """
+    job_name = getattr(single_flight_local, 'job_name', None)
+    if job_name is None or time.monotonic() - getattr(single_flight_local, 'last_report', 0) < single_flight_progress_seconds:
+        return None
+    single_flight_local.last_report = time.monotonic()
+    try:
+        write_single_flight_status(job_name, progress=progress, updated=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    except OSError as e:
+        logging.info(f"Could not record the progress of {job_name}: {e}")
+    return None
+
+def run_single_flight_job(job_name: str, lock_file, target, kwargs: dict) -> None:
+    """
+    Runs a long job that holds its lock file, records how it ended and releases the lock.
+
+    Args:
+        job_name (str): The name of the job
+        lock_file (file): The lock file taken for the job
+        target (callable): The function to run
+        kwargs (dict): The keyword arguments of the function
+
+    Returns:
+        None
+    """
+    single_flight_local.job_name = job_name
+    single_flight_local.last_report = 0
+    try:
+        target(**kwargs)
+        write_single_flight_status(job_name, state='finished', finished=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    except Exception as e:
+        logging.info(f"Error in {job_name}: {e}\n{traceback.format_exc()}")
+        send_error_email(message=f"Error in {job_name}: {e}")
+        write_single_flight_status(job_name, state='failed', finished=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), error=str(e))
+    finally:
+        single_flight_local.job_name = None
+        unlock_file(lock_file)
+        lock_file.close()
+    return None
+
+def run_single_flight(job_name: str, target, **kwargs) -> dict:
+    """
+    Starts a long job in the background unless it is already running in any worker process, in which case the running job is reported instead.
+    The job holds a lock file for as long as it runs, and its state and progress are kept in a status record (see `report_progress`).
+
+    Args:
+        job_name (str): The name of the job, e.g. 'routine'
+        target (callable): The function to run
+        **kwargs: The keyword arguments of the function
+
+    Returns:
+        dict: The status record of the job (see `read_single_flight_status`), with 'started_now' set to True if this call started it
+    """
+    os.makedirs(single_flight_root, exist_ok=True)
+    with single_flight_lock:
+        lock_file = open(os.path.join(single_flight_root, f'{job_name}.lock'), 'a+')
+        if not try_lock_file(lock_file):
+            lock_file.close()
+            status = read_single_flight_status(job_name)
+            logging.info(f"{job_name} is already running (started {status.get('started')}), not starting it again.")
+            return {**status, 'started_now': False}
+
+        write_single_flight_status(job_name, job=job_name, state='running', started=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
+                                   finished=None, progress='Starting', pid=os.getpid(), error=None)
+        threading.Thread(target=run_single_flight_job, args=(job_name, lock_file, target, kwargs), name=f'single-flight-{job_name}', daemon=True).start()
+    return {**read_single_flight_status(job_name), 'started_now': True}
+
+def get_db_connection_ratio() -> float:
+    """
+    Retrieves the share of the mariaDB max_connections that is in use.
+
+    Returns:
+        float: The connected threads divided by max_connections, 1 if the server refuses the connection
+    """
+    try:
+        conn = connect_to_maria()
+    except SystemExit:
+        # connect_to_maria exits when the server refuses the connection, e.g. at max_connections
+        return 1.0
+    try:
+        connected = execute_maria_cmd(conn, "SHOW GLOBAL STATUS LIKE 'Threads_connected'")
+        max_connections = execute_maria_cmd(conn, "SELECT @@max_connections")
+    finally:
+        conn.close()
+    if not connected or not max_connections:
+        return 0.0
+    return int(connected[0][1]) / int(max_connections[0][0])
+
+def get_qc_overload() -> tuple[int, str] | None:
+    """
+    Checks the depth of the QC queue, the memory of the app and the mariaDB connections in use against the admission limits (see `start_qc_admission`).
+
+    Returns:
+        tuple[int, str] | None: The HTTP status to shed triggers with (429 if the queue is full, 503 otherwise) and the reason, or None if nothing is over its limit
+    """
+    metrics = get_qc_queue_metrics()
+    if metrics['capacity'] and metrics['depth'] >= qc_admission_queue_ratio * metrics['capacity']:
+        # the triggers arrive faster than they are checked
+        return 429, f"QC queue is at {metrics['depth']} of {metrics['capacity']} jobs"
+    if psutil is not None and qc_admission_max_memory_mb and psutil.Process().memory_info().rss / 1024 ** 2 >= qc_admission_max_memory_mb:
+        return 503, f"App memory is above {qc_admission_max_memory_mb} MB"
+    if qc_admission_db_ratio >= qc_admission_max_db_ratio:
+        return 503, f"mariaDB connections are at {qc_admission_db_ratio:.0%} of max_connections"
+    return None
+
+def check_qc_admission(count: bool = True, spill: bool = False) -> dict:
+    """
+    Checks whether new triggers can be queued for QC, based on the depth of the QC queue, the memory of the app 
+    and the mariaDB connections in use (see `start_qc_admission`). Always admits if admission control is not started.
+
+    Args:
+        count (bool, optional): If True, counts a trigger that is neither admitted nor deferred as shed (default is True)
+        spill (bool, optional): If True, a trigger beyond `qc_deferred_limit` is still deferred, in the spill file. Used for senders that never retry, 
+                                such as the http_post of the MariaDB triggers (default is False)
+
+    Returns:
+        dict: The decision, formatted as follows: `{'admitted': bool, 'defer': bool, 'status': int, 'reason': str, 'retry_after': int}`,
+              where 'defer' is True if a trigger that is not admitted can be journaled and queued later (see `defer_qc_submission`)
+    """
+    admission = {'admitted': True, 'defer': False, 'status': 200, 'reason': '', 'retry_after': qc_admission_retry_after}
+    if not qc_admission_enabled:
+        return admission
+
+    overload = get_qc_overload()
+    if overload is not None:
+        admission.update(admitted=False, status=overload[0], reason=overload[1])
+    elif qc_deferred_jobs or qc_deferred_spilled:
+        # deferred triggers are queued first, so new ones wait behind them
+        admission.update(admitted=False, status=503, reason=f"{len(qc_deferred_jobs) + qc_deferred_spilled} deferred triggers are waiting")
+
+    if not admission['admitted']:
+        admission['defer'] = journal_enabled and (spill or len(qc_deferred_jobs) < qc_deferred_limit)
+        if count and not admission['defer']:
+            with qc_queue_metrics_lock:
+                qc_queue_metrics['shed'] += 1
+            logging.info(f"Shedding QC trigger: {admission['reason']}")
+    return admission
+
+def defer_qc_submission(submit, spill: bool = False, **kwargs) -> None:
+    """
+    Holds the submission of journaled triggers until the app has recovered from overload (see `drain_deferred_qc_jobs`).
+    The triggers are already on disk, so they are replayed after a restart if the app stops before they are queued.
+    Once `qc_deferred_limit` triggers are held in memory, spillable triggers are written to the spill file instead.
+
+    Args:
+        submit (callable): The function that queues the triggers and returns True if it did, e.g. `coalesce_qc_entry` or `enqueue_qc_job`
+        spill (bool, optional): If True, the keyword arguments are JSON serializable and can be held in the spill file (default is False)
+        **kwargs: The keyword arguments of the function
+
+    Returns:
+        None
+    """
+    global qc_deferred_spilled
+
+    if spill and (qc_deferred_spilled or len(qc_deferred_jobs) >= qc_deferred_limit):
+        with qc_deferred_spill_lock:
+            os.makedirs(journal_dir, exist_ok=True)
+            with open(qc_deferred_spill_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps({'submit': submit.__name__, 'kwargs': kwargs}, default=str) + '\n')
+            qc_deferred_spilled += 1
+    else:
+        qc_deferred_jobs.append((submit, kwargs))
+    with qc_queue_metrics_lock:
+        qc_queue_metrics['deferred'] += 1
+    return None
+
+def load_spilled_qc_submissions() -> None:
+    """
+    Moves up to `qc_deferred_limit` triggers, oldest first, from the spill file back to the deferred triggers in memory.
+
+    Returns:
+        None
+    """
+    global qc_deferred_spilled
+
+    with qc_deferred_spill_lock:
+        if not qc_deferred_spilled:
+            return None
+        with open(qc_deferred_spill_path, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+        for line in lines[:qc_deferred_limit]:
+            record = json.loads(line)
+            qc_deferred_jobs.append((globals()[record['submit']], record['kwargs']))
+        remaining = lines[qc_deferred_limit:]
+        if remaining:
+            with open(qc_deferred_spill_path + '.tmp', 'w', encoding='utf-8') as file:
+                file.writelines(remaining)
+            os.replace(qc_deferred_spill_path + '.tmp', qc_deferred_spill_path)
+        else:
+            os.remove(qc_deferred_spill_path)
+        qc_deferred_spilled = len(remaining)
+    return None
+
+def drain_deferred_qc_jobs() -> None:
+    """
+    Queues deferred triggers, oldest first, for as long as the QC queue, the memory and the mariaDB connections allow it.
+    Spilled triggers are loaded once the triggers held in memory are queued.
+
+    Returns:
+        None
+    """
+    drained = 0
+    while get_qc_overload() is None:
+        if not qc_deferred_jobs:
+            load_spilled_qc_submissions()
+            if not qc_deferred_jobs:
+                break
+        submit, kwargs = qc_deferred_jobs.popleft()
+        if not submit(**kwargs):
+            qc_deferred_jobs.appendleft((submit, kwargs))
+            break
+        drained += 1
+    if drained:
+        logging.info(f"Queued {drained} deferred QC triggers, {len(qc_deferred_jobs) + qc_deferred_spilled} still deferred.")
+    return None
+
+def run_qc_admission_monitor() -> None:
+    """
+    Checks the mariaDB connections in use and queues deferred triggers every `qc_admission_check_seconds`.
+    Runs in its own thread (see `start_qc_admission`).
+
+    Returns:
+        None
+    """
+    global qc_admission_db_ratio
+
+    while True:
+        try:
+            qc_admission_db_ratio = get_db_connection_ratio()
+            drain_deferred_qc_jobs()
+        except Exception as e:
+            logging.info(f"Error in the QC admission monitor: {e}\n{traceback.format_exc()}")
+        time.sleep(qc_admission_check_seconds)
+
+def start_qc_admission(queue_ratio: float = 0.8, max_memory_mb: int = 0, max_db_ratio: float = 0.9, retry_after: int = 30, check_seconds: float = 5) -> None:
+    """
+    Starts admission control of the ingest routes: while the QC queue, the memory of the app or the mariaDB connections are above their limits,
+    new triggers are journaled and queued once the app has recovered, or shed with a Retry-After if the journal is disabled.
+    Does nothing if admission control is already running.
+
+    Args:
+        queue_ratio (float, optional): The share of the QC queue capacity above which triggers are not queued (default is 0.8)
+        max_memory_mb (int, optional): The resident memory of the app in MB above which triggers are not queued, 0 to not check (default is 0)
+        max_db_ratio (float, optional): The share of the mariaDB max_connections above which triggers are not queued (default is 0.9)
+        retry_after (int, optional): The seconds a shed trigger is asked to wait (default is 30)
+        check_seconds (float, optional): The seconds between checks of the mariaDB connections (default is 5)
+
+    Returns:
+        None
+    """
+    global qc_admission_enabled, qc_admission_queue_ratio, qc_admission_max_memory_mb, qc_admission_max_db_ratio, qc_admission_retry_after, qc_admission_check_seconds
+
+    if qc_admission_enabled:
+        return None
+    if max_memory_mb and psutil is None:
+        logging.info("psutil is not installed, the memory of the app is not checked for QC admission.")
+    qc_admission_queue_ratio = queue_ratio
+    qc_admission_max_memory_mb = max_memory_mb
+    qc_admission_max_db_ratio = max_db_ratio
+    qc_admission_retry_after = retry_after
+    qc_admission_check_seconds = check_seconds
+    qc_admission_enabled = True
+    threading.Thread(target=run_qc_admission_monitor, name='qc-admission-monitor', daemon=True).start()
+    logging.info(f"QC admission control started (queue {queue_ratio:.0%}, memory {max_memory_mb or 'unchecked'} MB, mariaDB connections {max_db_ratio:.0%}).")
     return None
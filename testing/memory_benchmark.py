@@ -0,0 +1,74 @@
+# Compares the resident memory of the unioned super table and merged data table
+# before and after compact_frame, using synthetic data shaped like the redcap tables.
+# Imports redcom_API, so it needs the app's full environment (including the mariadb driver).
+# With 1,000,000 rows and pandas 3.0.6: unioned_super_table 315.5 MB -> 18.1 MB (17.4x),
+# merged_data_table 61.5 MB -> 37.0 MB (1.7x, record and value stay strings).
+# python testing/memory_benchmark.py [rows]
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redcom_API import *
+
+def make_super_table(rows: int) -> pd.DataFrame:
+    """
+    Builds a synthetic unioned super table in the layout produced before compaction.
+
+    Args:
+        rows (int): The number of rows to generate
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame shaped like the uncompacted unioned super table
+    """
+    rng = np.random.default_rng(0)
+    field_names = np.array([f"field_{i}" for i in range(400)], dtype=object)
+    form_names = np.array([f"form_{i}" for i in range(40)], dtype=object)
+    users = np.array([f"user{i}" for i in range(60)], dtype=object)
+
+    user_index = rng.integers(0, len(users), rows)
+    return pd.DataFrame({
+        'log_event_id': rng.integers(1, 10_000_000, rows),
+        'project_id': rng.choice([129, 146, 151], rows),
+        'event_id': rng.integers(400, 900, rows),
+        'pk': rng.integers(10000, 99999, rows),
+        'instance': rng.integers(1, 4, rows),
+        'form_name': form_names[rng.integers(0, len(form_names), rows)],
+        'field_name': field_names[rng.integers(0, len(field_names), rows)],
+        'value': ("'" + pd.Series(rng.integers(0, 300, rows)).astype(str) + "'").to_numpy(dtype=object),
+        'ui_id': user_index + 1,
+        'user': users[user_index],
+        'user_email': np.array([f"{u}@tufts.edu" for u in users], dtype=object)[user_index],
+        'page': np.full(rows, 'DataEntry/index.php', dtype=object),
+        'description': np.full(rows, 'Update record', dtype=object),
+        'sql_log': np.full(rows, "UPDATE redcap_data SET value = '1' WHERE project_id = 146 AND record = '10000' AND event_id = 400 AND field_name = 'field_0' AND instance is NULL", dtype=object),
+    })
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """
+    Returns the deep memory usage of a DataFrame in bytes.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to measure
+
+    Returns:
+        int: The memory usage in bytes
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    super_table = make_super_table(rows)
+    compact_super_table = compact_frame(super_table[super_table_columns])
+
+    data_table = super_table[['project_id', 'event_id', 'pk', 'instance', 'field_name', 'value']].rename(columns={'pk': 'record'})
+    data_table['record'] = data_table['record'].astype(str)
+    data_table['value'] = data_table['value'].str.strip("'")
+    compact_data_table = compact_frame(add_numeric_value(data_table.copy()))
+
+    for name, before, after in [('unioned_super_table', super_table, compact_super_table), ('merged_data_table', data_table, compact_data_table)]:
+        before_mb = frame_memory(before) / 1024 ** 2
+        after_mb = frame_memory(after) / 1024 ** 2
+        print(f"{name}: {rows} rows, {before_mb:.1f} MB -> {after_mb:.1f} MB ({before_mb / after_mb:.1f}x smaller)")
@@ -0,0 +1,72 @@
+# Compares reading a stored_data snapshot from CSV and from its memory-mapped Arrow copy,
+# using a synthetic data dictionary shaped like data_dic.csv.
+# python testing/snapshot_benchmark.py [rows]
+
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redcom_API import *
+
+def make_data_dictionary(rows: int) -> pd.DataFrame:
+    """
+    Builds a synthetic data dictionary in the layout of the redcap_metadata table.
+
+    Args:
+        rows (int): The number of rows to generate
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame shaped like the stored data dictionary
+    """
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'project_id': rng.choice([129, 146, 151], rows),
+        'field_name': [f"field_{i}" for i in range(rows)],
+        'form_name': [f"form_{i}" for i in rng.integers(0, 40, rows)],
+        'field_order': np.arange(rows, dtype=float),
+        'element_type': rng.choice(['text', 'radio', 'select', 'calc'], rows),
+        'element_label': [f"Question {i} of the visit form" for i in range(rows)],
+        'element_validation_type': rng.choice(['int', 'float', None], rows),
+        'branching_logic': rng.choice(["[visit_done] = '1'", "[age] > 18 AND [consent] = '1'", None], rows),
+        'misc': rng.choice(['@HIDDEN', None], rows),
+    })
+
+def time_read(read_function, repeats: int = 5) -> float:
+    """
+    Returns the fastest of several timed reads in seconds.
+
+    Args:
+        read_function (callable): The function that reads the snapshot
+        repeats (int, optional): The number of timed reads (default is 5)
+
+    Returns:
+        float: The fastest read time in seconds
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        read_function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    if pa is None:
+        sys.exit("pyarrow is not installed, only the CSV snapshot is available.")
+
+    with tempfile.TemporaryDirectory() as path:
+        file_path = os.path.join(path, 'data_dic.csv')
+        write_snapshot(make_data_dictionary(rows), file_path)
+
+        csv_seconds = time_read(lambda: apply_snapshot_schema(pd.read_csv(file_path), file_path))
+        arrow_seconds = time_read(lambda: load_snapshot_file(file_path))
+        cached_seconds = time_read(lambda: read_snapshot(file_path))
+
+        print(f"data_dic: {rows} rows")
+        print(f"csv: {csv_seconds * 1000:.1f} ms")
+        print(f"arrow: {arrow_seconds * 1000:.1f} ms ({csv_seconds / arrow_seconds:.1f}x faster)")
+        print(f"cached: {cached_seconds * 1000:.3f} ms ({csv_seconds / cached_seconds:.0f}x faster)")
+        print(f"dtypes kept: {dict(load_snapshot_file(file_path).dtypes.astype(str))}")